@@ -5,17 +5,16 @@ from services.firestore import (
     get_message_counts_by_role,
     get_daily_conversation_counts,
     get_recent_conversations,
-    get_all_conversations,
-    get_conversation_messages,
-    get_leads_count_by_city,
-    get_leads_count_by_state,
-    get_leads_count_by_age_range,
+    get_conversations_page,
+    get_conversation_messages_page,
+    get_lead_aggregates,
     get_settings,
     update_settings,
     verify_admin_password,
     update_admin_password,
     _is_enabled,
 )
+from services import search_index
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -121,6 +120,9 @@ def api_reports():
         conversation_counts = get_conversation_counts(days=days)
         daily_conversations = get_daily_conversation_counts(days=days)
 
+    # Histogramas de leads em uma única leitura (cidade, estado e faixa etária juntos)
+    leads = get_lead_aggregates()
+
     data = {
         "conversation_counts": conversation_counts,
         # Por enquanto: todas as mensagens (pode ser estendido futuramente para receber days ou date_start/date_end)
@@ -129,9 +131,9 @@ def api_reports():
         # Mantém comportamento atual (pode ser estendido futuramente para receber days ou date_start/date_end)
         "recent_conversations": get_recent_conversations(limit=10),
         # Por enquanto: todos os leads (pode ser estendido futuramente se os documentos de leads tiverem campos de timestamp consistentes)
-        "leads_by_city": get_leads_count_by_city(),
-        "leads_by_state": get_leads_count_by_state(),
-        "leads_by_age_range": get_leads_count_by_age_range(),
+        "leads_by_city": leads["by_city"],
+        "leads_by_state": leads["by_state"],
+        "leads_by_age_range": leads["by_age_range"],
     }
     return jsonify(data)
 
@@ -141,24 +143,47 @@ def conversations_page():
     admin_theme = _get_admin_theme()
     return render_template("admin/conversations.html", admin_theme=admin_theme)
 
+# Tamanho máximo de página aceito nas listagens paginadas
+ADMIN_PAGE_SIZE_MAX = 200
+
+
+def _page_size(default: int) -> int:
+    size = request.args.get("page_size", type=int) or default
+    return max(1, min(size, ADMIN_PAGE_SIZE_MAX))
+
+
 @admin_bp.get("/api/conversations")
 def api_conversations():
-    # Ler parâmetro de busca da query string
+    # Busca por prefixo do session_id e paginação por cursor (page_token opaco)
     search = (request.args.get("search") or "").strip()
-    
-    # Montar dicionário de filtros
-    filters = {}
-    if search:
-        filters["search"] = search
-    
-    # Passar filtros para o serviço (None se vazio para manter comportamento atual)
-    data = get_all_conversations(limit=50, filters=filters if filters else None)
-    return jsonify({"conversations": data})
+    page_token = request.args.get("page_token") or None
+
+    try:
+        page = get_conversations_page(
+            limit=_page_size(50),
+            page_token=page_token,
+            search=search or None,
+        )
+    except ValueError:
+        return jsonify({"error": "page_token inválido"}), 400
+    return jsonify(page)
+
+@admin_bp.get("/api/conversations/search")
+def api_conversations_search():
+    # Busca textual no conteúdo das mensagens (índice local, sem varrer o Firestore)
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"results": []})
+    return jsonify({"results": search_index.search(q, limit=_page_size(20))})
 
 @admin_bp.get("/api/conversations/<session_id>/messages")
 def api_conversation_messages(session_id):
-    msgs = get_conversation_messages(session_id, limit=200)
-    return jsonify({"messages": msgs})
+    page_token = request.args.get("page_token") or None
+    try:
+        page = get_conversation_messages_page(session_id, limit=_page_size(200), page_token=page_token)
+    except ValueError:
+        return jsonify({"error": "page_token inválido"}), 400
+    return jsonify(page)
 
 
 @admin_bp.get("/settings")
@@ -1,22 +1,26 @@
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
-from utils.responder import Chatbot
+from utils.responder import Chatbot, ARQUIVO_DADOS
+from utils.atualizador import iniciar_atualizador
 import textwrap
 import os
 import time
 import random
 import re
-from datetime import datetime
+import json
+import hashlib
+from datetime import datetime, timezone
 from services.firestore import (
     init_admin,
     init_default_admin,
-    get_or_create_conversation,
-    save_message,
-    get_conversation,
-    update_conversation,
-    save_lead_from_conversation,
+    get_or_create_conversation_state,
+    enqueue_turn,
+    get_write_behind_stats,
+    get_city_cache_stats,
+    get_conversation_messages,
     get_settings,
+    get_settings_version,
     normalize_city_name,
 )
 
@@ -52,12 +56,26 @@ if AI_FIRESTORE_ENABLED:
 else:
     print("[Firestore] Persistência de conversas DESABILITADA (AI_FIRESTORE_ENABLED=false)")
 
+# Quantidade de mensagens persistidas usadas para reconstruir a sessão de um usuário
+CHAT_SESSION_HISTORY_LIMIT = int(os.getenv("CHAT_SESSION_HISTORY_LIMIT", "40"))
+
+
+def carregar_historico_sessao(session_id: str) -> list:
+    """Carrega as últimas mensagens da conversa no Firestore para reconstruir a sessão do Gemini."""
+    if not AI_FIRESTORE_ENABLED:
+        return []
+    return get_conversation_messages(session_id, limit=CHAT_SESSION_HISTORY_LIMIT, latest=True)
+
+
 try:
-    chatbot_web = Chatbot()
+    chatbot_web = Chatbot(history_loader=carregar_historico_sessao)
 except Exception as e:
     print(f"CRÍTICO: Não foi possível inicializar o chatbot para a web. Erro: {e}")
     chatbot_web = None
 
+# Atualização da base de conhecimento em segundo plano (KNOWLEDGE_WATCH_SECONDS / KNOWLEDGE_REFRESH_SECONDS)
+atualizador_conhecimento = iniciar_atualizador(chatbot_web, ARQUIVO_DADOS) if chatbot_web else None
+
 # Logs de modelos disponíveis e modelo selecionado
 try:
     if chatbot_web:
@@ -258,9 +276,22 @@ def normalize_lead_answer(field: str, answer: str):
     return answer[:255]
 
 
-def bot_response_with_fallback(user_message: str) -> str:
-    res = chatbot_web.gerar_resposta(user_message)
+def bot_response_with_fallback(user_message: str, session_id: str | None = None) -> str:
+    res = chatbot_web.gerar_resposta(user_message, session_id=session_id)
     res_str = res if isinstance(res, str) else (str(res) if res is not None else "")
+    return _fallback_if_failed(user_message, res_str)
+
+
+def bot_stream_with_fallback(user_message: str, session_id: str):
+    """Como bot_response_with_fallback, mas gera os eventos ("chunk"/"final") do streaming."""
+    for tipo, texto in chatbot_web.gerar_resposta_stream(user_message, session_id):
+        if tipo == "final":
+            texto = _fallback_if_failed(user_message, texto)
+        yield tipo, texto
+
+
+def _fallback_if_failed(user_message: str, res_str: str) -> str:
+    """Se a IA falhou numa pergunta sobre inscrição/link, entrega o link oficial mesmo assim."""
     lower = user_message.strip().lower()
     keywords = {"link", "inscrição", "inscrever", "site", "2026", "edital"}
     failed = ("Humm… não consegui processar agora" in res_str) or ("Humm... não consegui processar agora" in res_str) or ("Humm…" in res_str and "processar" in res_str)
@@ -286,11 +317,41 @@ DEFAULT_QUICK_ACTIONS = [
     {"label": "📚 Recursos de estudo", "message": "Quais são os melhores recursos de estudo?"}
 ]
 
+# Tempo (s) que navegadores/CDNs podem reutilizar /api/chat-config sem revalidar
+CHAT_CONFIG_MAX_AGE = int(os.getenv("CHAT_CONFIG_MAX_AGE", "60"))
+# Corpo e ETag da última config montada, reaproveitados enquanto a versão das settings não muda
+_chat_config_memo = {"version": None, "body": None, "etag": None}
+
+
 @app.route('/api/chat-config', methods=['GET'])
 def api_chat_config():
-    """Endpoint público para configs do chat widget."""
+    """
+    Endpoint público para configs do chat widget.
+    Responde com ETag (hash do conteúdo) e Cache-Control; If-None-Match igual recebe 304.
+    """
     chat_cfg = get_settings("chat_config") or {}
-    
+    version = get_settings_version("chat_config")
+
+    memo = _chat_config_memo
+    if memo["version"] != version or memo["body"] is None:
+        body = json.dumps(_montar_chat_config(chat_cfg), ensure_ascii=False, sort_keys=True)
+        memo.update(
+            version=version,
+            body=body,
+            etag=hashlib.sha1(body.encode("utf-8")).hexdigest()[:20],
+        )
+
+    if request.if_none_match.contains_weak(memo["etag"]):
+        resp = app.response_class(status=304)
+    else:
+        resp = app.response_class(memo["body"], mimetype="application/json")
+    resp.set_etag(memo["etag"])
+    resp.headers["Cache-Control"] = f"public, max-age={CHAT_CONFIG_MAX_AGE}"
+    return resp
+
+
+def _montar_chat_config(chat_cfg: dict) -> dict:
+    """Monta a config pública do widget a partir de settings/chat_config, com defaults."""
     # Processar quick_actions com defaults
     quick_actions = chat_cfg.get("quick_actions")
     if not isinstance(quick_actions, list) or len(quick_actions) == 0:
@@ -327,7 +388,7 @@ def api_chat_config():
         "chat_background_color": chat_cfg.get("chat_background_color", ""),
         "chat_background_image_url": chat_cfg.get("chat_background_image_url", ""),
     }
-    return jsonify(data)
+    return data
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -346,25 +407,112 @@ def chat():
 
     # Se Firestore estiver desativado, mantém comportamento original
     if not AI_FIRESTORE_ENABLED:
-        bot_response = bot_response_with_fallback(user_message)
+        bot_response = bot_response_with_fallback(user_message, session_id)
         return jsonify({
             'response': bot_response,
             'session_id': session_id
         })
 
-    # Firestore habilitado: fluxo com leads
-    try:
-        # Garante que a conversa existe
-        get_or_create_conversation(session_id)
+    # Firestore habilitado: fluxo com leads. O que o turno precisa persistir é registrado em
+    # `turno` e enfileirado no write-behind do Firestore, gravado em lote fora do caminho da resposta.
+    user_at = datetime.now(timezone.utc)
+    turno = {"bot_meta": {"source": "web"}}
+    bot_response = processar_turno_com_lead(session_id, user_message, turno)
+
+    enqueue_turn(
+        session_id,
+        user_text=user_message,
+        bot_text=bot_response,
+        user_meta={"source": "web"},
+        user_at=user_at,
+        bot_at=datetime.now(timezone.utc),
+        **turno,
+    )
+
+    return jsonify({
+        "response": bot_response,
+        "session_id": session_id,
+    })
+
+
+def _evento_sse(evento: str, dados: dict) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
 
-        # Lê estado atual da conversa
-        conv_data = get_conversation(session_id) or {}
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Versão do /api/chat com Server-Sent Events: eventos "chunk" ({"text"}) com o texto parcial
+    à medida que a IA responde e um "replace" ({"response", "session_id"}) com a resposta final,
+    que substitui o parcial (links corrigidos no pós-processamento). O turno é gravado uma vez, no fim.
+    """
+    if not chatbot_web:
+        return jsonify({'response': "Desculpe, o chatbot está temporariamente fora de serviço."}), 500
+
+    user_message = request.json.get('message', '')
+    if not user_message:
+        return jsonify({'response': "Por favor, digite sua mensagem!"}), 400
+
+    session_id = request.json.get('session_id')
+    if not session_id:
+        epoch = int(time.time() * 1000)
+        rand = random.randint(1000, 9999)
+        session_id = f"sess_{epoch}_{rand}"
+
+    def gerar():
+        user_at = datetime.now(timezone.utc)
+        turno = {"bot_meta": {"source": "web"}}
+        if AI_FIRESTORE_ENABLED:
+            resultado = processar_turno_com_lead(session_id, user_message, turno, responder=bot_stream_with_fallback)
+        else:
+            resultado = bot_stream_with_fallback(user_message, session_id)
+
+        # Respostas do fluxo de lead são texto pronto; as da IA chegam em eventos
+        bot_response = resultado if isinstance(resultado, str) else None
+        if bot_response is None:
+            for tipo, texto in resultado:
+                if tipo == "chunk":
+                    yield _evento_sse("chunk", {"text": texto})
+                else:
+                    bot_response = texto
+
+        # Enfileira antes do evento final: se o cliente desconectar logo depois, o turno já está salvo
+        if AI_FIRESTORE_ENABLED:
+            enqueue_turn(
+                session_id,
+                user_text=user_message,
+                bot_text=bot_response,
+                user_meta={"source": "web"},
+                user_at=user_at,
+                bot_at=datetime.now(timezone.utc),
+                **turno,
+            )
+        yield _evento_sse("replace", {"response": bot_response, "session_id": session_id})
+
+    return Response(
+        stream_with_context(gerar()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def processar_turno_com_lead(session_id: str, user_message: str, turno: dict, responder=bot_response_with_fallback):
+    """
+    Executa um turno do chat com o fluxo de captura de leads e retorna a resposta do bot.
+    Nenhuma gravação é feita aqui: o que precisa ser persistido além das mensagens
+    (bot_meta, state_updates do lead e lead_data do lead concluído) é registrado em `turno`,
+    que vira os argumentos de enqueue_turn.
+    Quando a resposta vem da IA, ela é o retorno de `responder(user_message, session_id)`
+    (no streaming, um gerador de eventos em vez do texto).
+    """
+    try:
+        # Garante que a conversa existe e lê o estado atual com uma única leitura
+        # (já inclui o estado de turnos anteriores ainda na fila do write-behind).
+        # Sem touch: a gravação da mensagem do usuário já atualiza a última atividade.
+        conv_data = get_or_create_conversation_state(session_id, touch=False) or {}
         lead_stage = conv_data.get("lead_stage")  # None, "collecting", "done"
         lead_done = conv_data.get("lead_done", False)
         lead_data = conv_data.get("lead_data") or {}
-
-        # Sempre salva mensagem do usuário
-        save_message(session_id, "user", user_message, meta={"source": "web"})
     except Exception as e:
         print(f"[Firestore] Erro inicial no fluxo de lead/conversa: {e}")
         lead_stage = None
@@ -379,39 +527,20 @@ def chat():
     is_delete_command = user_msg_lower in ["apagar dados", "apagar meu cadastro", "apagar", "deletar dados", "deletar"]
     
     if is_delete_command:
-        try:
-            update_conversation(session_id, {
-                "lead_stage": None,
-                "lead_done": False,
-                "lead_data": {},
-            })
-            bot_response = "Tudo certo! Seus dados foram apagados.\nSe quiser, posso coletar novamente depois. 🙂"
-            save_message(session_id, "assistant", bot_response, meta={"source": "web", "type": "lead_deleted"})
-        except Exception as e:
-            print(f"[Firestore] Erro ao apagar dados: {e}")
-            bot_response = "Tudo certo! Seus dados foram apagados.\nSe quiser, posso coletar novamente depois. 🙂"
-        
-        return jsonify({
-            'response': bot_response,
-            'session_id': session_id
-        })
+        bot_response = "Tudo certo! Seus dados foram apagados.\nSe quiser, posso coletar novamente depois. 🙂"
+        turno["state_updates"] = {
+            "lead_stage": None,
+            "lead_done": False,
+            "lead_data": {},
+        }
+        turno["bot_meta"] = {"source": "web", "type": "lead_deleted"}
+        return bot_response
 
     # ---------------------------------------------------------
     # 3) Se lead já foi concluído, segue fluxo normal com IA
     # ---------------------------------------------------------
     if lead_done or lead_stage == "done":
-        bot_response = bot_response_with_fallback(user_message)
-
-        if AI_FIRESTORE_ENABLED:
-            try:
-                save_message(session_id, "assistant", bot_response, meta={"source": "web"})
-            except Exception as e:
-                print(f"[Firestore] Erro ao salvar resposta do bot: {e}")
-
-        return jsonify({
-            "response": bot_response,
-            "session_id": session_id,
-        })
+        return responder(user_message, session_id)
 
     # ---------------------------------------------------------
     # 4) Fluxo de LEAD (sem e-mail, com 'pular' em qualquer etapa)
@@ -429,72 +558,39 @@ def chat():
         is_short = len(words) < 4
         has_greeting = any(p in msg_lower for p in greeting_phrases)
         if (is_short and has_greeting and not has_intent) or (not has_intent):
-            bot_response = bot_response_with_fallback(user_message)
-            if AI_FIRESTORE_ENABLED:
-                try:
-                    save_message(session_id, "assistant", bot_response, meta={"source": "web"})
-                except Exception as e:
-                    print(f"[Firestore] Erro ao salvar resposta do bot: {e}")
-            return jsonify({
-                "response": bot_response,
-                "session_id": session_id,
-            })
+            return responder(user_message, session_id)
 
         lead_stage = "collecting"
         lead_data = lead_data or {}
-        try:
-            update_conversation(session_id, {
-                "lead_stage": lead_stage,
-                "lead_data": lead_data,
-                "lead_done": False,
-            })
-        except Exception as e:
-            print(f"[Firestore] Erro ao iniciar lead: {e}")
+        turno["state_updates"] = {
+            "lead_stage": lead_stage,
+            "lead_data": lead_data,
+            "lead_done": False,
+        }
 
         first_field = get_next_lead_field(lead_data)
         question = get_question_for_field(first_field, lead_data)
-
-        if AI_FIRESTORE_ENABLED:
-            try:
-                save_message(session_id, "assistant", question, meta={"source": "web", "type": "lead_question"})
-            except Exception as e:
-                print(f"[Firestore] Erro ao salvar pergunta de lead: {e}")
-
-        return jsonify({
-            "response": question,
-            "session_id": session_id,
-        })
+        turno["bot_meta"] = {"source": "web", "type": "lead_question"}
+        return question
 
     # Já está em coleta: descobre campo atual
     current_field = get_next_lead_field(lead_data)
 
     # Se por algum motivo não tem campo pendente, marca como done e cai no fluxo normal na próxima mensagem
     if current_field is None:
-        try:
-            update_conversation(session_id, {
-                "lead_stage": "done",
-                "lead_done": True,
-                "lead_data": lead_data,
-            })
-        except Exception as e:
-            print(f"[Firestore] Erro ao finalizar lead sem campos: {e}")
+        turno["state_updates"] = {
+            "lead_stage": "done",
+            "lead_done": True,
+            "lead_data": lead_data,
+        }
 
         final_msg = (
             "Tudo certo! Obrigado por compartilhar suas informações 😊\n"
             "Agora posso te ajudar com qualquer dúvida sobre o Programa Jovem Programador!\n"
             "O que você gostaria de saber?"
         )
-
-        if AI_FIRESTORE_ENABLED:
-            try:
-                save_message(session_id, "assistant", final_msg, meta={"source": "web", "type": "lead_done"})
-            except Exception as e:
-                print(f"[Firestore] Erro ao salvar mensagem final de lead: {e}")
-
-        return jsonify({
-            "response": final_msg,
-            "session_id": session_id,
-        })
+        turno["bot_meta"] = {"source": "web", "type": "lead_done"}
+        return final_msg
 
     # Comandos para pular etapa
     msg_lower = user_message.strip().lower()
@@ -519,17 +615,8 @@ def chat():
         # Se falhou validação, pede de novo com mensagem amigável
         if normalized_value is None:
             error_message = get_error_message_for_field(current_field)
-
-            if AI_FIRESTORE_ENABLED:
-                try:
-                    save_message(session_id, "assistant", error_message, meta={"source": "web", "type": "lead_error"})
-                except Exception as e:
-                    print(f"[Firestore] Erro ao salvar mensagem de erro do lead: {e}")
-
-            return jsonify({
-                "response": error_message,
-                "session_id": session_id,
-            })
+            turno["bot_meta"] = {"source": "web", "type": "lead_error"}
+            return error_message
 
         lead_data[current_field] = normalized_value
 
@@ -538,56 +625,31 @@ def chat():
 
     # Se terminou todos os campos -> salva lead e finaliza
     if next_field is None:
-        if AI_FIRESTORE_ENABLED:
-            try:
-                save_lead_from_conversation(session_id, lead_data)
-                update_conversation(session_id, {
-                    "lead_stage": "done",
-                    "lead_done": True,
-                    "lead_data": lead_data,
-                })
-            except Exception as e:
-                print(f"[Firestore] Erro ao salvar lead: {e}")
+        turno["lead_data"] = dict(lead_data)
+        turno["state_updates"] = {
+            "lead_stage": "done",
+            "lead_done": True,
+            "lead_data": lead_data,
+        }
 
         final_msg = (
             "Fechado! Obrigado por compartilhar suas informações 😊\n"
             "Agora eu consigo te ajudar MUITO melhor sobre o Programa Jovem Programador.\n"
             "O que você quer saber primeiro?"
         )
-
-        if AI_FIRESTORE_ENABLED:
-            try:
-                save_message(session_id, "assistant", final_msg, meta={"source": "web", "type": "lead_done"})
-            except Exception as e:
-                print(f"[Firestore] Erro ao salvar mensagem final de lead: {e}")
-
-        return jsonify({
-            "response": final_msg,
-            "session_id": session_id,
-        })
+        turno["bot_meta"] = {"source": "web", "type": "lead_done"}
+        return final_msg
 
     # Ainda falta coletar algum campo → pergunta seguinte
-    try:
-        update_conversation(session_id, {
-            "lead_stage": "collecting",
-            "lead_data": lead_data,
-            "lead_done": False,
-        })
-    except Exception as e:
-        print(f"[Firestore] Erro ao atualizar lead em coleta: {e}")
+    turno["state_updates"] = {
+        "lead_stage": "collecting",
+        "lead_data": lead_data,
+        "lead_done": False,
+    }
 
     next_question = get_question_for_field(next_field, lead_data)
-
-    if AI_FIRESTORE_ENABLED:
-        try:
-            save_message(session_id, "assistant", next_question, meta={"source": "web", "type": "lead_question"})
-        except Exception as e:
-            print(f"[Firestore] Erro ao salvar próxima pergunta de lead: {e}")
-
-    return jsonify({
-        "response": next_question,
-        "session_id": session_id,
-    })
+    turno["bot_meta"] = {"source": "web", "type": "lead_question"}
+    return next_question
 
 @app.route('/health')
 def health():
@@ -595,6 +657,15 @@ def health():
         'status': 'ok' if chatbot_web else 'unavailable',
         'model': getattr(chatbot_web, 'model_name', None),
         'available_models': getattr(chatbot_web, 'available_models', []),
+        'chat_sessions': chatbot_web.session_pool_stats() if chatbot_web else None,
+        'faq_fast_path': chatbot_web.faq_stats() if chatbot_web else None,
+        'response_cache': chatbot_web.response_cache_stats() if chatbot_web else None,
+        'knowledge': {
+            **chatbot_web.knowledge_stats(),
+            'refresher': atualizador_conhecimento.stats() if atualizador_conhecimento else None,
+        } if chatbot_web else None,
+        'firestore_write_behind': get_write_behind_stats(),
+        'city_cache': get_city_cache_stats(),
     }
     return jsonify(status)
 
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Script de backfill dos contadores materializados do dashboard (coleção 'stats').
+
+Este script:
+- Varre 'leads', 'conversations' e todas as mensagens (collection group 'messages')
+- Calcula os histogramas de leads (cidade, estado, faixa etária), os totais de mensagens
+  e as conversas criadas por dia
+- Grava stats/leads, os shards de stats/messages e stats_daily/{dia} e marca os contadores
+  como prontos
+- A partir daí o dashboard lê só esses documentos; novas gravações os incrementam
+
+Rode em horário de pouco movimento: mensagens/leads gravados durante a varredura
+podem não ser contabilizados.
+
+Uso:
+    python backfill_stats.py --dry-run    # Mostra os valores calculados
+    python backfill_stats.py --apply      # Grava os contadores no Firestore
+"""
+
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+# Adiciona o diretório raiz ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.firestore import (
+    init_admin,
+    rebuild_stats,
+    _is_enabled,
+)
+import services.firestore as firestore_service
+
+
+def backfill_stats(dry_run: bool = True):
+    """
+    Recalcula os contadores do dashboard a partir dos dados existentes.
+
+    Args:
+        dry_run: Se True, apenas mostra os valores calculados sem gravar
+    """
+    print("=" * 80)
+    print("📊 BACKFILL DE CONTADORES - FIRESTORE")
+    print("=" * 80)
+    print(f"Modo: {'DRY-RUN (preview)' if dry_run else 'APLICAÇÃO (real)'}")
+    print("=" * 80)
+    print()
+
+    try:
+        print("📖 Lendo leads, conversas e mensagens...")
+        resultado = rebuild_stats(apply=not dry_run)
+
+        leads = resultado.get("leads", {})
+        mensagens = resultado.get("messages", {})
+
+        print()
+        print("=" * 80)
+        print("📊 VALORES CALCULADOS")
+        print("=" * 80)
+        print(f"Mensagens do usuário: {mensagens.get('user_messages', 0)}")
+        print(f"Mensagens do bot: {mensagens.get('bot_messages', 0)}")
+        print(f"Dias com mensagens: {len(mensagens.get('daily', {}))}")
+        print(f"Dias com conversas: {len(resultado.get('conversations', {}).get('daily', {}))}")
+        print(f"Leads: {sum(leads.get('by_city', {}).values())}")
+        for campo, titulo in (("by_city", "Por cidade"), ("by_state", "Por estado"), ("by_age_range", "Por faixa etária")):
+            print(f"{titulo}:")
+            for chave, total in sorted(leads.get(campo, {}).items(), key=lambda kv: -kv[1]):
+                print(f"  - {chave}: {total}")
+        print("=" * 80)
+        print()
+
+        if dry_run:
+            print("⚠️  MODO DRY-RUN: Nenhum contador foi gravado.")
+            print("   Execute com --apply para gravar os contadores.")
+        else:
+            print("✅ Backfill concluído com sucesso!")
+            print("   O dashboard passa a ler os contadores da coleção 'stats'.")
+
+    except Exception as e:
+        print(f"❌ ERRO durante o backfill: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+def main():
+    """Função principal do script."""
+    parser = argparse.ArgumentParser(
+        description="Recalcula os contadores materializados do dashboard (coleção 'stats')"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Modo preview: mostra os valores calculados sem gravar"
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Grava os contadores no Firestore"
+    )
+
+    args = parser.parse_args()
+
+    # Valida argumentos
+    if not args.dry_run and not args.apply:
+        print("❌ ERRO: Você deve especificar --dry-run ou --apply")
+        print()
+        print("Uso:")
+        print("  python backfill_stats.py --dry-run    # Mostra os valores calculados")
+        print("  python backfill_stats.py --apply      # Grava os contadores")
+        sys.exit(1)
+
+    if args.dry_run and args.apply:
+        print("❌ ERRO: Não é possível usar --dry-run e --apply ao mesmo tempo")
+        sys.exit(1)
+
+    # Inicializa Firestore
+    print("🔧 Inicializando Firestore...")
+    init_admin()
+
+    if not _is_enabled() or firestore_service._db is None:
+        print("❌ ERRO: Não foi possível inicializar o Firestore")
+        print("   Verifique as credenciais e a variável AI_FIRESTORE_ENABLED")
+        sys.exit(1)
+
+    print("✅ Firestore inicializado com sucesso")
+    print()
+
+    backfill_stats(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parsing das páginas de notícia do scraper.
+
+Este script:
+- Lê páginas salvas em disco (por padrão, o cache HTTP do scraper em .cache_scraper/)
+- Extrai o texto do artigo (div#fh5co-blog-section) de cada página com três estratégias:
+  html.parser sobre o .text (o caminho antigo), lxml na página inteira e o _sopa() do scraper
+  (bytes + lxml + SoupStrainer)
+- Confere que as três chegam ao mesmo texto e mostra o tempo e o ganho de cada uma
+
+Uso:
+    python bench_parser.py [pasta_com_paginas] [repeticoes]
+"""
+
+import os
+import sys
+import glob
+import time
+
+import requests
+from bs4 import BeautifulSoup
+
+# Adiciona o diretório raiz ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import scraper
+
+
+def _resposta(corpo: bytes) -> requests.Response:
+    response = requests.models.Response()
+    response.status_code = 200
+    response._content = corpo
+    response.headers["Content-Type"] = "text/html; charset=UTF-8"
+    response.encoding = "utf-8"
+    return response
+
+
+def _texto(secao) -> str:
+    return secao.get_text(separator="\n", strip=True) if secao else ""
+
+
+def _html_parser_texto(response):
+    return _texto(BeautifulSoup(response.text, "html.parser").find("div", id="fh5co-blog-section"))
+
+
+def _pagina_inteira(response):
+    return _texto(BeautifulSoup(response.content, scraper.PARSER_HTML).find("div", id="fh5co-blog-section"))
+
+
+def _sopa_filtrada(response):
+    return _texto(scraper._sopa(response, scraper.FILTRO_ARTIGO).find("div", id="fh5co-blog-section"))
+
+
+ESTRATEGIAS = (
+    ("html.parser + .text (antigo)", _html_parser_texto),
+    (f"{scraper.PARSER_HTML} + página inteira", _pagina_inteira),
+    (f"{scraper.PARSER_HTML} + SoupStrainer (_sopa)", _sopa_filtrada),
+)
+
+
+def bench_parser(pasta: str, repeticoes: int = 3):
+    """Mede as estratégias de parsing sobre as páginas de artigo salvas em `pasta`."""
+    print("=" * 80)
+    print("⏱️  BENCHMARK DO PARSING DE ARTIGOS")
+    print("=" * 80)
+
+    respostas = []
+    for caminho in sorted(glob.glob(os.path.join(pasta, "*.html"))):
+        with open(caminho, "rb") as f:
+            corpo = f.read()
+        if b"fh5co-blog-section" in corpo:
+            respostas.append(_resposta(corpo))
+
+    if not respostas:
+        print(f"❌ Nenhuma página de artigo encontrada em '{pasta}'. Rode o scraper antes.")
+        return 1
+
+    total_bytes = sum(len(r.content) for r in respostas)
+    print(f"Páginas: {len(respostas)} ({total_bytes / 1024:.0f} KB) | Repetições: {repeticoes}")
+    print("=" * 80)
+
+    referencia, base = None, None
+    for nome, estrategia in ESTRATEGIAS:
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            textos = [estrategia(r) for r in respostas]
+            melhor = min(melhor, time.perf_counter() - inicio)
+        if referencia is None:
+            referencia, base = textos, melhor
+        iguais = "ok" if textos == referencia else "DIVERGE"
+        print(
+            f"{nome:<40} {melhor * 1000:8.1f} ms  {len(respostas) / melhor:7.0f} pág/s  "
+            f"{base / melhor:5.1f}x  [{iguais}]"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    pasta = sys.argv[1] if len(sys.argv) > 1 else scraper.CACHE_HTTP_DIR
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    sys.exit(bench_parser(pasta, repeticoes))
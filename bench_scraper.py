@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark e verificação offline do scraper (utils/scraper.py).
+
+Este script:
+- Serve as páginas gravadas do jovemprogramador.com.br (fixtures/scraper/) por um transport
+  adapter do requests: nenhuma requisição sai para a rede
+- Cronometra cada raspar_* isoladamente e a raspagem completa (raspar_tudo), com páginas/s,
+  bytes processados e o pico de memória (RSS) do processo
+- Compara o dados.json gerado com o golden (fixtures/scraper/dados.golden.json) e sai com
+  código 1 se houver diferença
+
+Uso:
+    python bench_scraper.py                     # benchmark + verificação do golden
+    python bench_scraper.py --latencia 0.05     # simula 50 ms de rede por requisição
+    python bench_scraper.py --atualizar-golden  # regrava o golden a partir das fixtures
+    python bench_scraper.py --gravar            # regrava as fixtures a partir do site real
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import contextlib
+import io
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+# Adiciona o diretório raiz ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import scraper
+
+PASTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scraper")
+ARQUIVO_INDICE = "index.json"
+ARQUIVO_GOLDEN = "dados.golden.json"
+
+
+class AdaptadorFixtures(BaseAdapter):
+    """Transport adapter do requests que responde com as páginas gravadas (404 para o resto)."""
+
+    def __init__(self, pasta: str = PASTA_FIXTURES, latencia: float = 0.0):
+        super().__init__()
+        self.pasta = pasta
+        self.latencia = latencia
+        with open(os.path.join(pasta, ARQUIVO_INDICE), encoding="utf-8") as f:
+            self.indice = json.load(f)  # url -> {"arquivo", "content_type"}
+
+    def send(self, request, **kwargs):
+        if self.latencia:
+            time.sleep(self.latencia)
+        response = Response()
+        response.request = request
+        response.url = request.url
+        entrada = self.indice.get(request.url)
+        if entrada is None:
+            response.status_code, response.reason, response._content = 404, "Not Found", b""
+            response.headers = CaseInsensitiveDict({"Content-Type": "text/html"})
+            return response
+        with open(os.path.join(self.pasta, entrada["arquivo"]), "rb") as f:
+            response._content = f.read()
+        response.status_code, response.reason = 200, "OK"
+        response.headers = CaseInsensitiveDict({"Content-Type": entrada["content_type"]})
+        charset = scraper._CHARSET_RE.search(entrada["content_type"])
+        response.encoding = charset.group(1) if charset else None
+        return response
+
+    def close(self):
+        pass
+
+
+def _navegador(adaptador: AdaptadorFixtures) -> scraper.Navegador:
+    navegador = scraper.Navegador()
+    navegador.session.mount("https://", adaptador)
+    navegador.session.mount("http://", adaptador)
+    return navegador
+
+
+def _pico_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _medir(adaptador: AdaptadorFixtures, funcao, *args) -> tuple[dict, scraper.Navegador, float]:
+    """Roda funcao(navegador, *args) com a saída do scraper silenciada; retorna (resultado, navegador, segundos)."""
+    with _navegador(adaptador) as navegador:
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcao(navegador, *args)
+        duracao = time.perf_counter() - inicio
+    return resultado, navegador, duracao
+
+
+def _linha(nome: str, navegador: scraper.Navegador, duracao: float) -> str:
+    return (
+        f"{nome:<16} {duracao * 1000:9.1f} ms {navegador.paginas:6d} pág "
+        f"{navegador.bytes / 1024:9.0f} KB {navegador.paginas / duracao:9.1f} pág/s"
+    )
+
+
+def bench(pasta: str = PASTA_FIXTURES, latencia: float = 0.0, atualizar_golden: bool = False) -> int:
+    """Benchmark de cada seção e da raspagem completa, com verificação contra o golden."""
+    adaptador = AdaptadorFixtures(pasta, latencia)
+
+    print("=" * 80)
+    print("⏱️  BENCHMARK DO SCRAPER (fixtures offline)")
+    print("=" * 80)
+    print(f"Fixtures: {pasta} ({len(adaptador.indice)} páginas)")
+    print(f"Parser: {scraper.PARSER_HTML} | Latência simulada: {latencia * 1000:.0f} ms")
+    print("=" * 80)
+
+    for chave, funcao in scraper.RASPADORES:
+        _, navegador, duracao = _medir(adaptador, funcao)
+        print(_linha(chave, navegador, duracao))
+
+    dados, navegador, duracao = _medir(adaptador, scraper.raspar_tudo)
+    print("-" * 80)
+    print(_linha("TOTAL (paralelo)", navegador, duracao))
+    pico = _pico_rss_mb()
+    if pico is not None:
+        print(f"Pico de memória (RSS): {pico:.1f} MB")
+    print("=" * 80)
+
+    caminho_golden = os.path.join(pasta, ARQUIVO_GOLDEN)
+    if atualizar_golden:
+        with open(caminho_golden, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        print(f"✅ Golden atualizado: {caminho_golden}")
+        return 0
+
+    try:
+        with open(caminho_golden, encoding="utf-8") as f:
+            golden = json.load(f)
+    except FileNotFoundError:
+        print(f"⚠️ Golden não encontrado ({caminho_golden}); rode com --atualizar-golden.")
+        return 1
+
+    divergentes = [chave for chave in golden.keys() | dados.keys() if golden.get(chave) != dados.get(chave)]
+    if divergentes:
+        print(f"❌ dados.json diverge do golden nas seções: {', '.join(sorted(divergentes))}")
+        return 1
+    print("✅ dados.json idêntico ao golden.")
+    return 0
+
+
+def _nome_arquivo(url: str) -> str:
+    caminho = url.split("://", 1)[-1].split("/", 1)[-1]
+    slug = re.sub(r"[^a-z0-9]+", "-", caminho.lower()).strip("-")[:50] or "index"
+    return f"{slug}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}.html"
+
+
+def gravar_fixtures(paginas: dict, pasta: str = PASTA_FIXTURES) -> None:
+    """Grava as páginas (url -> (corpo em bytes, Content-Type)) e o índice em `pasta`."""
+    os.makedirs(pasta, exist_ok=True)
+    indice = {}
+    for url, (corpo, content_type) in sorted(paginas.items()):
+        arquivo = _nome_arquivo(url)
+        with open(os.path.join(pasta, arquivo), "wb") as f:
+            f.write(corpo)
+        indice[url] = {"arquivo": arquivo, "content_type": content_type}
+    with open(os.path.join(pasta, ARQUIVO_INDICE), "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False, indent=2)
+
+
+def gravar_do_site(pasta: str = PASTA_FIXTURES) -> int:
+    """Raspa o site real e grava como fixtures todas as páginas baixadas na rodada."""
+    print("🌐 Gravando fixtures a partir do site real...")
+    with scraper.Navegador() as navegador:
+        scraper.raspar_tudo(navegador)
+        respostas = navegador.respostas()
+    paginas = {
+        url: (response.content, response.headers.get("Content-Type", "text/html"))
+        for url, response in respostas.items()
+        if response.status_code == 200
+    }
+    gravar_fixtures(paginas, pasta)
+    print(f"✅ {len(paginas)} páginas gravadas em {pasta}. Confira e rode com --atualizar-golden.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline do scraper com as páginas gravadas.")
+    parser.add_argument("--pasta", default=PASTA_FIXTURES, help="pasta das fixtures")
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência simulada por requisição (s)")
+    parser.add_argument("--atualizar-golden", action="store_true", help="regrava o golden com o resultado atual")
+    parser.add_argument("--gravar", action="store_true", help="regrava as fixtures a partir do site real")
+    args = parser.parse_args()
+
+    if args.gravar:
+        sys.exit(gravar_do_site(args.pasta))
+    sys.exit(bench(args.pasta, args.latencia, args.atualizar_golden))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir o índice local de busca textual das conversas (SQLite FTS5).
+
+Este script:
+- Lê todas as mensagens do Firestore (collection group 'messages')
+- Apaga o índice local (SEARCH_INDEX_PATH) e indexa o conteúdo de cada mensagem
+- Depois disso, novas mensagens são indexadas automaticamente pelo backend
+
+Uso:
+    python rebuild_search_index.py
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+# Adiciona o diretório raiz ao path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.firestore import (
+    init_admin,
+    _is_enabled,
+)
+import services.firestore as firestore_service
+from services import search_index
+
+# Mensagens por lote de inserção no SQLite
+BATCH_SIZE = 1000
+
+
+def rebuild_search_index():
+    """Reconstrói o índice de busca a partir de todas as mensagens do Firestore."""
+    print("=" * 80)
+    print("🔎 RECONSTRUÇÃO DO ÍNDICE DE BUSCA")
+    print("=" * 80)
+    print(f"Índice: {search_index.SEARCH_INDEX_PATH}")
+    print("=" * 80)
+    print()
+
+    try:
+        search_index.clear()
+
+        print("📖 Lendo mensagens do Firestore...")
+        mensagens = (
+            firestore_service._db.collection_group("messages")
+            .select(["role", "papel", "content", "texto", "created_at", "criadoEm"])
+            .stream()
+        )
+
+        total = 0
+        lote = []
+        for msg in mensagens:
+            data = msg.to_dict() or {}
+            # conversations/{session_id}/messages/{id}
+            session_id = msg.reference.parent.parent.id
+            role = data.get("role") or data.get("papel")
+            if role == "assistant":
+                role = "bot"
+            lote.append((
+                session_id,
+                role,
+                data.get("content") or data.get("texto"),
+                data.get("created_at") or data.get("criadoEm"),
+            ))
+            if len(lote) >= BATCH_SIZE:
+                total += search_index.index_messages(lote)
+                lote = []
+                print(f"   {total} mensagens indexadas...")
+        total += search_index.index_messages(lote)
+
+        print()
+        print("=" * 80)
+        print(f"✅ Índice reconstruído: {total} mensagens indexadas.")
+        print("=" * 80)
+
+    except Exception as e:
+        print(f"❌ ERRO durante a reconstrução: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+def main():
+    """Função principal do script."""
+    if not search_index.SEARCH_INDEX_ENABLED:
+        print("❌ ERRO: Índice de busca desabilitado (SEARCH_INDEX_ENABLED=false)")
+        sys.exit(1)
+
+    # Inicializa Firestore
+    print("🔧 Inicializando Firestore...")
+    init_admin()
+
+    if not _is_enabled() or firestore_service._db is None:
+        print("❌ ERRO: Não foi possível inicializar o Firestore")
+        print("   Verifique as credenciais e a variável AI_FIRESTORE_ENABLED")
+        sys.exit(1)
+
+    print("✅ Firestore inicializado com sucesso")
+    print()
+
+    rebuild_search_index()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,23 @@ import os
 import json
 import logging
 import base64
-from datetime import datetime, timedelta
+import atexit
+import copy
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 from firebase_admin import initialize_app, credentials, firestore
 from firebase_admin.exceptions import FirebaseError
+from google.api_core import exceptions as google_exceptions
 from werkzeug.security import generate_password_hash, check_password_hash
+from services import search_index
 import difflib
 import unicodedata
+from collections import Counter
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG) 
@@ -242,6 +253,70 @@ def init_admin():
         logger.error(f"[Firestore] Erro inesperado na inicialização: {e}")
 
 
+def _novo_documento_conversa(session_id):
+    """Campos iniciais de uma conversa nova (mantendo compatibilidade com os campos legados)."""
+    return {
+        "session_id": session_id,
+        # campos legados
+        "iniciadoEm": firestore.SERVER_TIMESTAMP,
+        "ultimaMensagemEm": firestore.SERVER_TIMESTAMP,
+        # campos padronizados para analytics
+        "created_at": firestore.SERVER_TIMESTAMP,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+        "total_user_messages": 0,
+        "total_bot_messages": 0,
+        "channel": "web",
+        "status": "open",
+    }
+
+
+def _carregar_ou_criar_conversa(session_id, touch=True):
+    """
+    Lê conversations/{session_id} UMA vez: cria o documento se não existir ou, se existir
+    e touch=True, atualiza a última atividade.
+
+    Returns:
+        tuple (ok, dados): ok=False em caso de erro; dados é o estado atual da conversa
+        (para conversas novas, os campos iniciais sem os timestamps de servidor).
+    """
+    conv_ref = _db.collection("conversations").document(session_id)
+    logger.info(f"[Firestore] Salvando conversa em: {conv_ref.path}")
+
+    doc = conv_ref.get()
+    if not doc.exists:
+        # Documento novo: definir campos completos (mantendo compatibilidade)
+        novo = _novo_documento_conversa(session_id)
+        # Cria a conversa e incrementa o contador diário (stats_daily/{dia}) no mesmo commit.
+        # create() falha se o documento já existir: com duas primeiras requisições simultâneas
+        # da mesma sessão (retry do streaming, duplo envio), só uma conta a conversa.
+        batch = _db.batch()
+        batch.create(conv_ref, novo)
+        batch.set(
+            _db.collection("stats_daily").document(_dia_utc()),
+            {"conversations": firestore.Increment(1)},
+            merge=True,
+        )
+        try:
+            batch.commit()
+        except google_exceptions.AlreadyExists:
+            logger.debug(f"[Firestore] Conversa {session_id} criada por outra requisição")
+            doc = conv_ref.get()
+        else:
+            logger.debug(f"[Firestore] Conversa {session_id} criada")
+            return True, {k: v for k, v in novo.items() if v is not firestore.SERVER_TIMESTAMP}
+
+    dados = doc.to_dict() or {}
+    if touch:
+        # Documento existente: atualizar última atividade
+        conv_ref.update({
+            "ultimaMensagemEm": firestore.SERVER_TIMESTAMP,
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        })
+
+    logger.debug(f"[Firestore] Conversa {session_id} atualizada")
+    return True, dados
+
+
 def get_or_create_conversation(session_id):
     """
     Cria ou atualiza documento de conversa em conversations/{session_id}.
@@ -256,38 +331,35 @@ def get_or_create_conversation(session_id):
         return False
     
     try:
-        conv_ref = _db.collection("conversations").document(session_id)
-        logger.info(f"[Firestore] Salvando conversa em: {conv_ref.path}")
+        ok, _ = _carregar_ou_criar_conversa(session_id)
+        return ok
+    except Exception as e:
+        logger.error(f"[Firestore] Erro ao salvar conversa {session_id}: {e}")
+        return False
 
-        doc = conv_ref.get()
-        if not doc.exists:
-            # Documento novo: definir campos completos (mantendo compatibilidade)
-            conv_ref.set({
-                "session_id": session_id,
-                # campos legados
-                "iniciadoEm": firestore.SERVER_TIMESTAMP,
-                "ultimaMensagemEm": firestore.SERVER_TIMESTAMP,
-                # campos padronizados para analytics
-                "created_at": firestore.SERVER_TIMESTAMP,
-                "updated_at": firestore.SERVER_TIMESTAMP,
-                "total_user_messages": 0,
-                "total_bot_messages": 0,
-                "channel": "web",
-                "status": "open",
-            }, merge=True)
-        else:
-            # Documento existente: atualizar última atividade
-            conv_ref.update({
-                "ultimaMensagemEm": firestore.SERVER_TIMESTAMP,
-                "updated_at": firestore.SERVER_TIMESTAMP,
-            })
 
-        logger.debug(f"[Firestore] Conversa {session_id} atualizada")
-        return True
+def get_or_create_conversation_state(session_id, touch=True):
+    """
+    Junta get_or_create_conversation + get_conversation com uma única leitura do documento:
+    cria a conversa se não existir, atualiza a última atividade (touch) e retorna o estado.
+
+    Use touch=False quando outra gravação do mesmo turno (ex.: save_message) já atualiza
+    os timestamps da conversa.
+
+    Returns:
+        dict com o estado da conversa; {} se Firestore estiver desabilitado ou em erro.
+    """
+    if not _is_enabled() or _db is None:
+        return {}
 
+    try:
+        _, dados = _carregar_ou_criar_conversa(session_id, touch=touch)
+        # Sobrepõe o estado de lead ainda na fila do write-behind
+        dados.update(_estado_pendente(session_id))
+        return dados
     except Exception as e:
-        logger.error(f"[Firestore] Erro ao salvar conversa {session_id}: {e}")
-        return False
+        logger.error(f"[Firestore] Erro em get_or_create_conversation_state({session_id}): {e}")
+        return {}
 
 
 def get_conversation(session_id):
@@ -330,6 +402,24 @@ def update_conversation(session_id, updates: dict):
         return False
 
 
+def _montar_mensagem(normalized_role, text, meta=None, created_at=None):
+    """Monta o documento de mensagem (campos novos + compatibilidade)."""
+    created_at = created_at or firestore.SERVER_TIMESTAMP
+    message_data = {
+        # novos campos padronizados
+        "role": normalized_role,
+        "content": text,
+        "created_at": created_at,
+        # campos antigos (compatibilidade)
+        "papel": normalized_role,
+        "texto": text,
+        "criadoEm": created_at,
+    }
+    if meta is not None:
+        message_data["metadata"] = meta
+    return message_data
+
+
 def save_message(session_id, role, text, meta=None):
     """
     Salva mensagem em conversations/{session_id}/messages.
@@ -358,20 +448,7 @@ def save_message(session_id, role, text, meta=None):
         elif role == "user":
             normalized_role = "user"
 
-        # Montar dados da mensagem (novos + compatibilidade)
-        message_data = {
-            # novos campos padronizados
-            "role": normalized_role,
-            "content": text,
-            "created_at": firestore.SERVER_TIMESTAMP,
-            # campos antigos (compatibilidade)
-            "papel": normalized_role,
-            "texto": text,
-            "criadoEm": firestore.SERVER_TIMESTAMP,
-        }
-
-        if meta is not None:
-            message_data["metadata"] = meta
+        message_data = _montar_mensagem(normalized_role, text, meta)
 
         conversation_ref = _db.collection("conversations").document(session_id)
         messages_ref = conversation_ref.collection("messages")
@@ -379,6 +456,13 @@ def save_message(session_id, role, text, meta=None):
         logger.info(f"[Firestore] Salvando mensagem em: conversations/{session_id}/messages")
         messages_ref.add(message_data)
         logger.info(f"[Firestore] Mensagem gravada com sucesso no Firestore")
+        _indexar_mensagens([(session_id, normalized_role, text, datetime.now(timezone.utc))])
+
+        # Contadores do dashboard (falha aqui não invalida a mensagem já gravada)
+        try:
+            _commit_operacoes(_operacoes_stats_mensagens({_dia_utc(): {normalized_role: 1}}))
+        except Exception as e:
+            logger.warning(f"[Firestore] Erro ao atualizar stats de mensagens: {e}")
 
         # Atualizar contadores e timestamps da conversa
         updates = {
@@ -400,6 +484,396 @@ def save_message(session_id, role, text, meta=None):
         return False
 
 
+def _montar_turno(
+    session_id,
+    user_text=None,
+    bot_text=None,
+    state_updates=None,
+    user_meta=None,
+    bot_meta=None,
+    lead_data=None,
+    user_at=None,
+    bot_at=None,
+):
+    """
+    Normaliza os dados de um turno, fixando os horários das mensagens no momento da chamada.
+    O turno_id gera os IDs das mensagens e do lead, então regravar o mesmo turno não duplica nada.
+    state_updates e lead_data são copiados em profundidade: o chat continua alterando o lead_data
+    da sessão nos próximos turnos enquanto o flusher ainda pode estar serializando este.
+    """
+    user_at = user_at or datetime.now(timezone.utc)
+    bot_at = bot_at or datetime.now(timezone.utc)
+    if bot_at <= user_at:
+        bot_at = user_at + timedelta(milliseconds=1)
+    return {
+        "turno_id": uuid.uuid4().hex,
+        "session_id": session_id,
+        "user_text": user_text,
+        "bot_text": bot_text,
+        "state_updates": copy.deepcopy(state_updates or {}),
+        "user_meta": user_meta,
+        "bot_meta": bot_meta,
+        "lead_data": copy.deepcopy(lead_data) if lead_data else None,
+        "user_at": user_at,
+        "bot_at": bot_at,
+    }
+
+
+def _operacoes_turnos(turnos):
+    """
+    Converte turnos em operações de escrita (ref, dados, merge), coalescendo por sessão:
+    mensagens e leads de todos os turnos, e UMA atualização da conversa com os contadores
+    somados e o estado do lead mais recente (o último turno prevalece). Os contadores do
+    dashboard (stats) recebem um único incremento para todos os turnos.
+    """
+    por_sessao = {}
+    for turno in turnos:
+        por_sessao.setdefault(turno["session_id"], []).append(turno)
+
+    operacoes = []
+    leads = []
+    mensagens_por_dia = {}
+    for session_id, turnos_sessao in por_sessao.items():
+        conversation_ref = _db.collection("conversations").document(session_id)
+        messages_ref = conversation_ref.collection("messages")
+        total_user = total_bot = 0
+        estado = {}
+
+        for turno in turnos_sessao:
+            if turno["user_text"]:
+                operacoes.append((messages_ref.document(f"{turno['turno_id']}-user"), _montar_mensagem("user", turno["user_text"], turno["user_meta"], turno["user_at"]), False))
+                total_user += 1
+                dia = mensagens_por_dia.setdefault(_dia_utc(turno["user_at"]), {"user": 0, "bot": 0})
+                dia["user"] += 1
+            if turno["bot_text"]:
+                operacoes.append((messages_ref.document(f"{turno['turno_id']}-bot"), _montar_mensagem("bot", turno["bot_text"], turno["bot_meta"], turno["bot_at"]), False))
+                total_bot += 1
+                dia = mensagens_por_dia.setdefault(_dia_utc(turno["bot_at"]), {"user": 0, "bot": 0})
+                dia["bot"] += 1
+            if turno["lead_data"]:
+                lead = _montar_documento_lead(session_id, turno["lead_data"])
+                operacoes.append((_db.collection("leads").document(turno["turno_id"]), lead, False))
+                leads.append(lead)
+            estado.update(turno["state_updates"])
+
+        updates = {
+            "ultimaMensagemEm": firestore.SERVER_TIMESTAMP,
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        }
+        if total_user:
+            updates["total_user_messages"] = firestore.Increment(total_user)
+        if total_bot:
+            updates["total_bot_messages"] = firestore.Increment(total_bot)
+        updates.update(estado)
+        operacoes.append((conversation_ref, updates, True))
+
+    operacoes += _operacoes_stats_mensagens(mensagens_por_dia)
+    operacoes += _operacoes_stats_leads(leads)
+    return operacoes
+
+
+# Erros em que o Firestore garante que o batch não foi aplicado (contenção, cota). Só esses são
+# repetidos: após um timeout ou conexão caída o commit pode ter sido aplicado, e repetir dobraria
+# os Increment dos contadores
+_ERROS_ANTES_DO_COMMIT = (google_exceptions.Aborted, google_exceptions.ResourceExhausted)
+
+
+def _commit_operacoes(operacoes, tentativas=1):
+    """
+    Grava as operações em WriteBatches de até 500 escritas (limite do Firestore).
+    Cada lote é repetido até `tentativas` vezes, só em erros de antes do commit
+    (_ERROS_ANTES_DO_COMMIT). Retorna o nº de commits.
+    """
+    commits = 0
+    for inicio in range(0, len(operacoes), _FIRESTORE_BATCH_LIMIT):
+        for tentativa in range(1, tentativas + 1):
+            batch = _db.batch()
+            for ref, dados, merge in operacoes[inicio:inicio + _FIRESTORE_BATCH_LIMIT]:
+                batch.set(ref, dados, merge=merge)
+            try:
+                batch.commit()
+                break
+            except _ERROS_ANTES_DO_COMMIT as e:
+                if tentativa == tentativas:
+                    raise
+                logger.warning(f"[Firestore] Falha no commit em lote ({tentativa}/{tentativas}), repetindo: {e}")
+                time.sleep(0.5 * tentativa)
+        commits += 1
+    return commits
+
+
+def _indexar_mensagens(rows):
+    """Atualiza o índice local de busca; falhas não afetam a gravação no Firestore."""
+    try:
+        search_index.index_messages(rows)
+    except Exception as e:
+        logger.warning(f"[Firestore] Erro ao indexar mensagens para busca: {e}")
+
+
+def _indexar_turnos(turnos):
+    rows = []
+    for turno in turnos:
+        if turno["user_text"]:
+            rows.append((turno["session_id"], "user", turno["user_text"], turno["user_at"]))
+        if turno["bot_text"]:
+            rows.append((turno["session_id"], "bot", turno["bot_text"], turno["bot_at"]))
+    _indexar_mensagens(rows)
+
+
+def save_turn(
+    session_id,
+    user_text=None,
+    bot_text=None,
+    state_updates=None,
+    user_meta=None,
+    bot_meta=None,
+    lead_data=None,
+    user_at=None,
+    bot_at=None,
+):
+    """
+    Persiste um turno completo do chat em um único commit atômico (WriteBatch):
+    mensagem do usuário, resposta do bot, contadores e timestamps da conversa,
+    alterações de estado do lead (state_updates) e, se informado, o lead final.
+
+    Como todos os SERVER_TIMESTAMP de um batch recebem o mesmo valor, as mensagens usam
+    horários do cliente (user_at/bot_at, em UTC) para manter a ordem usuário → bot.
+
+    Returns:
+        bool: True se sucesso, False caso contrário (silencioso)
+    """
+    if not _is_enabled() or _db is None:
+        return False
+
+    try:
+        turno = _montar_turno(
+            session_id, user_text, bot_text, state_updates, user_meta, bot_meta, lead_data, user_at, bot_at
+        )
+        _commit_operacoes(_operacoes_turnos([turno]))
+        _indexar_turnos([turno])
+        logger.debug(f"[Firestore] Turno salvo em lote: {session_id}")
+        return True
+    except Exception as e:
+        logger.error(f"[Firestore] Erro em save_turn({session_id}): {e}")
+        return False
+
+
+# ===== WRITE-BEHIND DE TURNOS DO CHAT =====
+# O chat enfileira os turnos (enqueue_turn) e uma thread em segundo plano grava em lote:
+# a cada FIRESTORE_FLUSH_INTERVAL_MS ou quando acumula FIRESTORE_FLUSH_MAX_TURNS turnos,
+# coalescendo por sessão e respeitando o limite de 500 escritas por batch.
+
+_FIRESTORE_BATCH_LIMIT = 500
+WRITE_BEHIND_ENABLED = os.getenv("FIRESTORE_WRITE_BEHIND", "true").lower() == "true"
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("FIRESTORE_WRITE_BEHIND_MAX_PENDING", "5000"))
+WRITE_BEHIND_FLUSH_INTERVAL_MS = int(os.getenv("FIRESTORE_FLUSH_INTERVAL_MS", "200"))
+WRITE_BEHIND_FLUSH_MAX_TURNS = int(os.getenv("FIRESTORE_FLUSH_MAX_TURNS", "100"))
+WRITE_BEHIND_ENQUEUE_TIMEOUT = float(os.getenv("FIRESTORE_WRITE_BEHIND_ENQUEUE_TIMEOUT", "0.5"))
+WRITE_BEHIND_DRAIN_TIMEOUT = float(os.getenv("FIRESTORE_WRITE_BEHIND_DRAIN_TIMEOUT", "10"))
+
+_PARAR_FLUSHER = object()
+_write_queue = queue.Queue(maxsize=WRITE_BEHIND_MAX_PENDING)
+_write_lock = threading.Lock()
+_write_flusher = None
+# Estado de lead ainda não gravado, por sessão: {"turnos": n, "estado": {...}}.
+# É sobreposto às leituras para que o próximo turno não leia estado desatualizado.
+_write_pending = {}
+_write_stats = {
+    "enqueued": 0,
+    "flushes": 0,
+    "commits": 0,
+    "turns_written": 0,
+    "ops_written": 0,
+    "last_batch_ops": 0,
+    "max_batch_ops": 0,
+    "dropped": 0,
+    "errors": 0,
+}
+
+
+def _garantir_flusher():
+    global _write_flusher
+    with _write_lock:
+        if _write_flusher is None or not _write_flusher.is_alive():
+            _write_flusher = threading.Thread(target=_loop_write_behind, name="firestore-write-behind", daemon=True)
+            _write_flusher.start()
+
+
+def _loop_write_behind():
+    parar = False
+    while not parar:
+        item = _write_queue.get()
+        if item is _PARAR_FLUSHER:
+            break
+        turnos = [item]
+        prazo = time.monotonic() + WRITE_BEHIND_FLUSH_INTERVAL_MS / 1000
+        while len(turnos) < WRITE_BEHIND_FLUSH_MAX_TURNS:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                item = _write_queue.get(timeout=restante)
+            except queue.Empty:
+                break
+            if item is _PARAR_FLUSHER:
+                parar = True
+                break
+            turnos.append(item)
+        _flush_turnos(turnos)
+
+
+# Escritas de contadores (stats/messages e stats/leads) que cada lote de turnos acrescenta
+_OPERACOES_STATS_POR_LOTE = 2
+
+
+def _lotes_de_turnos(turnos):
+    """
+    Divide os turnos em lotes cujas operações cabem em um único WriteBatch, mantendo os turnos
+    de uma sessão juntos sempre que possível. Cada lote leva seus próprios contadores, então é
+    gravado (ou perdido) inteiro, sem depender dos outros.
+    """
+    por_sessao = {}
+    for turno in turnos:
+        por_sessao.setdefault(turno["session_id"], []).append(turno)
+
+    limite = _FIRESTORE_BATCH_LIMIT - _OPERACOES_STATS_POR_LOTE
+    lotes, lote, sessoes, escritas = [], [], set(), 0
+    for turnos_sessao in por_sessao.values():
+        for turno in turnos_sessao:
+            custo = bool(turno["user_text"]) + bool(turno["bot_text"]) + bool(turno["lead_data"])
+            if lote and escritas + custo + (turno["session_id"] not in sessoes) > limite:
+                lotes.append(lote)
+                lote, sessoes, escritas = [], set(), 0
+            # +1 na primeira vez da sessão no lote: a atualização da conversa
+            escritas += custo + (turno["session_id"] not in sessoes)
+            lote.append(turno)
+            sessoes.add(turno["session_id"])
+    if lote:
+        lotes.append(lote)
+    return lotes
+
+
+def _flush_turnos(turnos):
+    try:
+        for lote in _lotes_de_turnos(turnos):
+            try:
+                operacoes = _operacoes_turnos(lote)
+                commits = _commit_operacoes(operacoes, tentativas=2)
+            except Exception as e:
+                logger.error(f"[Firestore] Erro no flush do write-behind ({len(lote)} turnos perdidos): {e}")
+                with _write_lock:
+                    _write_stats["errors"] += 1
+                    _write_stats["dropped"] += len(lote)
+                continue
+            _indexar_turnos(lote)
+            with _write_lock:
+                _write_stats["commits"] += commits
+                _write_stats["turns_written"] += len(lote)
+                _write_stats["ops_written"] += len(operacoes)
+                _write_stats["last_batch_ops"] = len(operacoes)
+                _write_stats["max_batch_ops"] = max(_write_stats["max_batch_ops"], len(operacoes))
+            logger.debug(f"[Firestore] Write-behind: {len(lote)} turnos, {len(operacoes)} escritas")
+        with _write_lock:
+            _write_stats["flushes"] += 1
+    finally:
+        with _write_lock:
+            for turno in turnos:
+                pendente = _write_pending.get(turno["session_id"])
+                if pendente:
+                    pendente["turnos"] -= 1
+                    if pendente["turnos"] <= 0:
+                        del _write_pending[turno["session_id"]]
+
+
+def enqueue_turn(session_id, **kwargs):
+    """
+    Enfileira um turno do chat (mesmos argumentos de save_turn) para gravação em segundo plano.
+    Se o write-behind estiver desligado (FIRESTORE_WRITE_BEHIND=false), grava na hora.
+    Se a fila estiver cheia por mais de FIRESTORE_WRITE_BEHIND_ENQUEUE_TIMEOUT segundos,
+    o turno é descartado e contabilizado em "dropped".
+
+    Returns:
+        bool: True se o turno foi enfileirado (ou gravado), False caso contrário
+    """
+    if not _is_enabled() or _db is None:
+        return False
+    if not WRITE_BEHIND_ENABLED:
+        return save_turn(session_id, **kwargs)
+
+    turno = _montar_turno(session_id, **kwargs)
+    _garantir_flusher()
+    with _write_lock:
+        pendente = _write_pending.setdefault(session_id, {"turnos": 0, "estado": {}})
+        pendente["turnos"] += 1
+        pendente["estado"].update(turno["state_updates"])
+
+    try:
+        _write_queue.put(turno, timeout=WRITE_BEHIND_ENQUEUE_TIMEOUT)
+    except queue.Full:
+        logger.error(f"[Firestore] Fila do write-behind cheia; turno de {session_id} descartado")
+        with _write_lock:
+            _write_stats["dropped"] += 1
+            pendente["turnos"] -= 1
+            if pendente["turnos"] <= 0:
+                _write_pending.pop(session_id, None)
+        return False
+
+    with _write_lock:
+        _write_stats["enqueued"] += 1
+    return True
+
+
+def _estado_pendente(session_id):
+    """Estado de lead enfileirado e ainda não gravado para a sessão ({} se não houver)."""
+    with _write_lock:
+        pendente = _write_pending.get(session_id)
+        # Cópia profunda: quem lê pode alterar o lead_data, que também está na fila do flusher
+        return copy.deepcopy(pendente["estado"]) if pendente else {}
+
+
+def drain_write_behind(timeout=None):
+    """Grava tudo o que está na fila e encerra o flusher (chamado no atexit)."""
+    global _write_flusher
+    flusher = _write_flusher
+    if flusher is None or not flusher.is_alive():
+        return
+    timeout = WRITE_BEHIND_DRAIN_TIMEOUT if timeout is None else timeout
+    try:
+        _write_queue.put(_PARAR_FLUSHER, timeout=timeout)
+    except queue.Full:
+        logger.error("[Firestore] Não foi possível drenar o write-behind: fila cheia")
+        return
+    flusher.join(timeout)
+    with _write_lock:
+        _write_flusher = None
+
+
+atexit.register(drain_write_behind)
+
+
+def get_write_behind_stats():
+    """Contadores do write-behind: flushes, tamanhos de lote, turnos gravados e descartados."""
+    with _write_lock:
+        stats = dict(_write_stats)
+    stats["pending"] = _write_queue.qsize()
+    stats["avg_batch_ops"] = round(stats["ops_written"] / stats["flushes"], 1) if stats["flushes"] else 0
+    return stats
+
+
+def _contar(query) -> int:
+    """
+    Conta os documentos de uma query com agregação no servidor (count()): uma ida ao
+    Firestore e nenhum documento transferido. Se o SDK/emulador não suportar, conta
+    via stream trazendo só os IDs.
+    """
+    try:
+        resultado = query.count(alias="total").get()
+        return int(resultado[0][0].value)
+    except Exception as e:
+        logger.debug(f"[Firestore] count() indisponível, contando via stream: {e}")
+        return sum(1 for _ in query.select([]).stream())
+
+
 def get_conversation_counts(
     days: int | None = None,
     date_start: datetime | None = None,
@@ -426,17 +900,8 @@ def get_conversation_counts(
             start = today - timedelta(days=days)
             query = query.where("created_at", ">=", start)
         
-        convs = query.stream()
-        total = 0
-        
-        for doc in convs:
-            data = doc.to_dict() or {}
-            
-            # Se usamos filtro por intervalo manual, podemos ignorar docs sem created_at
-            if (date_start or days) and not data.get("created_at"):
-                continue
-            
-            total += 1
+        # Documentos sem created_at já ficam de fora dos filtros de intervalo
+        total = _contar(query)
         
         return {"total_conversations": total}
     except Exception as e:
@@ -445,28 +910,35 @@ def get_conversation_counts(
 
 
 def get_message_counts_by_role():
+    """
+    Mensagens por papel: dos contadores materializados (stats/messages) ou, antes do backfill,
+    de contagens na collection group "messages" filtradas por role, que exigem o índice de
+    campo único em role com escopo de collection group (firestore.indexes.json).
+
+    Em caso de erro (ex.: índice ausente), os valores vêm como None, e o dashboard mostra
+    "indisponível" em vez de um 0 falso.
+    """
     try:
-        user_count = 0
-        bot_count = 0
-
-        messages = _db.collection_group("messages").stream()
-        for msg in messages:
-            data = msg.to_dict()
-            role = data.get("role")
-            if role == "user":
-                user_count += 1
-            elif role == "bot":
-                bot_count += 1
+        stats = _ler_stats_mensagens()
+        if stats is not None:
+            return stats
+
+        messages = _db.collection_group("messages")
+        user_count = _contar(messages.where("role", "==", "user"))
+        bot_count = _contar(messages.where("role", "==", "bot"))
 
         return {
             "user_messages": user_count,
             "bot_messages": bot_count,
         }
     except Exception as e:
-        logger.error(f"[Firestore] Erro ao agrupar mensagens: {e}")
+        logger.error(
+            f"[Firestore] Erro ao contar mensagens por papel (confira o índice de 'role' na collection "
+            f"group 'messages' em firestore.indexes.json, ou rode o backfill_stats.py): {e}"
+        )
         return {
-            "user_messages": 0,
-            "bot_messages": 0,
+            "user_messages": None,
+            "bot_messages": None,
         }
 
 
@@ -490,6 +962,17 @@ def get_daily_conversation_counts(
             start = today - timedelta(days=days)
             end = None  # sem limite superior explícito (mantém comportamento antigo)
 
+        # Com os contadores diários prontos, lê só os documentos dos dias do intervalo
+        if _contadores_diarios_prontos():
+            hoje = datetime.now(timezone.utc).date()
+            fim = min(end.date(), hoje) if end else hoje
+            dias = []
+            dia = start.date()
+            while dia <= fim:
+                dias.append(dia.isoformat())
+                dia += timedelta(days=1)
+            return {d: n for d, n in _ler_contadores_diarios(dias).items() if n}
+
         query = _db.collection("conversations").where("created_at", ">=", start)
         if end:
             query = query.where("created_at", "<=", end)
@@ -512,6 +995,43 @@ def get_daily_conversation_counts(
         return {}
 
 
+# Conversas criadas por dia (stats_daily/{dia}.conversations). Dias passados não mudam mais,
+# então ficam em memória indefinidamente; o dia de hoje é sempre relido.
+_dias_conversas_cache: dict[str, int] = {}
+_dias_conversas_lock = threading.Lock()
+_dias_conversas_prontos = False
+
+
+def _contadores_diarios_prontos() -> bool:
+    """True depois que o backfill marcou stats/conversations como pronto (lido até ficar True)."""
+    global _dias_conversas_prontos
+    if not _dias_conversas_prontos:
+        _dias_conversas_prontos = _ler_stats("conversations") is not None
+    return _dias_conversas_prontos
+
+
+def _ler_contadores_diarios(dias: list[str]) -> dict[str, int]:
+    """{dia: conversas criadas} para os dias pedidos, lendo do Firestore só o que não está em cache."""
+    with _dias_conversas_lock:
+        contagens = {d: _dias_conversas_cache[d] for d in dias if d in _dias_conversas_cache}
+    faltando = [d for d in dias if d not in contagens]
+    if not faltando:
+        return contagens
+
+    hoje = datetime.now(timezone.utc).date().isoformat()
+    daily_ref = _db.collection("stats_daily")
+    lidos = {}
+    for snap in _db.get_all([daily_ref.document(d) for d in faltando], field_paths=["conversations"]):
+        lidos[snap.id] = int((snap.to_dict() or {}).get("conversations") or 0) if snap.exists else 0
+
+    with _dias_conversas_lock:
+        for dia in faltando:
+            contagens[dia] = lidos.get(dia, 0)
+            if dia < hoje:
+                _dias_conversas_cache[dia] = contagens[dia]
+    return contagens
+
+
 def get_recent_conversations(limit=10):
     try:
         convs = (
@@ -538,99 +1058,288 @@ def get_recent_conversations(limit=10):
         return []
 
 
+# ===== PAGINAÇÃO =====
+# Listagens do admin paginadas com cursor (start_after): o page_token é opaco para o cliente
+# e carrega os valores de ordenação do último item da página (campo + ID do documento,
+# para desempatar itens com o mesmo timestamp).
+
+def _codificar_page_token(valor, doc_id: str) -> str:
+    if isinstance(valor, datetime):
+        valor = {"ts": valor.isoformat()}
+    bruto = json.dumps({"v": valor, "id": doc_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_page_token(token: str):
+    """Retorna (valor, doc_id) de um page_token. Levanta ValueError se o token for inválido."""
+    try:
+        bruto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        dados = json.loads(bruto.decode("utf-8"))
+        valor = dados["v"]
+        if isinstance(valor, dict):
+            valor = datetime.fromisoformat(valor["ts"])
+        return valor, str(dados["id"])
+    except Exception as e:
+        raise ValueError(f"page_token inválido: {token!r}") from e
+
+
+def _paginar(query, campo: str, colecao_ref, limit: int, page_token: str | None, direction):
+    """
+    Ordena a query por `campo` (+ ID do documento), continua após o page_token e traz
+    limit+1 documentos para saber se há próxima página. Retorna (snapshots, next_page_token).
+    """
+    query = (
+        query.order_by(campo, direction=direction)
+             .order_by(firestore.FieldPath.document_id(), direction=direction)
+    )
+    if page_token:
+        valor, doc_id = _decodificar_page_token(page_token)
+        query = query.start_after({campo: valor, firestore.FieldPath.document_id(): colecao_ref.document(doc_id)})
+
+    snaps = list(query.limit(limit + 1).stream())
+    next_token = None
+    if len(snaps) > limit:
+        snaps = snaps[:limit]
+        ultimo = snaps[-1]
+        next_token = _codificar_page_token((ultimo.to_dict() or {}).get(campo), ultimo.id)
+    return snaps, next_token
+
+
+def _serializar_conversa(d: dict) -> dict:
+    return {
+        "session_id": d.get("session_id"),
+        "created_at": d.get("created_at"),
+        "updated_at": d.get("updated_at"),
+        "total_user_messages": d.get("total_user_messages", 0),
+        "total_bot_messages": d.get("total_bot_messages", 0),
+        "channel": d.get("channel"),
+        "status": d.get("status"),
+    }
+
+
+def get_conversations_page(limit=50, page_token=None, search=None):
+    """
+    Uma página de conversas, mais recentes primeiro (updated_at DESC).
+    Com `search`, busca por PREFIXO do session_id (consulta de intervalo no índice do campo),
+    ordenando por session_id.
+
+    Returns:
+        dict {"conversations": [...], "next_page_token": str | None}
+    Levanta ValueError se o page_token for inválido.
+    """
+    if page_token:
+        _decodificar_page_token(page_token)  # valida antes de consultar
+    search = (search or "").strip().lower()
+
+    try:
+        conversations_ref = _db.collection("conversations")
+        if search:
+            query = (
+                conversations_ref.where("session_id", ">=", search)
+                                 .where("session_id", "<", search + "\uf8ff")
+            )
+            snaps, next_token = _paginar(query, "session_id", conversations_ref, limit, page_token, firestore.Query.ASCENDING)
+        else:
+            snaps, next_token = _paginar(conversations_ref, "updated_at", conversations_ref, limit, page_token, firestore.Query.DESCENDING)
+
+        return {
+            "conversations": [_serializar_conversa(s.to_dict() or {}) for s in snaps],
+            "next_page_token": next_token,
+        }
+    except Exception as e:
+        logger.error(f"[Firestore] Erro em get_conversations_page: {e}")
+        return {"conversations": [], "next_page_token": None}
+
+
 def get_all_conversations(limit=50, filters=None):
     """
-    Busca conversas com filtros opcionais.
+    Busca conversas com filtros opcionais (primeira página de get_conversations_page).
     
     Args:
         limit: Número máximo de resultados (padrão: 50)
         filters: Dict opcional com filtros {
-            "search": str  # Busca por session_id (filtro em memória)
+            "search": str  # Prefixo do session_id
         }
     
     Returns:
         Lista de dicionários com dados das conversas
     """
-    # Garantir que filters seja um dict (ou vazio)
     filters = filters or {}
-    search = (filters.get("search") or "").strip().lower()
-    
-    try:
-        # Query Firestore mantida como está (ordenada por updated_at DESC e com limit)
-        convs_query = (
-            _db.collection("conversations")
-               .order_by("updated_at", direction=firestore.Query.DESCENDING)
-               .limit(limit)
-        )
-        
-        convs = convs_query.stream()
-        
-        # Serializar documentos
-        results = []
-        for c in convs:
-            d = c.to_dict()
-            results.append({
-                "session_id": d.get("session_id"),
-                "created_at": d.get("created_at"),
-                "updated_at": d.get("updated_at"),
-                "total_user_messages": d.get("total_user_messages", 0),
-                "total_bot_messages": d.get("total_bot_messages", 0),
-                "channel": d.get("channel"),
-                "status": d.get("status"),
-            })
-        
-        # Aplicar filtro de busca em memória (se fornecido)
-        if search:
-            filtered = []
-            for conv in results:
-                session_id = str(conv.get("session_id", "")).lower()
-                if search in session_id:
-                    filtered.append(conv)
-            results = filtered
-        
-        return results
-    except Exception as e:
-        logger.error(f"[Firestore] Erro em get_all_conversations: {e}")
-        return []
+    return get_conversations_page(limit=limit, search=filters.get("search"))["conversations"]
+
+
+def _serializar_mensagem(data: dict) -> dict:
+    role_raw = data.get("role") or data.get("papel")
+    normalized_role = role_raw
+    if role_raw == "assistant":
+        normalized_role = "bot"
+    elif role_raw == "user":
+        normalized_role = "user"
+    elif role_raw == "bot":
+        normalized_role = "bot"
+
+    return {
+        "role": normalized_role,
+        "content": data.get("content") or data.get("texto"),
+        "created_at": data.get("created_at") or data.get("criadoEm"),
+    }
 
 
-def get_conversation_messages(session_id, limit=200):
+def get_conversation_messages(session_id, limit=200, latest=False):
+    """
+    Retorna mensagens da conversa em ordem cronológica.
+    Com latest=True, retorna as `limit` mensagens MAIS RECENTES (ainda em ordem cronológica),
+    útil para reconstruir o histórico de uma sessão do chatbot.
+    """
     try:
+        direction = firestore.Query.DESCENDING if latest else firestore.Query.ASCENDING
         msgs = (
             _db.collection("conversations").document(session_id)
                .collection("messages")
-               .order_by("created_at", direction=firestore.Query.ASCENDING)
+               .order_by("created_at", direction=direction)
                .limit(limit)
                .stream()
         )
+        if latest:
+            msgs = reversed(list(msgs))
 
-        results = []
-        for m in msgs:
-            data = m.to_dict()
-            role_raw = data.get("role") or data.get("papel")
-            normalized_role = role_raw
-            if role_raw == "assistant":
-                normalized_role = "bot"
-            elif role_raw == "user":
-                normalized_role = "user"
-            elif role_raw == "bot":
-                normalized_role = "bot"
-
-            content = data.get("content") or data.get("texto")
-            created = data.get("created_at") or data.get("criadoEm")
-
-            results.append({
-                "role": normalized_role,
-                "content": content,
-                "created_at": created,
-            })
-
-        return results
+        return [_serializar_mensagem(m.to_dict() or {}) for m in msgs]
     except Exception as e:
         logger.error(f"[Firestore] Erro em get_conversation_messages({session_id}): {e}")
         return []
 
 
+def get_conversation_messages_page(session_id, limit=200, page_token=None):
+    """
+    Uma página das mensagens da conversa em ordem cronológica.
+
+    Returns:
+        dict {"messages": [...], "next_page_token": str | None}
+    Levanta ValueError se o page_token for inválido.
+    """
+    if page_token:
+        _decodificar_page_token(page_token)  # valida antes de consultar
+
+    try:
+        messages_ref = _db.collection("conversations").document(session_id).collection("messages")
+        snaps, next_token = _paginar(messages_ref, "created_at", messages_ref, limit, page_token, firestore.Query.ASCENDING)
+        return {
+            "messages": [_serializar_mensagem(s.to_dict() or {}) for s in snaps],
+            "next_page_token": next_token,
+        }
+    except Exception as e:
+        logger.error(f"[Firestore] Erro em get_conversation_messages_page({session_id}): {e}")
+        return {"messages": [], "next_page_token": None}
+
+
+# ===== ÍNDICE DE CIDADES DE SC =====
+# Estruturas pré-calculadas uma única vez a partir de CIDADES_SANTA_CATARINA, para que
+# normalize_city_name faça buscas em dicionário em vez de varrer a lista a cada chamada.
+# A ordem da lista continua sendo o critério de desempate (menor índice vence), como nas
+# varreduras lineares originais.
+
+def _strip_accents(s: str) -> str:
+    """Remove acentos e diacríticos, incluindo cedilha."""
+    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+
+
+# Prefixos comuns removidos do início da resposta ("sou de Palhoça")
+_CITY_PREFIXES = [
+    "eu sou de", "eu moro em", "eu falo de", "sou de", "moro em",
+    "falo de", "sou", "moro", "falo", "cidade de", "município de",
+    "cidade", "município"
+]
+
+# Sinônimos conhecidos (apenas para SC)
+_CITY_SYNONYMS = {
+    "floripa": "Florianópolis",
+    "itajai": "Itajaí",
+    "itaja": "Itajaí",
+    "gv": "Gaspar",  # comum em SC
+}
+
+_CIDADES_SET = frozenset(CIDADES_SANTA_CATARINA)
+# (nome_oficial, nome_sem_acentos) na ordem da lista
+_CIDADES_NORM = [(c, _strip_accents(c.lower())) for c in CIDADES_SANTA_CATARINA]
+# nome em minúsculas -> oficial / nome sem acentos -> oficial (primeira ocorrência na lista)
+_CIDADES_POR_LOWER = {}
+_CIDADES_POR_NORM = {}
+# Palavras da cidade (tupla) -> índice na lista, para o matching reverso por palavra isolada.
+# Só cidades com 4+ caracteres (evita "ita" → "Itá").
+_CIDADES_POR_PALAVRAS = {}
+# Trigrama -> índices das cidades que o contêm (filtro para "texto contido na cidade")
+_CIDADES_POR_TRIGRAMA = {}
+# Tamanho -> índices das cidades, e (caractere, k) -> índices das cidades com k+ ocorrências
+# do caractere: dão os limites superiores do ratio do difflib (real_quick_ratio / quick_ratio),
+# usados para descartar cidades antes do SequenceMatcher
+_CIDADES_POR_TAMANHO = {}
+_CIDADES_POR_CARACTERE = {}
+
+for _i, (_original, _norm) in enumerate(_CIDADES_NORM):
+    _CIDADES_POR_LOWER.setdefault(_original.lower(), _original)
+    _CIDADES_POR_NORM.setdefault(_norm, _original)
+    if len(_norm) >= 4:
+        _CIDADES_POR_PALAVRAS.setdefault(tuple(_norm.split(" ")), _i)
+    for _j in range(len(_norm) - 2):
+        _CIDADES_POR_TRIGRAMA.setdefault(_norm[_j:_j + 3], set()).add(_i)
+    _CIDADES_POR_TAMANHO.setdefault(len(_norm), []).append(_i)
+    for _ch, _qtd in Counter(_norm).items():
+        for _k in range(1, _qtd + 1):
+            _CIDADES_POR_CARACTERE.setdefault((_ch, _k), []).append(_i)
+
+del _i, _j, _k, _ch, _qtd, _original, _norm
+
+_MAX_PALAVRAS_CIDADE = max(len(k) for k in _CIDADES_POR_PALAVRAS)
+
+
+def _cidade_como_palavras(text: str) -> str | None:
+    """
+    Procura uma cidade (4+ caracteres) que apareça no texto como palavra(s) isolada(s),
+    delimitada por espaços. Havendo várias, vence a que vem primeiro na lista oficial.
+    """
+    palavras = text.split(" ")
+    melhor = None
+    for inicio in range(len(palavras)):
+        for tamanho in range(1, min(_MAX_PALAVRAS_CIDADE, len(palavras) - inicio) + 1):
+            idx = _CIDADES_POR_PALAVRAS.get(tuple(palavras[inicio:inicio + tamanho]))
+            if idx is not None and (melhor is None or idx < melhor):
+                melhor = idx
+    return None if melhor is None else _CIDADES_NORM[melhor][0]
+
+
+def _candidatas_por_tamanho(text: str, cutoff: float) -> list[int]:
+    """Índices (em ordem) das cidades cujo tamanho permite ratio >= cutoff (real_quick_ratio)."""
+    n = len(text)
+    indices = []
+    for tamanho, idxs in _CIDADES_POR_TAMANHO.items():
+        if 2.0 * min(tamanho, n) / (tamanho + n) >= cutoff:
+            indices.extend(idxs)
+    indices.sort()
+    return indices
+
+
+def _candidatas_aproximadas(text: str, cutoff: float) -> list[int]:
+    """Índices (em ordem) das cidades que passam nos limites superiores do ratio do difflib."""
+    # comuns[i] = caracteres em comum (multiconjunto) entre o texto e a cidade i
+    comuns = Counter()
+    for ch, qtd in Counter(text).items():
+        for k in range(1, qtd + 1):
+            indices = _CIDADES_POR_CARACTERE.get((ch, k))
+            if not indices:
+                break
+            comuns.update(indices)
+    n = len(text)
+    return [
+        i for i in _candidatas_por_tamanho(text, cutoff)
+        if 2.0 * comuns[i] / (n + len(_CIDADES_NORM[i][1])) >= cutoff
+    ]
+
+
+# As funções abaixo são puras e as cidades informadas se repetem muito ("Palhoça", "palhoca"),
+# então os resultados ficam em um LRU por texto de entrada (estatísticas em get_city_cache_stats)
+CITY_CACHE_SIZE = int(os.getenv("CITY_CACHE_SIZE", "4096"))
+
+
 def sanitize_and_map_city(city_input: str) -> str:
     """
     Sanitiza e mapeia cidade para versão normalizada (sem acentos, lowercase).
@@ -642,10 +1351,12 @@ def sanitize_and_map_city(city_input: str) -> str:
     Returns:
         String normalizada (lowercase, sem acentos) para comparação
     """
-    def strip_accents(s: str) -> str:
-        """Remove acentos e diacríticos, incluindo cedilha."""
-        return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-    
+    if isinstance(city_input, str):
+        return _sanitize_and_map_city_memo(city_input)
+    return _sanitize_and_map_city(city_input)
+
+
+def _sanitize_and_map_city(city_input: str) -> str:
     if not city_input:
         return ""
     
@@ -653,13 +1364,7 @@ def sanitize_and_map_city(city_input: str) -> str:
     text = city_input.strip().lower()
     
     # Remove prefixos comuns
-    prefixes = [
-        "eu sou de", "eu moro em", "eu falo de", "sou de", "moro em",
-        "falo de", "sou", "moro", "falo", "cidade de", "município de",
-        "cidade", "município"
-    ]
-    
-    for prefix in prefixes:
+    for prefix in _CITY_PREFIXES:
         if text.startswith(prefix):
             text = text[len(prefix):].strip()
             break
@@ -678,7 +1383,7 @@ def sanitize_and_map_city(city_input: str) -> str:
     text = text.strip()
     
     # Remove acentos e diacríticos (incluindo cedilha)
-    text_normalized = strip_accents(text)
+    text_normalized = _strip_accents(text)
     
     return text_normalized
 
@@ -691,61 +1396,32 @@ def normalize_city_name(city: str) -> str | None:
     Usa matching aproximado para reconhecer variações e erros de digitação.
     Garante que dados antigos como "Palhoca" (sem cedilha) retornem "Palhoça" (com cedilha).
     """
+    if isinstance(city, str):
+        return _normalize_city_name_memo(city)
+    return _normalize_city_name(city)
+
+
+def _normalize_city_name(city: str) -> str | None:
     # Retorna None se vazio, None ou só espaços
     if not city or not str(city).strip():
         return None
 
-    def strip_accents(s: str) -> str:
-        """Remove acentos e diacríticos, incluindo cedilha."""
-        return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-
-    # Sinônimos conhecidos (apenas para SC)
-    synonyms = {
-        "floripa": "Florianópolis",
-        "itajai": "Itajaí",
-        "itaja": "Itajaí",
-        "gv": "Gaspar",  # comum em SC
-    }
-
     # Limpeza inicial: converte para lowercase e remove espaços
     text = city.strip().lower()
     
     if not text:
         return None
     
-    # CRÍTICO: Criar versão auxiliar original ANTES de qualquer limpeza
-    # Esta versão será usada para matching reverso antes de remover vírgulas
-    text_clean_original = text.strip()
-    text_original_no_accents = strip_accents(text_clean_original)
-    
-    # Normaliza lista de cidades de SC (cria tuplas: (nome_oficial, nome_sem_acentos))
-    cidades_norm = [(c, strip_accents(c.lower())) for c in CIDADES_SANTA_CATARINA]
-    
-    # Normaliza lista de cidades de SC (cria tuplas: (nome_oficial, nome_sem_acentos))
-    # Criado aqui para uso no matching reverso com texto original
-    cidades_norm_original = [(c, strip_accents(c.lower())) for c in CIDADES_SANTA_CATARINA]
-    
     # MATCHING REVERSO COM TEXTO ORIGINAL (ANTES DE QUALQUER LIMPEZA)
-    # Isso garante que "rua x, palhoca" seja reconhecido antes de remover a vírgula
-    # CORREÇÃO: Verifica se a cidade aparece como palavra isolada para evitar falsos positivos
-    # Exemplo: "itajaí" não deve matchar com "itá" dentro de "itajaí"
-    # CORREÇÃO: Rejeita cidades muito curtas (< 4 chars) no matching reverso também
-    for original, norm in cidades_norm_original:
-        # Pula cidades muito curtas no matching reverso (evita "ita" → "Itá")
-        if len(norm) < 4:
-            continue
-        # Verifica se a cidade aparece como palavra isolada (com espaços ou no início/fim)
-        if f" {norm} " in f" {text_original_no_accents} " or text_original_no_accents.startswith(f"{norm} ") or text_original_no_accents.endswith(f" {norm}"):
-            return original  # Retorna nome OFICIAL imediatamente
+    # Isso garante que "rua x, palhoca" seja reconhecido antes de remover a vírgula.
+    # Só aceita a cidade como palavra isolada ("itajaí" não deve matchar com "itá")
+    # e ignora cidades muito curtas (< 4 chars).
+    original = _cidade_como_palavras(_strip_accents(text.strip()))
+    if original:
+        return original  # Retorna nome OFICIAL imediatamente
     
     # Remove prefixos comuns no início da frase
-    prefixes = [
-        "eu sou de", "eu moro em", "eu falo de", "sou de", "moro em",
-        "falo de", "sou", "moro", "falo", "cidade de", "município de",
-        "cidade", "município"
-    ]
-    
-    for prefix in prefixes:
+    for prefix in _CITY_PREFIXES:
         if text.startswith(prefix):
             text = text[len(prefix):].strip()
             break
@@ -775,40 +1451,41 @@ def normalize_city_name(city: str) -> str | None:
     text_lower = text.lower()
     if text_lower in CITY_EQUIVALENCE_MAP:
         candidate = CITY_EQUIVALENCE_MAP[text_lower]
-        if candidate in CIDADES_SANTA_CATARINA:
+        if candidate in _CIDADES_SET:
             return candidate
     
     # Remove acentos para comparação
-    text_no_accents = strip_accents(text)
+    text_no_accents = _strip_accents(text)
 
     # Verifica sinônimos
-    if text in synonyms:
-        candidate = synonyms[text]
-        if candidate in CIDADES_SANTA_CATARINA:
+    if text in _CITY_SYNONYMS:
+        candidate = _CITY_SYNONYMS[text]
+        if candidate in _CIDADES_SET:
             return candidate
 
-    # Normaliza lista de cidades de SC (cria tuplas: (nome_oficial, nome_sem_acentos))
-    cidades_norm = [(c, strip_accents(c.lower())) for c in CIDADES_SANTA_CATARINA]
-
     # CORREÇÃO: Para entradas muito curtas (< 4 caracteres), verifica match exato com nome oficial
     # Isso permite "Itá" (nome oficial) mas rejeita "ita" (sem acento, pode ser erro)
     if len(text_no_accents) < 4:
-        # Verifica se o texto original (com acentos) matcha exatamente com alguma cidade oficial
-        text_original_lower = city.strip().lower() if city else ""
-        for cidade_oficial in CIDADES_SANTA_CATARINA:
-            if cidade_oficial.lower() == text_original_lower:
-                return cidade_oficial  # Match exato com nome oficial, permite
-        # Se não matchou com nome oficial, rejeita (pode ser erro de digitação)
-        return None
+        # Match exato do texto original (com acentos) com o nome oficial; senão rejeita
+        return _CIDADES_POR_LOWER.get(city.strip().lower())
 
     # 1. Igualdade exata (mais preciso) - compara versões sem acentos
-    for original, norm in cidades_norm:
-        if norm == text_no_accents:
-            return original  # Retorna nome OFICIAL (com acentos/cedilha)
+    original = _CIDADES_POR_NORM.get(text_no_accents)
+    if original:
+        return original  # Retorna nome OFICIAL (com acentos/cedilha)
 
     # 2. Texto contido na cidade normalizada (mas só se for match significativo)
-    # Evita falsos positivos como "curitiba" -> "curitibanos"
-    for original, norm in cidades_norm:
+    # Evita falsos positivos como "curitiba" -> "curitibanos".
+    # Candidatas: cidades que contêm todos os trigramas do texto.
+    candidatas = None
+    for j in range(len(text_no_accents) - 2):
+        indices = _CIDADES_POR_TRIGRAMA.get(text_no_accents[j:j + 3])
+        if not indices:
+            candidatas = set()
+            break
+        candidatas = set(indices) if candidatas is None else candidatas & indices
+    for i in sorted(candidatas or ()):
+        original, norm = _CIDADES_NORM[i]
         if text_no_accents in norm:
             # Só aceita se:
             # - O texto for pelo menos 70% do tamanho da cidade, OU
@@ -820,35 +1497,25 @@ def normalize_city_name(city: str) -> str | None:
                 return original  # Retorna nome OFICIAL
 
     # 3. MATCH REVERSO APÓS LIMPEZA: cidade oficial dentro do texto informado
-    # Aceita qualquer posição (início, meio ou fim)
     # Exemplo: "centro de palhoca" → reconhece "palhoca" → retorna "Palhoça"
-    # CORREÇÃO: Verifica se a cidade aparece como palavra isolada para evitar falsos positivos
-    # CORREÇÃO: Rejeita cidades muito curtas (< 4 chars) no matching reverso também
-    for original, norm in cidades_norm:
-        # Pula cidades muito curtas no matching reverso (evita "ita" → "Itá")
-        if len(norm) < 4:
-            continue
-        # Verifica se a cidade aparece como palavra isolada (com espaços ou no início/fim)
-        if f" {norm} " in f" {text_no_accents} " or text_no_accents.startswith(f"{norm} ") or text_no_accents.endswith(f" {norm}"):
-            return original  # Retorna nome OFICIAL
+    original = _cidade_como_palavras(text_no_accents)
+    if original:
+        return original  # Retorna nome OFICIAL
 
-    # 4. Matching aproximado com difflib
-    choices = [norm for _, norm in cidades_norm]
+    # 4. Matching aproximado com difflib (só entre cidades que podem atingir o cutoff)
+    choices = [_CIDADES_NORM[i][1] for i in _candidatas_aproximadas(text_no_accents, 0.8)]
     match = difflib.get_close_matches(text_no_accents, choices, n=1, cutoff=0.8)
     if match:
-        for original, norm in cidades_norm:
-            if norm == match[0]:
-                return original  # Retorna nome OFICIAL
+        return _CIDADES_POR_NORM[match[0]]  # Retorna nome OFICIAL
 
     # 5. MATCH POR TOKENS — capturar qualquer token parecido com a cidade
-    # CORREÇÃO: Aumentado limite para 4 letras e ratio para 0.80 para evitar falsos positivos
+    # Token com pelo menos 4 letras e ratio >= 0.80 para evitar falsos positivos
     # Exemplo: "itá" não deve matchar com "itajaí" (ratio ~0.50, mas token muito curto)
     tokens = [t for t in text_no_accents.replace('-', ' ').replace(',', ' ').split() if len(t) >= 4]
     for token in tokens:
-        for original, norm in cidades_norm:
-            ratio = difflib.SequenceMatcher(None, token, norm).ratio()
-            # Requer token com pelo menos 4 caracteres E ratio >= 0.80
-            if len(token) >= 4 and ratio >= 0.80:
+        for i in _candidatas_aproximadas(token, 0.80):
+            original, norm = _CIDADES_NORM[i]
+            if difflib.SequenceMatcher(None, token, norm).ratio() >= 0.80:
                 return original  # Retorna nome OFICIAL
 
     # Não é cidade de SC reconhecida - retorna None
@@ -856,6 +1523,47 @@ def normalize_city_name(city: str) -> str | None:
     return None
 
 
+_normalize_city_name_memo = lru_cache(maxsize=CITY_CACHE_SIZE)(_normalize_city_name)
+_sanitize_and_map_city_memo = lru_cache(maxsize=CITY_CACHE_SIZE)(_sanitize_and_map_city)
+
+
+def get_city_cache_stats() -> dict:
+    """Hits, misses e ocupação dos caches de normalize_city_name e sanitize_and_map_city."""
+    return {
+        "normalize_city_name": _normalize_city_name_memo.cache_info()._asdict(),
+        "sanitize_and_map_city": _sanitize_and_map_city_memo.cache_info()._asdict(),
+    }
+
+
+def _montar_documento_lead(session_id: str, lead_data: dict) -> dict:
+    """Monta o documento da coleção 'leads' a partir dos dados coletados na conversa."""
+    # Normaliza cidade: tenta usar normalize_city_name para SC, senão mantém texto original
+    raw_city = lead_data.get("cidade") or ""
+    normalized_city = normalize_city_name(raw_city)
+    # Se normalizou como cidade de SC, usa a normalizada; senão, mantém o texto original
+    if normalized_city:
+        cidade_final = normalized_city
+    elif raw_city and str(raw_city).strip():
+        cidade_final = str(raw_city).strip()[:100]
+    else:
+        # Garantir que nunca salve "" ou None
+        cidade_final = "Outras cidades do Brasil"
+
+    doc = {
+        "session_id": session_id,
+        "nome": (lead_data.get("nome") or "").strip(),
+        "email": (lead_data.get("email") or "").strip(),
+        "cidade": cidade_final,
+        "estado": (lead_data.get("estado") or "").strip().upper(),
+        "idade": lead_data.get("idade"),
+        "interesse": (lead_data.get("interesse") or "").strip(),
+        "createdAt": firestore.SERVER_TIMESTAMP,
+    }
+
+    # remove campos completamente vazios
+    return {k: v for k, v in doc.items() if v not in (None, "", {})}
+
+
 def save_lead_from_conversation(session_id: str, lead_data: dict):
     """
     Salva um lead completo na coleção 'leads', a partir dos dados de uma conversa.
@@ -868,33 +1576,9 @@ def save_lead_from_conversation(session_id: str, lead_data: dict):
         return False
 
     try:
-        # Normaliza cidade: tenta usar normalize_city_name para SC, senão mantém texto original
-        raw_city = lead_data.get("cidade") or ""
-        normalized_city = normalize_city_name(raw_city)
-        # Se normalizou como cidade de SC, usa a normalizada; senão, mantém o texto original
-        if normalized_city:
-            cidade_final = normalized_city
-        elif raw_city and str(raw_city).strip():
-            cidade_final = str(raw_city).strip()[:100]
-        else:
-            # Garantir que nunca salve "" ou None
-            cidade_final = "Outras cidades do Brasil"
-        
-        doc = {
-            "session_id": session_id,
-            "nome": (lead_data.get("nome") or "").strip(),
-            "email": (lead_data.get("email") or "").strip(),
-            "cidade": cidade_final,
-            "estado": (lead_data.get("estado") or "").strip().upper(),
-            "idade": lead_data.get("idade"),
-            "interesse": (lead_data.get("interesse") or "").strip(),
-            "createdAt": firestore.SERVER_TIMESTAMP,
-        }
-
-        # remove campos completamente vazios
-        doc = {k: v for k, v in doc.items() if v not in (None, "", {})}
-
-        _db.collection("leads").add(doc)
+        doc = _montar_documento_lead(session_id, lead_data)
+        operacoes = [(_db.collection("leads").document(), doc, False)]
+        _commit_operacoes(operacoes + _operacoes_stats_leads([doc]))
         logger.info(f"[Firestore] Lead salvo a partir da conversa {session_id}")
         return True
     except Exception as e:
@@ -902,6 +1586,68 @@ def save_lead_from_conversation(session_id: str, lead_data: dict):
         return False
 
 
+def _chave_cidade_grafico(cidade_bruta) -> str:
+    """Nome oficial da cidade de SC, ou "Outras cidades do Brasil" se não for reconhecida."""
+    # Tenta normalizar como cidade de SC
+    # normalize_city_name sempre retorna o nome OFICIAL da lista (com acentos/cedilha)
+    cidade_normalizada = normalize_city_name(cidade_bruta)
+    
+    # Proteção extra: tentar normalizar novamente sem acentos e em lowercase
+    if not cidade_normalizada:
+        cidade_normalizada = normalize_city_name(_strip_accents(str(cidade_bruta).lower()))
+    
+    if cidade_normalizada is None:
+        logger.debug(f"[DEBUG][Cidade não reconhecida]: '{cidade_bruta}'")
+    
+    # Se normalizou e está na lista de cidades de SC, agrupa individualmente
+    # cidade_normalizada já é o nome oficial (ex: "Palhoça" com cedilha)
+    if cidade_normalizada and cidade_normalizada in _CIDADES_SET:
+        return cidade_normalizada
+    # Não é cidade de SC ou não foi reconhecida - agrupa como "Outras cidades do Brasil"
+    return "Outras cidades do Brasil"
+
+
+# Histograma de leads -> campo do documento de lead usado para calculá-lo
+LEAD_AGGREGATE_FIELDS = {
+    "by_city": "cidade",
+    "by_state": "estado",
+    "by_age_range": "idade",
+}
+
+
+def get_lead_aggregates(fields=None, date_range=None) -> dict:
+    """
+    Calcula os histogramas de leads em uma única passada pela coleção.
+    - fields: histogramas desejados ("by_city", "by_state", "by_age_range"); padrão: todos.
+    - date_range: (inicio, fim) aplicado em createdAt; qualquer ponta pode ser None.
+    Sem date_range, usa os contadores materializados (stats/leads) quando disponíveis.
+    Retorna dict { "by_city": {...}, "by_state": {...}, "by_age_range": {...} }.
+    """
+    campos = [c for c in (fields or LEAD_AGGREGATE_FIELDS) if c in LEAD_AGGREGATE_FIELDS]
+    if not _is_enabled() or _db is None:
+        return {c: {} for c in campos}
+
+    try:
+        inicio, fim = date_range or (None, None)
+        if inicio is None and fim is None:
+            stats = _ler_stats("leads")
+            if stats is not None:
+                return {c: dict(stats.get(c) or {}) for c in campos}
+
+        query = _db.collection("leads")
+        if inicio is not None:
+            query = query.where("createdAt", ">=", inicio)
+        if fim is not None:
+            query = query.where("createdAt", "<=", fim)
+        # Projeção: traz só os campos usados nos histogramas
+        query = query.select([LEAD_AGGREGATE_FIELDS[c] for c in campos])
+
+        return _somar_leads((snap.to_dict() or {} for snap in query.stream()), campos)
+    except Exception as e:
+        logger.error(f"[Firestore] Erro em get_lead_aggregates: {e}")
+        return {c: {} for c in campos}
+
+
 def get_leads_count_by_city():
     """
     Conta leads agrupados por cidade.
@@ -910,58 +1656,7 @@ def get_leads_count_by_city():
     Garante que dados antigos como "Palhoca" (sem cedilha) sejam normalizados para "Palhoça" (com cedilha).
     Retorna dict { "cidade": count, ... } onde as chaves são sempre os nomes oficiais da lista.
     """
-    if not _is_enabled() or _db is None:
-        return {}
-    
-    try:
-        leads = _db.collection("leads").stream()
-        
-        counts = {}
-        for lead_doc in leads:
-            data = lead_doc.to_dict()
-            cidade_bruta = data.get("cidade")
-            
-            # Tratar cidade vazia, None ou espaços
-            if not cidade_bruta or not str(cidade_bruta).strip():
-                counts["Outras cidades do Brasil"] = counts.get("Outras cidades do Brasil", 0) + 1
-                continue
-            
-            # Tenta normalizar como cidade de SC
-            # normalize_city_name sempre retorna o nome OFICIAL da lista (com acentos/cedilha)
-            cidade_normalizada = normalize_city_name(cidade_bruta)
-            
-            # Proteção extra: tentar normalizar novamente após limpeza profunda
-            if not cidade_normalizada:
-                # Remove acentos e converte para lowercase para tentar novamente
-                def strip_accents_helper(s: str) -> str:
-                    """Remove acentos e diacríticos, incluindo cedilha."""
-                    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
-                
-                cidade_limpa = strip_accents_helper(str(cidade_bruta).lower())
-                cidade_normalizada = normalize_city_name(cidade_limpa)
-            
-            # Log temporário para debug (remover depois)
-            if cidade_normalizada is None:
-                logger.debug(f"[DEBUG][Cidade não reconhecida]: '{cidade_bruta}'")
-            
-            # Se normalizou e está na lista de cidades de SC, agrupa individualmente
-            # cidade_normalizada já é o nome oficial (ex: "Palhoça" com cedilha)
-            if cidade_normalizada and cidade_normalizada in CIDADES_SANTA_CATARINA:
-                # Usa o nome oficial como chave (garante consistência no gráfico)
-                counts[cidade_normalizada] = counts.get(cidade_normalizada, 0) + 1
-            else:
-                # Não é cidade de SC ou não foi reconhecida - agrupa como "Outras cidades do Brasil"
-                counts["Outras cidades do Brasil"] = counts.get("Outras cidades do Brasil", 0) + 1
-        
-        # Segurança final: remover chaves vazias
-        if "" in counts:
-            counts["Outras cidades do Brasil"] = counts.get("Outras cidades do Brasil", 0) + counts[""]
-            del counts[""]
-        
-        return counts
-    except Exception as e:
-        logger.error(f"[Firestore] Erro em get_leads_count_by_city: {e}")
-        return {}
+    return get_lead_aggregates(["by_city"])["by_city"]
 
 
 def get_leads_count_by_state():
@@ -969,93 +1664,321 @@ def get_leads_count_by_state():
     Conta leads agrupados por estado (UF).
     Retorna dict { "SC": count, "PR": count, ... }.
     """
-    if not _is_enabled() or _db is None:
-        return {}
+    return get_lead_aggregates(["by_state"])["by_state"]
+
+
+def get_leads_count_by_age_range():
+    """
+    Conta leads agrupados por faixa etária.
+    Retorna dict { "16-18": count, "19-24": count, "25+": count }.
+    """
+    return get_lead_aggregates(["by_age_range"])["by_age_range"]
+
+
+# ===== CONTADORES MATERIALIZADOS (stats) =====
+# O dashboard lê contadores pré-agregados em vez de varrer 'leads' e as mensagens:
+# - stats/leads: mapas by_city / by_state / by_age_range (e daily: {dia: n});
+# - stats/messages/shards/{n}: user_messages / bot_messages (e daily: {dia: {...}}),
+#   divididos em FIRESTORE_STATS_SHARDS documentos para não estourar o limite de escrita
+#   por documento; a leitura soma os shards.
+# - stats_daily/{dia}: conversas criadas no dia (incrementado ao criar a conversa).
+# As gravações de leads, mensagens e conversas incrementam esses documentos. Os leitores só usam os
+# contadores depois do backfill (backfill_stats.py), que grava "ready": True; até lá,
+# continuam varrendo as coleções.
+
+STATS_MESSAGE_SHARDS = max(1, int(os.getenv("FIRESTORE_STATS_SHARDS", "10")))
+
+
+def _dia_utc(ts=None) -> str:
+    """Data (YYYY-MM-DD, UTC) de um timestamp; sem timestamp, a data de hoje."""
+    if ts is None:
+        ts = datetime.now(timezone.utc)
+    elif ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return ts.date().isoformat()
 
+
+def _faixa_etaria(idade_raw) -> str | None:
+    """Faixa etária do gráfico ("16-18", "19-24", "25+") ou None se inválida/abaixo de 16."""
+    # Tenta converter idade para int
     try:
-        leads = _db.collection("leads").stream()
-        counts: dict[str, int] = {}
+        if isinstance(idade_raw, str):
+            idade = int(idade_raw.strip())
+        elif isinstance(idade_raw, int):
+            idade = idade_raw
+        else:
+            return None
+    except (ValueError, AttributeError):
+        return None
 
-        for lead_doc in leads:
-            data = lead_doc.to_dict() or {}
-            estado = (data.get("estado") or "").strip().upper()
+    if 16 <= idade <= 18:
+        return "16-18"
+    if 19 <= idade <= 24:
+        return "19-24"
+    if idade >= 25:
+        return "25+"
+    # Idades abaixo de 16 são ignoradas
+    return None
 
-            # Considera só UF com 2 letras
-            if len(estado) != 2:
-                continue
 
-            counts[estado] = counts.get(estado, 0) + 1
+def _uf_lead(estado_raw) -> str | None:
+    """UF do lead em maiúsculas, considerando só siglas com 2 letras."""
+    estado = (estado_raw or "").strip().upper()
+    return estado if len(estado) == 2 else None
 
-        return counts
-    except Exception as e:
-        logger.error(f"[Firestore] Erro em get_leads_count_by_state: {e}")
-        return {}
 
+def _somar_leads(docs, campos=None) -> dict:
+    """
+    Acumula os histogramas de leads em uma passada:
+    {"by_city": {...}, "by_state": {...}, "by_age_range": {...}} (ou só os `campos` pedidos).
+    """
+    campos = list(campos or LEAD_AGGREGATE_FIELDS)
+    agregados = {c: {} for c in campos}
+    # Cidade bruta -> chave do gráfico, resolvida uma vez por valor distinto
+    chaves_cidade = {}
+
+    for data in docs:
+        for campo in campos:
+            if campo == "by_city":
+                cidade_bruta = data.get("cidade")
+                # Trata cidade vazia, None ou só espaços
+                if not cidade_bruta or not str(cidade_bruta).strip():
+                    chave = "Outras cidades do Brasil"
+                else:
+                    chave = chaves_cidade.get(cidade_bruta)
+                    if chave is None:
+                        chave = chaves_cidade[cidade_bruta] = _chave_cidade_grafico(cidade_bruta)
+            elif campo == "by_state":
+                chave = _uf_lead(data.get("estado"))
+            else:
+                chave = _faixa_etaria(data.get("idade"))
+            if chave:
+                agregados[campo][chave] = agregados[campo].get(chave, 0) + 1
+
+    return agregados
 
-def get_leads_count_by_age_range():
+
+def _operacoes_stats_leads(docs: list, dia: str | None = None) -> list:
+    """Incrementos de stats/leads para novos documentos de lead (operações (ref, dados, merge))."""
+    if not docs:
+        return []
+    agregados = _somar_leads(docs)
+    dados = {
+        campo: {chave: firestore.Increment(n) for chave, n in contagem.items()}
+        for campo, contagem in agregados.items()
+    }
+    dados["daily"] = {dia or _dia_utc(): firestore.Increment(len(docs))}
+    dados["updated_at"] = firestore.SERVER_TIMESTAMP
+    return [(_db.collection("stats").document("leads"), dados, True)]
+
+
+def _operacoes_stats_mensagens(por_dia: dict) -> list:
     """
-    Conta leads agrupados por faixa etária.
-    Retorna dict { "16-18": count, "19-24": count, "25+": count }.
+    Incrementos dos contadores de mensagens a partir de {dia: {"user": n, "bot": m}},
+    gravados em um shard aleatório de stats/messages/shards.
     """
-    if not _is_enabled() or _db is None:
-        return {}
+    totais = {"user_messages": 0, "bot_messages": 0}
+    daily = {}
+    for dia, contagem in por_dia.items():
+        campos = {}
+        for role in ("user", "bot"):
+            if contagem.get(role):
+                campos[f"{role}_messages"] = firestore.Increment(contagem[role])
+                totais[f"{role}_messages"] += contagem[role]
+        if campos:
+            daily[dia] = campos
+    if not daily:
+        return []
 
-    try:
-        leads = _db.collection("leads").stream()
-        counts: dict[str, int] = {}
+    dados = {campo: firestore.Increment(n) for campo, n in totais.items() if n}
+    dados["daily"] = daily
+    shard = str(random.randrange(STATS_MESSAGE_SHARDS))
+    ref = _db.collection("stats").document("messages").collection("shards").document(shard)
+    return [(ref, dados, True)]
 
-        for lead_doc in leads:
-            data = lead_doc.to_dict() or {}
-            idade_raw = data.get("idade")
 
-            # Tenta converter idade para int
-            try:
-                if isinstance(idade_raw, str):
-                    idade = int(idade_raw.strip())
-                elif isinstance(idade_raw, int):
-                    idade = idade_raw
-                else:
-                    continue
-            except (ValueError, AttributeError):
-                # Se não conseguir converter, ignora esse lead
-                continue
+def _ler_stats(doc_id: str) -> dict | None:
+    """Documento stats/<doc_id> se já foi preenchido pelo backfill; senão None."""
+    snap = _db.collection("stats").document(doc_id).get()
+    if not snap.exists:
+        return None
+    data = snap.to_dict() or {}
+    return data if data.get("ready") else None
+
 
-            # Define faixa etária
-            bucket = None
-            if 16 <= idade <= 18:
-                bucket = "16-18"
-            elif 19 <= idade <= 24:
-                bucket = "19-24"
-            elif idade >= 25:
-                bucket = "25+"
-            # Idades abaixo de 16 são ignoradas
+def _ler_stats_mensagens() -> dict | None:
+    """Soma os shards de stats/messages: {"user_messages": n, "bot_messages": m}, ou None sem backfill."""
+    if _ler_stats("messages") is None:
+        return None
+    totais = {"user_messages": 0, "bot_messages": 0}
+    for shard in _db.collection("stats").document("messages").collection("shards").stream():
+        data = shard.to_dict() or {}
+        for campo in totais:
+            totais[campo] += int(data.get(campo) or 0)
+    return totais
 
-            if bucket:
-                counts[bucket] = counts.get(bucket, 0) + 1
 
-        return counts
-    except Exception as e:
-        logger.error(f"[Firestore] Erro em get_leads_count_by_age_range: {e}")
+def rebuild_stats(apply: bool = False) -> dict:
+    """
+    Recalcula os contadores materializados varrendo 'leads' e todas as mensagens.
+    Com apply=True, sobrescreve stats/leads e os shards de stats/messages e marca "ready".
+    Retorna os valores calculados. Escritas concorrentes durante o backfill podem se perder:
+    rode em horário de pouco movimento.
+    """
+    if not _is_enabled() or _db is None:
         return {}
 
+    docs_leads = [
+        snap.to_dict() or {}
+        for snap in _db.collection("leads").select(["cidade", "estado", "idade", "createdAt"]).stream()
+    ]
+    leads = _somar_leads(docs_leads)
+    leads_daily = {}
+    for data in docs_leads:
+        created = data.get("createdAt")
+        if created and hasattr(created, "date"):
+            dia = _dia_utc(created)
+            leads_daily[dia] = leads_daily.get(dia, 0) + 1
+
+    mensagens = {"user_messages": 0, "bot_messages": 0}
+    mensagens_daily = {}
+    for snap in _db.collection_group("messages").select(["role", "created_at"]).stream():
+        data = snap.to_dict() or {}
+        campo = {"user": "user_messages", "bot": "bot_messages"}.get(data.get("role"))
+        if not campo:
+            continue
+        mensagens[campo] += 1
+        created = data.get("created_at")
+        if created and hasattr(created, "date"):
+            dia = mensagens_daily.setdefault(_dia_utc(created), {"user_messages": 0, "bot_messages": 0})
+            dia[campo] += 1
+
+    conversas_daily = {}
+    for snap in _db.collection("conversations").select(["created_at"]).stream():
+        created = (snap.to_dict() or {}).get("created_at")
+        if created and hasattr(created, "date"):
+            dia = _dia_utc(created)
+            conversas_daily[dia] = conversas_daily.get(dia, 0) + 1
+
+    resultado = {
+        "leads": dict(leads, daily=leads_daily),
+        "messages": dict(mensagens, daily=mensagens_daily),
+        "conversations": {"daily": conversas_daily},
+    }
+    if not apply:
+        return resultado
+
+    stats_ref = _db.collection("stats")
+    shards_ref = stats_ref.document("messages").collection("shards")
+    operacoes = [
+        (stats_ref.document("leads"), dict(resultado["leads"], ready=True, updated_at=firestore.SERVER_TIMESTAMP), False),
+        (shards_ref.document("0"), resultado["messages"], False),
+    ]
+    # Zera os demais shards (inclusive os que sobraram de um FIRESTORE_STATS_SHARDS maior)
+    shards = {str(n) for n in range(1, STATS_MESSAGE_SHARDS)}
+    shards |= {snap.id for snap in shards_ref.stream()} - {"0"}
+    operacoes += [
+        (shards_ref.document(shard), {"user_messages": 0, "bot_messages": 0, "daily": {}}, False)
+        for shard in sorted(shards)
+    ]
+    operacoes.append((stats_ref.document("messages"), {"ready": True, "shards": STATS_MESSAGE_SHARDS, "updated_at": firestore.SERVER_TIMESTAMP}, False))
+
+    # Contadores diários de conversas: grava os dias encontrados e zera os que sobraram
+    daily_ref = _db.collection("stats_daily")
+    dias = set(conversas_daily) | {snap.id for snap in daily_ref.select([]).stream()}
+    operacoes += [
+        (daily_ref.document(dia), {"conversations": conversas_daily.get(dia, 0)}, True)
+        for dia in sorted(dias)
+    ]
+    operacoes.append((stats_ref.document("conversations"), {"ready": True, "updated_at": firestore.SERVER_TIMESTAMP}, False))
+    _commit_operacoes(operacoes)
+    with _dias_conversas_lock:
+        _dias_conversas_cache.clear()
+    logger.info("[Firestore] Contadores de stats recalculados")
+    return resultado
+
 
 # ===== HELPERS DE SETTINGS =====
+# Os documentos de settings quase nunca mudam e são lidos a cada /api/chat-config e a cada
+# página do admin, então ficam em cache no processo por SETTINGS_CACHE_TTL_SECONDS.
+# update_settings invalida o cache local; com SETTINGS_LISTENER=true um listener
+# on_snapshot do Firestore também atualiza o cache quando outro processo salva.
+
+SETTINGS_CACHE_TTL_SECONDS = float(os.getenv("SETTINGS_CACHE_TTL_SECONDS", "60"))
+SETTINGS_LISTENER_ENABLED = os.getenv("SETTINGS_LISTENER", "false").lower() == "true"
+
+_settings_cache = {}  # doc_id -> (dados, expira_em)
+_settings_versions = {}  # doc_id -> int, incrementado sempre que o conteúdo em cache muda
+_settings_watches = {}  # doc_id -> watch do on_snapshot
+_settings_lock = threading.Lock()
+
+
+def _guardar_settings(doc_id: str, data: dict) -> None:
+    with _settings_lock:
+        atual = _settings_cache.get(doc_id)
+        if atual is None or atual[0] != data:
+            _settings_versions[doc_id] = _settings_versions.get(doc_id, 0) + 1
+        _settings_cache[doc_id] = (data, time.monotonic() + SETTINGS_CACHE_TTL_SECONDS)
+
+
+def invalidate_settings_cache(doc_id: str | None = None) -> None:
+    """Descarta o cache de settings (de um documento ou de todos)."""
+    with _settings_lock:
+        doc_ids = [doc_id] if doc_id is not None else list(_settings_cache)
+        for d in doc_ids:
+            if _settings_cache.pop(d, None) is not None:
+                _settings_versions[d] = _settings_versions.get(d, 0) + 1
+
+
+def get_settings_version(doc_id: str = "global") -> int:
+    """Versão do conteúdo em cache de settings/<doc_id> (muda sempre que o conteúdo muda)."""
+    with _settings_lock:
+        return _settings_versions.get(doc_id, 0)
+
+
+def _observar_settings(doc_id: str) -> None:
+    """Registra (uma vez) um listener on_snapshot que mantém o cache de settings/<doc_id> atualizado."""
+    with _settings_lock:
+        if doc_id in _settings_watches:
+            return
+        _settings_watches[doc_id] = None
+
+    def _on_snapshot(doc_snapshots, changes, read_time):
+        for snap in doc_snapshots:
+            _guardar_settings(doc_id, (snap.to_dict() or {}) if snap.exists else {})
+
+    try:
+        watch = _db.collection("settings").document(doc_id).on_snapshot(_on_snapshot)
+        with _settings_lock:
+            _settings_watches[doc_id] = watch
+        logger.debug(f"[Firestore] Listener de settings/{doc_id} ativo")
+    except Exception as e:
+        logger.warning(f"[Firestore] Listener de settings/{doc_id} indisponível, usando só TTL: {e}")
+
 
 def get_settings(doc_id: str = "global") -> dict:
     """
     Lê as configurações da collection 'settings', doc <doc_id>.
     Se não existir ou Firestore estiver desabilitado, retorna {}.
+    O resultado vem do cache do processo enquanto válido; retorna sempre uma cópia.
     """
     if not _is_enabled() or _db is None:
         return {}
-    
+
+    if SETTINGS_LISTENER_ENABLED:
+        _observar_settings(doc_id)
+
+    with _settings_lock:
+        item = _settings_cache.get(doc_id)
+        if item is not None and item[1] > time.monotonic():
+            return copy.deepcopy(item[0])
+
     try:
         doc_ref = _db.collection("settings").document(doc_id)
         snap = doc_ref.get()
-        if not snap.exists:
-            return {}
-        data = snap.to_dict() or {}
-        return data
+        data = (snap.to_dict() or {}) if snap.exists else {}
+        _guardar_settings(doc_id, data)
+        return copy.deepcopy(data)
     except Exception as e:
         logger.error(f"[Firestore] Erro em get_settings({doc_id}): {e}")
         return {}
@@ -1072,6 +1995,7 @@ def update_settings(doc_id: str, data: dict) -> bool:
     try:
         doc_ref = _db.collection("settings").document(doc_id)
         doc_ref.set(data, merge=True)
+        invalidate_settings_cache(doc_id)
         logger.debug(f"[Firestore] Settings {doc_id} atualizado")
         return True
     except Exception as e:
@@ -0,0 +1,176 @@
+"""
+Índice local de busca textual (SQLite FTS5) sobre o conteúdo das mensagens das conversas.
+
+- Atualizado incrementalmente a cada mensagem gravada no Firestore (services/firestore.py).
+- Reconstruído a partir do Firestore com `python rebuild_search_index.py`.
+- Acentos e maiúsculas são ignorados (tokenizer unicode61 com remove_diacritics),
+  então "edital" encontra "Edital" e "inscricao" encontra "inscrição".
+
+O índice é local ao servidor (arquivo SEARCH_INDEX_PATH). Se o SQLite não tiver FTS5,
+a busca fica desabilitada e as gravações no Firestore seguem normalmente.
+"""
+
+import os
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+SEARCH_INDEX_PATH = os.getenv(
+    "SEARCH_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "search_index.db"),
+)
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS mensagens USING fts5(
+    content,
+    session_id UNINDEXED,
+    role UNINDEXED,
+    created_at UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+_conn = None
+_lock = threading.Lock()
+_disponivel = None
+
+
+def _conexao():
+    """Abre (uma vez) a conexão com o índice; retorna None se desabilitado/indisponível."""
+    global _conn, _disponivel
+    if _disponivel is False:
+        return None
+    if _conn is None:
+        if not SEARCH_INDEX_ENABLED:
+            _disponivel = False
+            return None
+        try:
+            conn = sqlite3.connect(SEARCH_INDEX_PATH, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.commit()
+            _conn = conn
+            _disponivel = True
+        except sqlite3.Error as e:
+            logger.warning(f"[Busca] Índice de busca indisponível ({SEARCH_INDEX_PATH}): {e}")
+            _disponivel = False
+            return None
+    return _conn
+
+
+def _normalizar_data(created_at) -> str:
+    if isinstance(created_at, datetime):
+        return created_at.isoformat()
+    return str(created_at or "")
+
+
+def index_messages(rows) -> int:
+    """
+    Indexa mensagens em lote. rows: iterável de (session_id, role, content, created_at).
+    Retorna quantas foram indexadas (0 se o índice estiver indisponível).
+    """
+    rows = [
+        (content, session_id, role, _normalizar_data(created_at))
+        for session_id, role, content, created_at in rows
+        if content
+    ]
+    if not rows:
+        return 0
+    with _lock:
+        conn = _conexao()
+        if conn is None:
+            return 0
+        try:
+            conn.executemany(
+                "INSERT INTO mensagens (content, session_id, role, created_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+            return len(rows)
+        except sqlite3.Error as e:
+            logger.error(f"[Busca] Erro ao indexar mensagens: {e}")
+            return 0
+
+
+def index_message(session_id, role, content, created_at=None) -> bool:
+    """Indexa uma mensagem. Retorna True se indexou."""
+    return index_messages([(session_id, role, content, created_at)]) == 1
+
+
+def clear() -> None:
+    """Remove todas as mensagens do índice (antes de uma reconstrução)."""
+    with _lock:
+        conn = _conexao()
+        if conn is None:
+            return
+        conn.execute("DELETE FROM mensagens")
+        conn.commit()
+
+
+def _consulta_fts(q: str) -> str:
+    """
+    Converte o texto digitado em uma consulta FTS5 segura: cada palavra vira um termo
+    entre aspas (todas obrigatórias) e a última aceita prefixo ("edit" encontra "edital").
+    """
+    termos = ['"' + t.replace('"', '""') + '"' for t in q.split()]
+    if termos:
+        termos[-1] += "*"
+    return " ".join(termos)
+
+
+def search(q: str, limit: int = 20) -> list[dict]:
+    """
+    Busca conversas cujas mensagens contêm os termos de `q`, mais relevantes primeiro (BM25).
+    Retorna uma entrada por sessão: [{"session_id", "role", "snippet", "created_at"}, ...].
+    """
+    consulta = _consulta_fts(q or "")
+    if not consulta:
+        return []
+    with _lock:
+        conn = _conexao()
+        if conn is None:
+            return []
+        try:
+            # Melhor mensagem (menor bm25) de cada sessão; o snippet é montado só para ela
+            linhas = conn.execute(
+                """
+                WITH hits AS (
+                    SELECT rowid, session_id, bm25(mensagens) AS score
+                    FROM mensagens WHERE mensagens MATCH ?1
+                ), melhores AS (
+                    SELECT rowid, score,
+                           row_number() OVER (PARTITION BY session_id ORDER BY score) AS pos
+                    FROM hits
+                )
+                SELECT m.session_id, m.role, m.created_at,
+                       snippet(mensagens, 0, '[', ']', '…', 12)
+                FROM melhores JOIN mensagens AS m ON m.rowid = melhores.rowid
+                WHERE melhores.pos = 1 AND mensagens MATCH ?1
+                ORDER BY melhores.score
+                LIMIT ?2
+                """,
+                (consulta, limit),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"[Busca] Erro na busca {q!r}: {e}")
+            return []
+
+    return [
+        {"session_id": session_id, "role": role, "snippet": trecho, "created_at": created_at}
+        for session_id, role, created_at, trecho in linhas
+    ]
+
+
+def stats() -> dict:
+    """Quantidade de mensagens indexadas e caminho do índice."""
+    with _lock:
+        conn = _conexao()
+        if conn is None:
+            return {"enabled": False, "path": SEARCH_INDEX_PATH}
+        (total,) = conn.execute("SELECT count(*) FROM mensagens").fetchone()
+    return {"enabled": True, "path": SEARCH_INDEX_PATH, "messages": total}
@@ -852,14 +852,41 @@ function sendMessage() {
     showTypingIndicator();
     setLocked(true);
     (async () => {
+        // Streaming: o texto aparece à medida que chega; o evento final substitui o parcial
+        let partial = '';
+        let streamingContent = null;
+        const onChunk = (text) => {
+            if (!streamingContent) {
+                hideTypingIndicator();
+                streamingContent = addMessage('', 'bot', { streaming: true });
+            }
+            partial += text;
+            if (streamingContent) streamingContent.textContent = partial;
+            scrollMessagesToBottom();
+        };
         try {
-            const botResponse = await sendToBackend(message);
+            let botResponse = await streamFromBackend(message, onChunk);
+            // Streaming indisponível (o servidor não recebeu a mensagem): usa o endpoint tradicional.
+            // Se a conexão cair depois, streamFromBackend lança erro em vez de pedir um reenvio,
+            // que gravaria o turno em dobro e avançaria o cadastro duas vezes.
+            if (botResponse === null) {
+                botResponse = await sendToBackend(message);
+            }
             hideTypingIndicator();
-            addMessage(botResponse || 'Desculpe, estou indisponível no momento.', 'bot');
+            const finalText = botResponse || 'Desculpe, estou indisponível no momento.';
+            if (streamingContent) {
+                finishStreamingMessage(streamingContent, finalText);
+            } else {
+                addMessage(finalText, 'bot');
+            }
             if (AppState.isTTSEnabled && botResponse) speakText(botResponse);
         } catch (err) {
             hideTypingIndicator();
-            addMessage('Erro ao conectar ao assistente. Tente novamente.', 'bot');
+            if (streamingContent) {
+                finishStreamingMessage(streamingContent, 'Erro ao conectar ao assistente. Tente novamente.');
+            } else {
+                addMessage('Erro ao conectar ao assistente. Tente novamente.', 'bot');
+            }
         } finally {
             setLocked(false);
         }
@@ -867,8 +894,13 @@ function sendMessage() {
     addXP(10);
 }
 
-function addMessage(content, sender) {
-    if (!DOMElements.widgetMessages) return;
+/**
+ * Adiciona uma mensagem ao chat e retorna o elemento com o conteúdo.
+ * Com options.streaming, a bolha do bot é criada vazia para receber o texto aos poucos
+ * (sem histórico/anúncio até finishStreamingMessage).
+ */
+function addMessage(content, sender, options = {}) {
+    if (!DOMElements.widgetMessages) return null;
     
     const messageDiv = document.createElement('div');
     messageDiv.className = `${sender}-message`;
@@ -897,7 +929,9 @@ function addMessage(content, sender) {
     
     const messageContent = document.createElement('div');
     messageContent.className = 'message-content';
-    if (sender === 'bot') {
+    if (options.streaming) {
+        messageContent.textContent = content;
+    } else if (sender === 'bot') {
         // Processa o conteúdo transformando padrões "Nome: URL" em links clicáveis
         const processedFragment = processMessageContent(content);
         messageContent.appendChild(processedFragment);
@@ -914,16 +948,27 @@ function addMessage(content, sender) {
     
     DOMElements.widgetMessages.appendChild(messageDiv);
     
-    // Salvar no histórico
-    AppState.messageHistory.push({ content, sender, timestamp: Date.now() });
-    
     // Scroll para baixo (robusto)
     scrollMessagesToBottom();
+    if (options.streaming) return messageContent;
+
+    // Salvar no histórico
+    AppState.messageHistory.push({ content, sender, timestamp: Date.now() });
     
     // Anunciar nova mensagem
     if (sender === 'bot') {
         announceToScreenReader(`Nova mensagem do assistente: ${content}`);
     }
+    return messageContent;
+}
+
+// Substitui o texto parcial do streaming pela resposta final (com links processados)
+function finishStreamingMessage(messageContent, content) {
+    messageContent.textContent = '';
+    messageContent.appendChild(processMessageContent(content));
+    AppState.messageHistory.push({ content, sender: 'bot', timestamp: Date.now() });
+    scrollMessagesToBottom();
+    announceToScreenReader(`Nova mensagem do assistente: ${content}`);
 }
 
 // Scroll robusto até o final da lista de mensagens
@@ -1446,6 +1491,75 @@ async function sendToBackend(message) {
     return null;
 }
 
+/**
+ * Envia a mensagem para /api/chat/stream (Server-Sent Events) e chama onChunk(texto) a cada
+ * pedaço recebido. Retorna a resposta final (evento "replace") ou null se o streaming
+ * não estiver disponível (a requisição falhou ou foi recusada, então pode ser reenviada).
+ * Se o servidor aceitou a mensagem e o stream terminar sem o "replace", lança erro: o turno
+ * pode já ter sido processado, e reenviar a mensagem o repetiria.
+ */
+async function streamFromBackend(message, onChunk) {
+    if (!window.ReadableStream || !window.TextDecoder) return null;
+
+    const sessionId = getOrCreateSessionId();
+    let response;
+    try {
+        response = await fetch('/api/chat/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream',
+            },
+            body: JSON.stringify({
+                message,
+                session_id: sessionId
+            })
+        });
+    } catch (error) {
+        console.error('Erro ao iniciar o streaming:', error);
+        return null;
+    }
+    if (!response.ok || !response.body) return null;
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let finalText = null;
+
+    const handleEvent = (raw) => {
+        let type = 'message';
+        let data = '';
+        raw.split('\n').forEach(line => {
+            if (line.startsWith('event:')) type = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        if (!data) return;
+        const payload = JSON.parse(data);
+        if (type === 'chunk') {
+            onChunk(payload.text || '');
+        } else if (type === 'replace') {
+            finalText = payload.response;
+            if (payload.session_id && payload.session_id !== sessionId) {
+                localStorage.setItem('chat_session_id', payload.session_id);
+            }
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let separator;
+        while ((separator = buffer.indexOf('\n\n')) !== -1) {
+            handleEvent(buffer.slice(0, separator));
+            buffer = buffer.slice(separator + 2);
+        }
+    }
+    if (buffer.trim()) handleEvent(buffer);
+    if (finalText === null) throw new Error('Streaming interrompido antes da resposta final');
+    return finalText;
+}
+
 function initializeWidget() {
     // Configurações iniciais do widget
     updateXPDisplay();
@@ -0,0 +1,185 @@
+"""
+Atualização da base de conhecimento em segundo plano, sem reiniciar o processo.
+
+- A cada KNOWLEDGE_WATCH_SECONDS, confere se o dados.json mudou no disco (mtime e tamanho), seja
+  por um `python utils/scraper.py` manual, seja pela raspagem de outro worker. Se mudou, chama
+  Chatbot.recarregar_conhecimento, que monta a nova base fora das requisições e a troca de uma vez.
+- Com KNOWLEDGE_REFRESH_SECONDS > 0, também roda o scraper quando o dados.json fica mais velho que
+  esse intervalo. O scraper grava o arquivo de forma atômica (temporário + rename), e um arquivo
+  de trava (dados.json.lock) evita que vários workers do Gunicorn raspem o site ao mesmo tempo.
+"""
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_REFRESH_SECONDS = int(os.getenv("KNOWLEDGE_REFRESH_SECONDS", "0"))
+KNOWLEDGE_WATCH_SECONDS = int(os.getenv("KNOWLEDGE_WATCH_SECONDS", "60"))
+
+# Trava de raspagem mais velha que isso é considerada abandonada (processo que morreu no meio)
+_TRAVA_EXPIRA_SEGUNDOS = 30 * 60
+
+
+class AtualizadorConhecimento:
+    """Thread que mantém o Chatbot em dia com o dados.json (e, opcionalmente, com o site)."""
+
+    def __init__(self, chatbot, caminho: str, intervalo_raspagem: int = 0, intervalo_verificacao: int = 60):
+        self.chatbot = chatbot
+        self.caminho = caminho
+        self.intervalo_raspagem = max(0, intervalo_raspagem)
+        self.intervalo_verificacao = max(0, intervalo_verificacao)
+        self._assinatura = self._assinatura_arquivo()
+        self._proxima_tentativa = 0.0
+        self._parar = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "checks": 0,
+            "reloads": 0,
+            "scrapes": 0,
+            "scrape_failures": 0,
+            "errors": 0,
+            "last_scrape_at": None,
+            "last_reload_at": None,
+            "last_error": None,
+        }
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self.intervalo_raspagem or self.intervalo_verificacao)
+
+    def iniciar(self) -> None:
+        if not self.ativo or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="knowledge-refresher", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"[Conhecimento] Atualizador ativo (raspagem: {self.intervalo_raspagem or 'desligada'}s, "
+            f"verificação: {self.intervalo_verificacao or 'desligada'}s)"
+        )
+
+    def parar(self, timeout: float | None = None) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self) -> None:
+        intervalo = min(i for i in (self.intervalo_raspagem, self.intervalo_verificacao) if i)
+        while not self._parar.wait(intervalo):
+            self.executar_ciclo()
+
+    def executar_ciclo(self) -> bool:
+        """Uma rodada: raspa o site se o dados.json estiver vencido e recarrega se o arquivo mudou."""
+        try:
+            with self._lock:
+                self._stats["checks"] += 1
+            if self._raspagem_vencida():
+                self._raspar()
+            assinatura = self._assinatura_arquivo()
+            if assinatura is None or assinatura == self._assinatura:
+                return False
+            self._assinatura = assinatura
+            trocou = self.chatbot.recarregar_conhecimento()
+            if trocou:
+                with self._lock:
+                    self._stats["reloads"] += 1
+                    self._stats["last_reload_at"] = _agora()
+            return trocou
+        except Exception as e:
+            logger.error(f"[Conhecimento] Erro na atualização da base: {e}")
+            with self._lock:
+                self._stats["errors"] += 1
+                self._stats["last_error"] = str(e)
+            return False
+
+    def _raspagem_vencida(self) -> bool:
+        # Também espera o intervalo desde a última tentativa, para não insistir a cada
+        # verificação quando o site está fora do ar (o arquivo antigo continua velho)
+        if not self.intervalo_raspagem or time.monotonic() < self._proxima_tentativa:
+            return False
+        return self._idade_arquivo() >= self.intervalo_raspagem
+
+    def _raspar(self) -> None:
+        self._proxima_tentativa = time.monotonic() + self.intervalo_raspagem
+        if not self._adquirir_trava():
+            logger.info("[Conhecimento] Outro processo já está raspando o site; aguardando o resultado")
+            return
+        try:
+            from utils import scraper  # só carregado quando a raspagem agendada está ligada
+
+            dados = scraper.salvar_dados(caminho=self.caminho)
+            with self._lock:
+                self._stats["scrapes"] += 1
+                self._stats["last_scrape_at"] = _agora()
+                if dados is None:
+                    self._stats["scrape_failures"] += 1
+        finally:
+            self._liberar_trava()
+
+    def _assinatura_arquivo(self) -> tuple | None:
+        try:
+            info = os.stat(self.caminho)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def _idade_arquivo(self) -> float:
+        try:
+            return time.time() - os.path.getmtime(self.caminho)
+        except OSError:
+            return float("inf")
+
+    @property
+    def _caminho_trava(self) -> str:
+        return f"{self.caminho}.lock"
+
+    def _adquirir_trava(self) -> bool:
+        for _ in range(2):
+            try:
+                os.close(os.open(self._caminho_trava, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self._caminho_trava) < _TRAVA_EXPIRA_SEGUNDOS:
+                        return False
+                    os.remove(self._caminho_trava)
+                except OSError:
+                    return False
+        return False
+
+    def _liberar_trava(self) -> None:
+        try:
+            os.remove(self._caminho_trava)
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "refresh_seconds": self.intervalo_raspagem,
+                "watch_seconds": self.intervalo_verificacao,
+                "running": self._thread is not None and self._thread.is_alive(),
+                **self._stats,
+            }
+
+
+def _agora() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def iniciar_atualizador(chatbot, caminho: str) -> AtualizadorConhecimento | None:
+    """Cria e inicia o atualizador com a configuração do ambiente (None se estiver desligado)."""
+    atualizador = AtualizadorConhecimento(
+        chatbot,
+        caminho,
+        intervalo_raspagem=KNOWLEDGE_REFRESH_SECONDS,
+        intervalo_verificacao=KNOWLEDGE_WATCH_SECONDS,
+    )
+    if not atualizador.ativo:
+        return None
+    atualizador.iniciar()
+    return atualizador
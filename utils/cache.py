@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUTTLCache:
+    """
+    Cache em memória thread-safe com despejo LRU (menos recentemente usado)
+    e expiração por tempo (TTL).
+
+    - maxsize: número máximo de entradas; ao exceder, a entrada LRU é removida.
+    - ttl: segundos até a entrada expirar (None = nunca expira).
+    - sliding: se True, o TTL conta a partir do último acesso (expira por inatividade);
+      se False, conta a partir da inserção.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float | None = None, sliding: bool = True):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.sliding = sliding
+        self._data = OrderedDict()  # key -> [value, timestamp]
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _expired(self, stamp: float, now: float) -> bool:
+        return self.ttl is not None and now - stamp > self.ttl
+
+    def _purge_expired(self, now: float) -> None:
+        # As entradas mais antigas ficam no início do OrderedDict
+        while self._data:
+            key, (_, stamp) = next(iter(self._data.items()))
+            if not self._expired(stamp, now):
+                break
+            del self._data[key]
+            self._expirations += 1
+
+    def _insert(self, key, value, now: float) -> None:
+        self._data[key] = [value, now]
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._misses += 1
+                return default
+            if self._expired(item[1], now):
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            if self.sliding:
+                item[1] = now
+            self._hits += 1
+            return item[0]
+
+    def set(self, key, value) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            self._insert(key, value, now)
+
+    def setdefault(self, key, value):
+        """Insere value se a chave não existir (ou estiver expirada) e retorna o valor vigente."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and not self._expired(item[1], now):
+                self._data.move_to_end(key)
+                item[1] = now if self.sliding else item[1]
+                return item[0]
+            self._insert(key, value, now)
+            return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and not self._expired(item[1], now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
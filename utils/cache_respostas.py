@@ -0,0 +1,216 @@
+"""
+Cache de respostas do chatbot para perguntas repetidas.
+
+- A chave é a pergunta normalizada (minúsculas, sem acentos, sem stopwords, com stemming leve),
+  então "Como me inscrever?" e "como eu me inscrevo" caem na mesma entrada. Interrogativas e
+  negações ficam na chave ("Quando é o hackathon?" não reaproveita "O que é o hackathon?"), e
+  perguntas com menos de MIN_TOKENS termos não passam pelo cache.
+- Perguntas quase iguais são encontradas por MinHash + LSH (bandas) sobre os tokens e bigramas,
+  com similaridade de Jaccard estimada acima do limiar.
+- As chaves levam a versão da base de conhecimento: quando o dados.json muda, as entradas
+  antigas deixam de ser encontradas (e expiram pelo TTL).
+- O armazenamento é plugável: em memória (LRUTTLCache, por processo) ou Redis (compartilhado
+  entre os workers do Gunicorn).
+"""
+
+import sys
+import json
+import hashlib
+import logging
+import threading
+
+from utils.cache import LRUTTLCache
+from utils.texto import STOPWORDS_PERGUNTA, tokenizar
+
+logger = logging.getLogger(__name__)
+
+# MinHash: NUM_PERMUTACOES = BANDAS x LINHAS_POR_BANDA
+NUM_PERMUTACOES = 32
+LINHAS_POR_BANDA = 4
+_PRIMO = (1 << 61) - 1
+_MASCARA = (1 << 64) - 1
+
+# Máximo de chaves guardadas por balde do LSH
+_MAX_POR_BALDE = 16
+
+# Perguntas com menos termos que isso são curtas demais para identificar a intenção ("hackathon?")
+MIN_TOKENS = 2
+
+# Pares de perguntas diferentes que não podem compartilhar a resposta em cache
+PARES_DISTINTOS = (
+    ("O que é o hackathon?", "Quando é o hackathon?"),
+    ("O que é o curso?", "Quando é o curso?"),
+    ("Quem pode participar do programa?", "Como participar do programa?"),
+    ("Onde são as aulas?", "Quando são as aulas?"),
+    ("O curso tem custo?", "O curso não tem custo?"),
+)
+
+
+def _hash64(texto: str) -> int:
+    # Estável entre processos (ao contrário de hash()), para o Redis ser compartilhado
+    return int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# Coeficientes fixos das permutações (a*x + b) mod p, derivados de forma determinística
+_PERMUTACOES = [
+    (_hash64(f"a{i}") % (_PRIMO - 1) + 1, _hash64(f"b{i}") % _PRIMO)
+    for i in range(NUM_PERMUTACOES)
+]
+
+
+def tokens_pergunta(pergunta: str) -> list[str]:
+    """Tokens da chave do cache: como tokenizar(), mas mantendo interrogativas e negações."""
+    return tokenizar(pergunta, stopwords=STOPWORDS_PERGUNTA)
+
+
+def _shingles(tokens: list[str]) -> set[str]:
+    return set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def assinatura_minhash(shingles: set[str]) -> list[int]:
+    valores = [_hash64(s) for s in shingles]
+    return [min(((a * v + b) % _PRIMO) & _MASCARA for v in valores) for a, b in _PERMUTACOES]
+
+
+def similaridade(assinatura_a: list[int], assinatura_b: list[int]) -> float:
+    """Jaccard estimada: fração de posições iguais nas assinaturas."""
+    iguais = sum(1 for x, y in zip(assinatura_a, assinatura_b) if x == y)
+    return iguais / len(assinatura_a)
+
+
+class MemoriaBackend:
+    """Armazenamento em memória do processo (LRU + TTL contado da inserção)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = LRUTTLCache(maxsize=maxsize, ttl=ttl, sliding=False)
+
+    def get(self, chave: str):
+        return self._cache.get(chave)
+
+    def set(self, chave: str, valor) -> None:
+        self._cache.set(chave, valor)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisBackend:
+    """Armazenamento no Redis (valores em JSON com expiração), compartilhado entre processos."""
+
+    def __init__(self, url: str, ttl: float, prefixo: str = "chat_cache:"):
+        import redis  # dependência opcional: só necessária com este backend
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefixo = prefixo
+
+    def get(self, chave: str):
+        valor = self._redis.get(self.prefixo + chave)
+        return json.loads(valor) if valor is not None else None
+
+    def set(self, chave: str, valor) -> None:
+        self._redis.set(self.prefixo + chave, json.dumps(valor, ensure_ascii=False), ex=self.ttl)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "ttl": self.ttl}
+
+
+class CacheRespostas:
+    """Cache de respostas por pergunta normalizada, com casamento de quase-duplicatas (MinHash/LSH)."""
+
+    def __init__(self, backend, versao: str = "", limiar: float = 0.8):
+        self.backend = backend
+        self.versao = versao
+        self.limiar = limiar
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._hits_aproximados = 0
+        self._misses = 0
+
+    def _chave(self, tipo: str, valor: str) -> str:
+        return f"{self.versao}:{tipo}:{valor}"
+
+    @staticmethod
+    def _baldes(assinatura: list[int]) -> list[str]:
+        return [
+            hashlib.blake2b(
+                repr(assinatura[i:i + LINHAS_POR_BANDA]).encode("ascii"), digest_size=8
+            ).hexdigest() + f"-{i}"
+            for i in range(0, NUM_PERMUTACOES, LINHAS_POR_BANDA)
+        ]
+
+    def _contar(self, contador: str) -> None:
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def get(self, pergunta: str) -> str | None:
+        tokens = tokens_pergunta(pergunta)
+        if len(tokens) < MIN_TOKENS:
+            return None
+        try:
+            normalizada = " ".join(tokens)
+            entrada = self.backend.get(self._chave("q", normalizada))
+            if entrada is not None:
+                self._contar("_hits")
+                return entrada["resposta"]
+
+            assinatura = assinatura_minhash(_shingles(tokens))
+            candidatas = set()
+            for balde in self._baldes(assinatura):
+                candidatas.update(self.backend.get(self._chave("b", balde)) or [])
+            for candidata in candidatas:
+                entrada = self.backend.get(self._chave("q", candidata))
+                if entrada is not None and similaridade(assinatura, entrada["assinatura"]) >= self.limiar:
+                    self._contar("_hits_aproximados")
+                    return entrada["resposta"]
+        except Exception as e:
+            logger.warning(f"[Cache] Falha ao ler o cache de respostas: {e}")
+        self._contar("_misses")
+        return None
+
+    def set(self, pergunta: str, resposta: str) -> None:
+        tokens = tokens_pergunta(pergunta)
+        if len(tokens) < MIN_TOKENS or not resposta:
+            return
+        try:
+            normalizada = " ".join(tokens)
+            assinatura = assinatura_minhash(_shingles(tokens))
+            self.backend.set(self._chave("q", normalizada), {"resposta": resposta, "assinatura": assinatura})
+            for balde in self._baldes(assinatura):
+                chave = self._chave("b", balde)
+                membros = self.backend.get(chave) or []
+                if normalizada not in membros:
+                    self.backend.set(chave, (membros + [normalizada])[-_MAX_POR_BALDE:])
+        except Exception as e:
+            logger.warning(f"[Cache] Falha ao gravar no cache de respostas: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.versao,
+                "exact_hits": self._hits,
+                "near_duplicate_hits": self._hits_aproximados,
+                "misses": self._misses,
+                "storage": self.backend.stats(),
+            }
+
+
+def verificar_pares_distintos(pares=PARES_DISTINTOS) -> list[tuple[str, str]]:
+    """Grava a 1ª pergunta de cada par num cache vazio e retorna os pares em que a 2ª a reaproveita."""
+    colisoes = []
+    for original, outra in pares:
+        cache = CacheRespostas(MemoriaBackend(maxsize=16, ttl=60))
+        cache.set(original, f"resposta de: {original}")
+        if cache.get(outra) is not None:
+            colisoes.append((original, outra))
+    return colisoes
+
+
+if __name__ == "__main__":
+    # Verificação de regressão: python -m utils.cache_respostas
+    colisoes = verificar_pares_distintos()
+    for original, outra in colisoes:
+        print(f"❌ '{outra}' reaproveitou a resposta de '{original}'")
+    if not colisoes:
+        print(f"✅ {len(PARES_DISTINTOS)} pares de perguntas distintas com chaves distintas.")
+    sys.exit(1 if colisoes else 0)
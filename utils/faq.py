@@ -0,0 +1,234 @@
+"""
+Respostas rápidas: perguntas frequentes respondidas sem chamar o Gemini.
+
+Cada intenção (uma dúvida do dados.json ou um dos links fixos: inscrição, edital, redes sociais)
+tem frases de exemplo. A pergunta do usuário é comparada com elas por similaridade de cosseno
+entre vetores TF-IDF dos tokens normalizados (utils.texto); acima do limiar, a resposta
+da intenção é devolvida na hora.
+
+Interrogativas e negações ficam nos tokens (STOPWORDS_PERGUNTA). Só são respondidas perguntas com
+pelo menos MIN_TERMOS_CONHECIDOS termos de conteúdo do vocabulário, ou que repitam uma frase de
+exemplo ("e o link?" depende da conversa e fica com o Gemini), e uma pergunta negada só casa com exemplos também negados ("não quero me
+inscrever" nunca recebe o link de inscrição).
+"""
+
+import math
+import threading
+from collections import Counter
+
+from utils.texto import NEGACOES, PALAVRAS_DE_SENTIDO, STOPWORDS_PERGUNTA, stem, tokenizar
+
+LINK_INSCRICAO_PADRAO = "https://www.jovemprogramador.com.br/inscricoes-jovem-programador/#inscrevase"
+
+# Respostas de dúvidas mais curtas que isso (ou que terminam em "?") vieram incompletas do site
+# e ficam com o Gemini, que tem o contexto para completá-las
+FAQ_RESPOSTA_MIN_CARACTERES = 60
+
+# Termos de conteúdo (fora interrogativas e negações) do vocabulário exigidos para responder
+MIN_TERMOS_CONHECIDOS = 2
+
+_TERMOS_DE_SENTIDO = frozenset(stem(palavra) for palavra in PALAVRAS_DE_SENTIDO)
+
+# Perguntas que não podem receber resposta rápida (curtas, vagas ou negadas)
+PERGUNTAS_SEM_RESPOSTA_RAPIDA = (
+    "qual é o link?",
+    "e o link?",
+    "onde encontro?",
+    "onde está?",
+    "Não quero me inscrever",
+    "Não quero ver o edital",
+    "Não tenho Instagram",
+)
+
+# Frases de exemplo das intenções fixas
+_EXEMPLOS_INSCRICAO = (
+    "Como me inscrever?",
+    "Como faço a inscrição?",
+    "Quero me inscrever",
+    "Link da inscrição",
+    "Onde me inscrevo?",
+    "Link para se inscrever no programa",
+    "Como faço para me inscrever no Jovem Programador?",
+    "Inscrições 2026",
+)
+_EXEMPLOS_EDITAL = (
+    "Link do edital",
+    "Onde encontro o edital?",
+    "Qual o edital?",
+    "Quero ver o edital",
+    "Onde está o regulamento?",
+    "Edital 2026",
+)
+_EXEMPLOS_REDES = (
+    "Quais são as redes sociais?",
+    "Redes sociais do programa",
+    "Qual o Instagram?",
+    "Tem Instagram?",
+    "Qual o Facebook?",
+    "Qual o LinkedIn?",
+    "Qual o TikTok?",
+    "Onde sigo o Jovem Programador?",
+)
+
+
+def _vetor_tfidf(tokens: list[str], idf: dict, idf_desconhecido: float) -> dict:
+    """
+    Vetor TF-IDF esparso e normalizado (termo -> peso). Termos fora do vocabulário recebem o
+    maior IDF: entram na norma e derrubam a similaridade ("inscrição no hackathon" não é "inscrição").
+    """
+    pesos = {termo: tf * idf.get(termo, idf_desconhecido) for termo, tf in Counter(tokens).items()}
+    norma = math.sqrt(sum(p * p for p in pesos.values()))
+    if not norma:
+        return {}
+    return {termo: p / norma for termo, p in pesos.items() if p}
+
+
+def _tokens(texto: str) -> list[str]:
+    return tokenizar(texto, stopwords=STOPWORDS_PERGUNTA)
+
+
+def _negada(tokens: list[str]) -> bool:
+    return any(t in NEGACOES for t in tokens)
+
+
+def _cosseno(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(peso * b.get(termo, 0.0) for termo, peso in a.items())
+
+
+class RespostasRapidas:
+    """Casamento de perguntas frequentes por TF-IDF, com limiar de confiança e contadores por intenção."""
+
+    def __init__(self, dados: dict, limiar: float = 0.8):
+        self.limiar = limiar
+        self.intencoes, frases = self._montar_intencoes(dados)  # intenção -> resposta
+
+        exemplos = [(intencao, _tokens(frase)) for intencao, frase in frases]
+        total = len(exemplos)
+        df = Counter(termo for _, tokens in exemplos for termo in set(tokens))
+        self._idf = {termo: math.log((1 + total) / (1 + n)) + 1 for termo, n in df.items()}
+        self._idf_desconhecido = math.log(1 + total) + 1
+        # Conjuntos de tokens das próprias frases de exemplo: repetir um exemplo ("Como me
+        # inscrever?", "Qual o Instagram?") é inequívoco mesmo com um único termo de conteúdo
+        self._exemplos_exatos = {frozenset(tokens) for _, tokens in exemplos}
+        self._vetores = [
+            (intencao, _negada(tokens), _vetor_tfidf(tokens, self._idf, self._idf_desconhecido))
+            for intencao, tokens in exemplos
+        ]
+
+        self._lock = threading.Lock()
+        self._acertos = Counter()
+        self._perdas = 0
+
+    @staticmethod
+    def _montar_intencoes(dados: dict) -> tuple[dict, list]:
+        """Respostas por intenção e a lista de (intenção, frase de exemplo)."""
+        intencoes, exemplos = {}, []
+
+        for pergunta, resposta in (dados.get("duvidas") or {}).items():
+            resposta = (resposta or "").strip()
+            if len(resposta) < FAQ_RESPOSTA_MIN_CARACTERES or resposta.endswith("?"):
+                continue
+            intencao = f"duvida:{pergunta}"
+            intencoes[intencao] = f"{resposta}\n\nFicou com mais alguma dúvida? É só perguntar! 💡"
+            exemplos.append((intencao, pergunta))
+
+        inscricoes = dados.get("inscricoes") or {}
+        link_inscricao = inscricoes.get("link_inscricao") or LINK_INSCRICAO_PADRAO
+        intencoes["inscricao"] = (
+            "Que ótimo que você quer fazer parte do Jovem Programador! 🚀\n\n"
+            "O programa prepara você para o mercado de tecnologia e conecta você com empresas parceiras. 🎓\n\n"
+            f"Para garantir sua vaga, acesse: {link_inscricao}\n\n"
+            "Qualquer dúvida, estou por aqui!"
+        )
+        exemplos.extend(("inscricao", frase) for frase in _EXEMPLOS_INSCRICAO)
+
+        link_edital = inscricoes.get("link_edital")
+        if link_edital:
+            chamada = f"Para ver o edital completo, acesse: {link_edital}"
+        else:
+            chamada = f"As regras e o regulamento estão na página de inscrição. Para ver tudo, acesse: {link_inscricao}"
+        intencoes["edital"] = (
+            "Boa! Ler o edital é o primeiro passo para garantir sua vaga. 🚀\n\n"
+            f"{chamada}\n\n"
+            "Qualquer dúvida, estou por aqui!"
+        )
+        exemplos.extend(("edital", frase) for frase in _EXEMPLOS_EDITAL)
+
+        redes = dados.get("redes_sociais") or {}
+        if redes:
+            lista = "\n".join(f"{nome}: {url}" for nome, url in redes.items())
+            intencoes["redes_sociais"] = (
+                f"Aqui estão os nossos canais oficiais:\n{lista}\n\n"
+                "Siga a gente para não perder nenhuma novidade! 💡"
+            )
+            exemplos.extend(("redes_sociais", frase) for frase in _EXEMPLOS_REDES)
+
+        return intencoes, exemplos
+
+    def classificar(self, pergunta: str) -> tuple[str | None, float]:
+        """
+        Intenção mais parecida com a pergunta e a similaridade (0 a 1). Perguntas com menos de
+        MIN_TERMOS_CONHECIDOS termos de conteúdo conhecidos não são classificadas (None, 0.0),
+        a não ser que repitam uma frase de exemplo.
+        """
+        tokens = _tokens(pergunta)
+        melhor, score = None, 0.0
+        conhecidos = {t for t in tokens if t in self._idf and t not in _TERMOS_DE_SENTIDO}
+        if len(conhecidos) < MIN_TERMOS_CONHECIDOS and frozenset(tokens) not in self._exemplos_exatos:
+            return melhor, score
+        vetor = _vetor_tfidf(tokens, self._idf, self._idf_desconhecido)
+        negada = _negada(tokens)
+        for intencao, exemplo_negado, exemplo in self._vetores:
+            if exemplo_negado != negada:
+                continue
+            similaridade = _cosseno(vetor, exemplo)
+            if similaridade > score:
+                melhor, score = intencao, similaridade
+        return melhor, score
+
+    def responder(self, pergunta: str) -> str | None:
+        """Resposta pronta se a pergunta casar com uma intenção acima do limiar; senão None."""
+        intencao, score = self.classificar(pergunta)
+        with self._lock:
+            if intencao is None or score < self.limiar:
+                self._perdas += 1
+                return None
+            self._acertos[intencao] += 1
+        return self.intencoes[intencao]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold": self.limiar,
+                "intents": len(self.intencoes),
+                "hits": sum(self._acertos.values()),
+                "misses": self._perdas,
+                "hits_by_intent": dict(self._acertos),
+            }
+
+
+def verificar_perguntas_sem_resposta(dados: dict, limiar: float = 0.75, perguntas=PERGUNTAS_SEM_RESPOSTA_RAPIDA) -> list[tuple[str, str, float]]:
+    """Retorna (pergunta, intenção, similaridade) das perguntas que receberiam resposta rápida indevida."""
+    respostas = RespostasRapidas(dados, limiar=limiar)
+    indevidas = []
+    for pergunta in perguntas:
+        intencao, score = respostas.classificar(pergunta)
+        if intencao is not None and score >= limiar:
+            indevidas.append((pergunta, intencao, score))
+    return indevidas
+
+
+if __name__ == "__main__":
+    # Verificação de regressão contra o dados.json: python -m utils.faq [caminho]
+    import sys
+    import json
+
+    with open(sys.argv[1] if len(sys.argv) > 1 else "dados.json", encoding="utf-8") as f:
+        indevidas = verificar_perguntas_sem_resposta(json.load(f))
+    for pergunta, intencao, score in indevidas:
+        print(f"❌ '{pergunta}' recebeu a resposta rápida de '{intencao}' ({score:.2f})")
+    if not indevidas:
+        print(f"✅ {len(PERGUNTAS_SEM_RESPOSTA_RAPIDA)} perguntas vagas ou negadas sem resposta rápida.")
+    sys.exit(1 if indevidas else 0)
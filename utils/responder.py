@@ -1,17 +1,165 @@
 import os
 import json
+import hashlib
+import inspect
+import threading
+import time
+from datetime import timedelta
 import google.generativeai as genai
 from dotenv import load_dotenv
+from utils.cache import LRUTTLCache
+from utils.retrieval import IndiceConhecimento
+from utils.faq import RespostasRapidas
+from utils.cache_respostas import CacheRespostas, MemoriaBackend, RedisBackend
+
+try:
+    from google.api_core import exceptions as _erros_google
+except ImportError:  # dependência do google-generativeai; sem ela nenhum erro é tratado como de modelo
+    _erros_google = None
 
 # Carrega as variáveis de ambiente (como a sua API key) do arquivo .env
 load_dotenv()
 
+MENSAGEM_FALHA = "Humm… não consegui processar agora 😅\nPode tentar reformular sua pergunta sobre o Jovem Programador?"
+
+# Resposta do modelo usada para "fechar" o contexto inicial no histórico das sessões
+CONTEXTO_ACK = "Entendido! Sou o Leo, assistente oficial do Programa Jovem Programador, e vou seguir todas essas regras."
+
+# Pool de sessões por usuário (session_id): limite de tamanho e tempo máximo de inatividade
+CHAT_SESSION_POOL_SIZE = int(os.getenv("CHAT_SESSION_POOL_SIZE", "500"))
+CHAT_SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+
+# Modo de prompt:
+# - "chat" (padrão): cada sessão é um ChatSession com o contexto completo no histórico.
+# - "stateless": o contexto é anexado uma única vez ao modelo (system instruction / cached content)
+#   e cada requisição envia só uma janela dos últimos turnos da sessão + a nova mensagem.
+#   Exige um SDK com system_instruction ou cached content; sem isso (ex.: google-generativeai 0.3.x)
+#   o contexto iria inteiro em toda requisição, então o Chatbot volta para o modo "chat".
+# Nos dois modos o histórico enviado fica limitado aos últimos CHAT_HISTORY_MAX_TURNS turnos e a
+# CHAT_HISTORY_TOKEN_BUDGET tokens (no modo chat, o ChatSession é podado após cada turno).
+CHAT_PROMPT_MODE = os.getenv("CHAT_PROMPT_MODE", "chat").strip().lower()
+CHAT_HISTORY_MAX_TURNS = int(os.getenv("CHAT_HISTORY_MAX_TURNS", "6"))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+# > 0 tenta usar cached content do Gemini (SDK com genai.caching) para o contexto
+CHAT_CONTEXT_CACHE_TTL_MINUTES = int(os.getenv("CHAT_CONTEXT_CACHE_TTL_MINUTES", "0"))
+
+# Recuperação de trechos: o contexto fixo leva só as regras e os links essenciais, e cada pergunta
+# recebe os CHAT_RETRIEVAL_TOP_K trechos mais relevantes do dados.json (BM25, e opcionalmente embeddings)
+CHAT_RETRIEVAL = os.getenv("CHAT_RETRIEVAL", "true").lower() == "true"
+CHAT_RETRIEVAL_TOP_K = int(os.getenv("CHAT_RETRIEVAL_TOP_K", "6"))
+CHAT_RETRIEVAL_EMBEDDINGS = os.getenv("CHAT_RETRIEVAL_EMBEDDINGS", "false").lower() == "true"
+CHAT_EMBEDDING_MODEL = os.getenv("CHAT_EMBEDDING_MODEL", "models/embedding-001")
+
+# Respostas rápidas: perguntas frequentes (dúvidas, inscrição, edital, redes sociais) com similaridade
+# acima do limiar são respondidas na hora, sem chamar o Gemini
+CHAT_FAQ_FAST_PATH = os.getenv("CHAT_FAQ_FAST_PATH", "true").lower() == "true"
+CHAT_FAQ_THRESHOLD = float(os.getenv("CHAT_FAQ_THRESHOLD", "0.75"))
+
+# Cache de respostas para perguntas repetidas no início de uma conversa (sem histórico).
+# Com CHAT_RESPONSE_CACHE_REDIS_URL o cache fica no Redis e é compartilhado entre os workers.
+CHAT_RESPONSE_CACHE = os.getenv("CHAT_RESPONSE_CACHE", "true").lower() == "true"
+CHAT_RESPONSE_CACHE_SIZE = int(os.getenv("CHAT_RESPONSE_CACHE_SIZE", "2000"))
+CHAT_RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("CHAT_RESPONSE_CACHE_TTL_SECONDS", "3600"))
+CHAT_RESPONSE_CACHE_SIMILARITY = float(os.getenv("CHAT_RESPONSE_CACHE_SIMILARITY", "0.8"))
+CHAT_RESPONSE_CACHE_REDIS_URL = os.getenv("CHAT_RESPONSE_CACHE_REDIS_URL", "")
+
+# Base de conhecimento gerada pelo scraper (utils/scraper.py)
+ARQUIVO_DADOS = "dados.json"
+
+
+# Erros que indicam problema no modelo ou na configuração (modelo inexistente, chave sem permissão),
+# e não numa requisição: só eles justificam reinicializar o modelo compartilhado por todas as sessões
+_ERROS_DE_MODELO = (
+    (
+        _erros_google.NotFound,
+        _erros_google.PermissionDenied,
+        _erros_google.Unauthenticated,
+        _erros_google.FailedPrecondition,
+    )
+    if _erros_google is not None
+    else ()
+)
+
+
+def _sdk_anexa_contexto() -> bool:
+    """True se o SDK instalado consegue anexar o contexto ao modelo (system_instruction ou cached content)."""
+    if "system_instruction" in inspect.signature(genai.GenerativeModel).parameters:
+        return True
+    return getattr(genai, "caching", None) is not None and CHAT_CONTEXT_CACHE_TTL_MINUTES > 0
+
+
+def _texto_partes(partes) -> str:
+    """Texto de uma lista de parts do histórico, seja em dicts/strings ou em objetos do SDK."""
+    textos = []
+    for parte in partes or []:
+        if isinstance(parte, str):
+            textos.append(parte)
+        elif isinstance(parte, dict):
+            textos.append(parte.get("text") or "")
+        else:
+            textos.append(getattr(parte, "text", "") or "")
+    return "\n".join(textos)
+
+
+def _estimar_tokens(texto: str) -> int:
+    """Estimativa barata (~4 caracteres por token), sem chamada de rede ao count_tokens."""
+    return len(texto) // 4 + 1
+
+
+class _SessaoChat:
+    """
+    Sessão de um único usuário, com lock para serializar os turnos.
+    No modo "chat" guarda o ChatSession; no modo "stateless" guarda só os turnos recentes.
+    """
+
+    def __init__(self, chat=None, turnos=None):
+        self.chat = chat
+        self.turnos = turnos if turnos is not None else []
+        self.lock = threading.Lock()
+
+
+def _hash_dados(dados: dict) -> str:
+    """Versão de conteúdo do dados.json (muda quando qualquer informação muda)."""
+    return hashlib.sha1(json.dumps(dados, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class _BaseConhecimento:
+    """
+    Tudo o que é derivado do dados.json: os dados, o contexto inicial, o índice de trechos,
+    as respostas rápidas e o cache de respostas. É montada inteira fora do caminho das
+    requisições e trocada no Chatbot com uma única atribuição (ver recarregar_conhecimento).
+    """
+
+    def __init__(self, versao: int, dados: dict, contexto_inicial: str, indice, respostas_rapidas, cache_respostas):
+        self.versao = versao
+        self.hash = _hash_dados(dados)
+        self.carregada_em = time.time()
+        self.dados = dados
+        self.contexto_inicial = contexto_inicial
+        self.indice = indice
+        self.respostas_rapidas = respostas_rapidas
+        self.cache_respostas = cache_respostas
+
 
 class Chatbot:
     # O método __init__ é o construtor da classe. É executado uma única vez quando o chatbot é criado.
-    def __init__(self):
+    # history_loader: função opcional session_id -> lista de mensagens persistidas
+    # ({"role": "user"|"bot", "content": str}), usada para reconstruir sessões despejadas do pool.
+    def __init__(self, history_loader=None):
         print("🤖 Inicializando o Chatbot com Gemini...")
 
+        self.history_loader = history_loader
+        self.modo_prompt = "stateless" if CHAT_PROMPT_MODE == "stateless" else "chat"
+        if self.modo_prompt == "stateless" and not _sdk_anexa_contexto():
+            print(
+                f"[Gemini] ⚠️ CHAT_PROMPT_MODE=stateless ignorado: o google-generativeai "
+                f"{getattr(genai, '__version__', '?')} não tem system_instruction nem cached content; usando o modo chat"
+            )
+            self.modo_prompt = "chat"
+        self.modelo_stateless = None
+        self._sessoes = LRUTTLCache(maxsize=CHAT_SESSION_POOL_SIZE, ttl=CHAT_SESSION_TTL_SECONDS)
+        self._lock_modelo = threading.Lock()
+
         # 1. Configura a chave da API do Google Gemini de forma segura a partir do arquivo .env
         load_dotenv()
         api_key = os.getenv("GEMINI_API_KEY")
@@ -21,15 +169,18 @@ class Chatbot:
 
         # 2. Carrega toda a base de conhecimento do arquivo dados.json para a memória (self.dados)
         try:
-            with open("dados.json", "r", encoding="utf-8") as f:
-                self.dados = json.load(f)
+            with open(ARQUIVO_DADOS, "r", encoding="utf-8") as f:
+                dados = json.load(f)
         except FileNotFoundError:
             raise FileNotFoundError(
                 "Arquivo 'dados.json' não encontrado! Execute o scraper.py primeiro."
             )
 
-        # 3. Prepara o "super prompt" inicial com todas as regras e dados
-        self.contexto_inicial = self._criar_contexto()
+        # 3. Índice de trechos para a recuperação por pergunta e o "super prompt" inicial com as regras
+        #    (com a recuperação ativa, o prompt inicial não leva as seções longas do dados.json).
+        #    Tudo fica numa _BaseConhecimento, que pode ser trocada depois sem reiniciar o processo.
+        self._lock_conhecimento = threading.Lock()
+        self._conhecimento = self._montar_conhecimento(dados, versao=1)
 
         # 4. Logar versão do SDK e tentar inicializar dinamicamente um modelo suportado
         sdk_version = getattr(genai, "__version__", "desconhecida")
@@ -83,51 +234,132 @@ class Chatbot:
 
         print(f"[Gemini] Modelo selecionado: {self.model_name}")
 
-        # 5. Envia o contexto inicial para a IA para "doutriná-la" sobre como se comportar
-        sent = False
-        try:
-            self.chat_session.send_message(self.contexto_inicial)
-            sent = True
-        except Exception as e:
-            print("[Gemini] Falha ao enviar contexto com", getattr(self, 'model_name', None), "->", e)
-            # Tentar fallback para outro modelo suportado
-            for nm in self.available_models_supported:
-                # Evitar tentar o mesmo modelo novamente
-                if nm == getattr(self, 'model_name', None):
-                    continue
-                cleaned = nm
-                if cleaned.startswith("models/"):
-                    cleaned = cleaned[len("models/"):]
-                if self._try_model(cleaned):
-                    try:
-                        self.chat_session.send_message(self.contexto_inicial)
-                        sent = True
-                        break
-                    except Exception as e2:
-                        print("[Gemini] Contexto falhou com", getattr(self, 'model_name', None), "->", e2)
+        # 5. Envia o contexto inicial para a IA para "doutriná-la" sobre como se comportar.
+        #    No modo stateless o contexto já está anexado ao modelo, então não há envio inicial.
+        if self.modo_prompt == "stateless":
+            print("[Gemini] Modo stateless: sem envio inicial do contexto")
+        else:
+            sent = False
+            try:
+                self.chat_session.send_message(self.contexto_inicial)
+                sent = True
+            except Exception as e:
+                print("[Gemini] Falha ao enviar contexto com", getattr(self, 'model_name', None), "->", e)
+                # Tentar fallback para outro modelo suportado
+                for nm in self.available_models_supported:
+                    # Evitar tentar o mesmo modelo novamente
+                    if nm == getattr(self, 'model_name', None):
                         continue
+                    cleaned = nm
+                    if cleaned.startswith("models/"):
+                        cleaned = cleaned[len("models/"):]
+                    if self._try_model(cleaned):
+                        try:
+                            self.chat_session.send_message(self.contexto_inicial)
+                            sent = True
+                            break
+                        except Exception as e2:
+                            print("[Gemini] Contexto falhou com", getattr(self, 'model_name', None), "->", e2)
+                            continue
 
-        if not sent:
-            raise RuntimeError("Nenhum modelo Gemini disponível para envio de contexto inicial")
+            if not sent:
+                raise RuntimeError("Nenhum modelo Gemini disponível para envio de contexto inicial")
 
         print("✅ Chatbot pronto e online!")
 
+    # A base de conhecimento atual. Cada leitura pega a base inteira vigente; uma troca
+    # (recarregar_conhecimento) nunca deixa uma requisição ver uma base pela metade.
+    @property
+    def dados(self) -> dict:
+        return self._conhecimento.dados
+
+    @property
+    def contexto_inicial(self) -> str:
+        return self._conhecimento.contexto_inicial
+
+    @property
+    def indice(self) -> IndiceConhecimento | None:
+        return self._conhecimento.indice
+
+    @property
+    def respostas_rapidas(self) -> RespostasRapidas | None:
+        return self._conhecimento.respostas_rapidas
+
+    @property
+    def cache_respostas(self) -> CacheRespostas | None:
+        return self._conhecimento.cache_respostas
+
+    def _montar_conhecimento(self, dados: dict, versao: int) -> _BaseConhecimento:
+        """Monta a base de conhecimento (contexto, índice, respostas rápidas e cache) a partir dos dados."""
+        indice = self._criar_indice(dados) if CHAT_RETRIEVAL else None
+        return _BaseConhecimento(
+            versao=versao,
+            dados=dados,
+            contexto_inicial=self._criar_contexto(dados, com_recuperacao=indice is not None),
+            indice=indice,
+            respostas_rapidas=RespostasRapidas(dados, limiar=CHAT_FAQ_THRESHOLD) if CHAT_FAQ_FAST_PATH else None,
+            cache_respostas=self._criar_cache_respostas(_hash_dados(dados)) if CHAT_RESPONSE_CACHE else None,
+        )
+
+    def recarregar_conhecimento(self, dados: dict | None = None) -> bool:
+        """
+        Recarrega a base de conhecimento (do dados.json, se `dados` não for informado) sem parar o
+        chatbot: a nova base é montada por inteiro na thread que chamou e só então substitui a
+        atual, com a versão incrementada. As sessões abertas continuam e passam a receber os
+        trechos novos; no modo stateless o modelo é recriado com o novo contexto.
+
+        Retorna True se a base foi trocada e False se o conteúdo não mudou ou se a carga falhou
+        (nesse caso a base atual continua valendo).
+        """
+        with self._lock_conhecimento:
+            try:
+                if dados is None:
+                    with open(ARQUIVO_DADOS, "r", encoding="utf-8") as f:
+                        dados = json.load(f)
+                atual = self._conhecimento
+                if _hash_dados(dados) == atual.hash:
+                    return False
+                inicio = time.perf_counter()
+                nova = self._montar_conhecimento(dados, versao=atual.versao + 1)
+            except Exception as e:
+                print("[Conhecimento] Falha ao recarregar a base; mantendo a versão atual ->", e)
+                return False
+
+            self._conhecimento = nova
+            if self.modo_prompt == "stateless" and getattr(self, "model_name", None):
+                self._preparar_modelo_stateless()
+            print(
+                f"[Conhecimento] Base v{nova.versao} ({nova.hash}) no ar "
+                f"em {time.perf_counter() - inicio:.2f}s (antes: v{atual.versao}, {atual.hash})"
+            )
+            return True
+
+    def knowledge_stats(self) -> dict:
+        """Versão da base de conhecimento em uso."""
+        base = self._conhecimento
+        return {
+            "version": base.versao,
+            "hash": base.hash,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(base.carregada_em)),
+            "chunks": len(base.indice.trechos) if base.indice is not None else None,
+        }
+
     # Este método privado é o coração da inteligência, responsável por montar o prompt.
-    def _criar_contexto(self):
+    def _criar_contexto(self, dados: dict, com_recuperacao: bool = False):
 
-        # Para cada seção, ele pega os dados do self.dados e formata em um texto legível.
+        # Para cada seção, ele pega os dados do dados e formata em um texto legível.
         # Define um texto padrão caso a seção não seja encontrada no JSON.
         
         # Formata a seção de dúvidas
         duvidas_texto = "".join(
             [
                 f"• {pergunta}: {resposta}\n"
-                for pergunta, resposta in self.dados.get("duvidas", {}).items()
+                for pergunta, resposta in dados.get("duvidas", {}).items()
             ]
         )
 
         # Formata a seção 'notícias'
-        todas_as_noticias = self.dados.get("noticias", [])
+        todas_as_noticias = dados.get("noticias", [])
         # OTIMIZAÇÃO: Pega apenas as 5 notícias mais recentes para não sobrecarregar a IA
         noticias_para_contexto = todas_as_noticias[:5]
 
@@ -141,7 +373,7 @@ class Chatbot:
             )
 
         # Formata a seção 'Como ser professor'
-        prof_info = self.dados.get("ser_professor", {})
+        prof_info = dados.get("ser_professor", {})
         prof_texto = "Informação sobre como se tornar professor não foi encontrada."
         if prof_info and prof_info.get("vagas_abertas"):
             vagas = prof_info.get("vagas_abertas", {})
@@ -153,7 +385,7 @@ class Chatbot:
             )
 
         # Formata a seção 'Hackathon' de forma robusta, adicionando as partes que encontrar
-        hackathon_info = self.dados.get("hackathon", {})
+        hackathon_info = dados.get("hackathon", {})
         hackathon_texto = "Informação sobre o Hackathon não foi encontrada."
         if hackathon_info:
             partes_texto = []
@@ -174,7 +406,7 @@ class Chatbot:
                 hackathon_texto = "\n\n".join(partes_texto)
 
         # Formata a seção 'Redes Sociais'
-        redes_info = self.dados.get("redes_sociais", {})
+        redes_info = dados.get("redes_sociais", {})
         redes_texto = "Não encontrei informações sobre as redes sociais oficiais do programa."
         if redes_info:
             # Formata de forma simples e direta, uma rede por linha com nome e URL completa
@@ -186,25 +418,93 @@ class Chatbot:
 
         # Formata as listas de Apoiadores, Patrocinadores e Parceiros como texto corrido
         apoiadores_texto = "Não encontrei a lista de empresas apoiadoras."
-        if self.dados.get("apoiadores"):
-            apoiadores_texto = "O programa conta com o apoio de: " + ", ".join([apoiador.get("nome", "") for apoiador in self.dados.get("apoiadores")]) + "."
+        if dados.get("apoiadores"):
+            apoiadores_texto = "O programa conta com o apoio de: " + ", ".join([apoiador.get("nome", "") for apoiador in dados.get("apoiadores")]) + "."
         
         patrocinadores_texto = "Não encontrei a lista de empresas patrocinadoras."
-        if self.dados.get("patrocinadores"):
-            patrocinadores_texto = "O programa é patrocinado por: " + ", ".join([p.get("nome", "") for p in self.dados.get("patrocinadores")]) + "."
+        if dados.get("patrocinadores"):
+            patrocinadores_texto = "O programa é patrocinado por: " + ", ".join([p.get("nome", "") for p in dados.get("patrocinadores")]) + "."
 
         parceiros_texto = "Não encontrei a lista de parceiros do programa."
-        if self.dados.get("parceiros"):
-            parceiros_texto = "Os parceiros do programa são: " + ", ".join([p.get("nome", "") for p in self.dados.get("parceiros")]) + "."
+        if dados.get("parceiros"):
+            parceiros_texto = "Os parceiros do programa são: " + ", ".join([p.get("nome", "") for p in dados.get("parceiros")]) + "."
             
         # Formata a seção 'Links de Acesso'
-        acesso_info = self.dados.get("links_acesso", {})
+        acesso_info = dados.get("links_acesso", {})
         acesso_texto = "Não encontrei os links para as áreas de acesso."
         if acesso_info:
             link_aluno = acesso_info.get("aluno", "Link não disponível")
             link_empresa = acesso_info.get("empresa", "Link não disponível")
             acesso_texto = f"Existem portais de acesso específicos. O link para a Área do Aluno é: {link_aluno}. O link para a Área da Empresa é: {link_empresa}."
 
+        # Informações oficiais: completas no prompt, ou só os links essenciais quando os demais
+        # trechos são recuperados a cada pergunta (ver _compor_mensagem)
+        if com_recuperacao:
+            informacoes = f"""--- INFORMAÇÕES OFICIAIS ---
+
+        --- INSCRIÇÕES E EDITAIS ---
+        Link para Inscrição: {dados.get("inscricoes", {}).get("link_inscricao") or "Consulte a página oficial de inscrições."}
+        Link do Edital/Regulamento: {dados.get("inscricoes", {}).get("link_edital") or "Consulte o regulamento na página de inscrição."}
+        Se o link do edital não existir, entregue o Link para Inscrição com CTA e informe que as regras estão lá.
+
+        REDES SOCIAIS (COPIE AS URLs EXATAMENTE COMO ESTÃO AQUI - NÃO OMITA AS URLs):
+        {redes_texto}
+
+        REGRA ABSOLUTA: Ao responder sobre redes sociais, você DEVE copiar EXATAMENTE o formato acima, incluindo TODAS as URLs completas. 
+        NÃO crie duas listas - uma com nomes e outra com links. Use APENAS UMA lista com nomes E URLs juntos.
+
+        PORTAIS DE ACESSO:
+        {acesso_texto}
+
+        TRECHOS DA BASE OFICIAL:
+        Junto com cada pergunta você recebe, no bloco "TRECHOS DA BASE OFICIAL", os trechos mais relevantes
+        do conteúdo oficial (sobre o programa, dúvidas frequentes, notícias, hackathon, professores, cidades,
+        apoiadores, patrocinadores e parceiros). Eles fazem parte das informações oficiais: responda com base
+        neles e nas informações acima, seguindo a mesma regra de blindagem."""
+        else:
+            informacoes = f"""--- INFORMAÇÕES OFICIAIS ---
+
+        SOBRE O PROGRAMA:
+        {dados.get("sobre", "Informação não disponível.")}
+
+        --- INSCRIÇÕES E EDITAIS ---
+        {dados.get("inscricoes", {}).get("texto_geral", "Consulte o site.")}
+        Link para Inscrição: {dados.get("inscricoes", {}).get("link_inscricao") or "Consulte a página oficial de inscrições."}
+        Link do Edital/Regulamento: {dados.get("inscricoes", {}).get("link_edital") or "Consulte o regulamento na página de inscrição."}
+        Se o link do edital não existir, entregue o Link para Inscrição com CTA e informe que as regras estão lá.
+
+        DÚVIDAS FREQUENTES:
+        {duvidas_texto}
+
+        ÚLTIMAS NOTÍCIAS:
+        {noticias_texto}
+
+        COMO SER PROFESSOR:
+        {prof_texto}
+
+        HACKATHON:
+        {hackathon_texto}
+
+        REDES SOCIAIS (COPIE AS URLs EXATAMENTE COMO ESTÃO AQUI - NÃO OMITA AS URLs):
+        {redes_texto}
+        
+        REGRA ABSOLUTA: Ao responder sobre redes sociais, você DEVE copiar EXATAMENTE o formato acima, incluindo TODAS as URLs completas. 
+        NÃO liste apenas "Facebook:", "Instagram:" sem as URLs. SEMPRE inclua: "Facebook: https://...", "Instagram: https://...", etc.
+        NÃO crie duas listas - uma com nomes e outra com links. Use APENAS UMA lista com nomes E URLs juntos.
+        NÃO liste os nomes das redes em um lugar e os links em outro. TUDO deve estar junto na mesma lista.
+
+        APOIADORES:
+        {apoiadores_texto}
+
+        PATROCINADORES:
+        {patrocinadores_texto}
+
+        PARCEIROS:
+        {parceiros_texto}
+
+        PORTAIS DE ACESSO:
+        {acesso_texto}"""
+
         # A montagem do PROMPT FINAL que define todo o comportamento do chatbot
         contexto = f"""
         Você é Leo, o assistente oficial do Programa Jovem Programador.
@@ -310,51 +610,87 @@ class Chatbot:
 
         Concisão: responda em 3 a 5 linhas, a menos que o usuário peça detalhes técnicos.
 
-        --- INFORMAÇÕES OFICIAIS ---
-
-        SOBRE O PROGRAMA:
-        {self.dados.get("sobre", "Informação não disponível.")}
+        {informacoes}
 
-        --- INSCRIÇÕES E EDITAIS ---
-        {self.dados.get("inscricoes", {}).get("texto_geral", "Consulte o site.")}
-        Link para Inscrição: {self.dados.get("inscricoes", {}).get("link_inscricao") or "Consulte a página oficial de inscrições."}
-        Link do Edital/Regulamento: {self.dados.get("inscricoes", {}).get("link_edital") or "Consulte o regulamento na página de inscrição."}
-        Se o link do edital não existir, entregue o Link para Inscrição com CTA e informe que as regras estão lá.
-
-        DÚVIDAS FREQUENTES:
-        {duvidas_texto}
-
-        ÚLTIMAS NOTÍCIAS:
-        {noticias_texto}
-
-        COMO SER PROFESSOR:
-        {prof_texto}
-
-        HACKATHON:
-        {hackathon_texto}
+        """
+        return contexto
 
-        REDES SOCIAIS (COPIE AS URLs EXATAMENTE COMO ESTÃO AQUI - NÃO OMITA AS URLs):
-        {redes_texto}
-        
-        REGRA ABSOLUTA: Ao responder sobre redes sociais, você DEVE copiar EXATAMENTE o formato acima, incluindo TODAS as URLs completas. 
-        NÃO liste apenas "Facebook:", "Instagram:" sem as URLs. SEMPRE inclua: "Facebook: https://...", "Instagram: https://...", etc.
-        NÃO crie duas listas - uma com nomes e outra com links. Use APENAS UMA lista com nomes E URLs juntos.
-        NÃO liste os nomes das redes em um lugar e os links em outro. TUDO deve estar junto na mesma lista.
+    def _criar_indice(self, dados: dict) -> IndiceConhecimento:
+        """Índice de trechos do dados.json (BM25; com embeddings do Gemini se habilitado)."""
+        embed_fn = None
+        if CHAT_RETRIEVAL_EMBEDDINGS:
+            def embed_fn(textos, task_type):
+                vetores = []
+                for i in range(0, len(textos), 100):
+                    resp = genai.embed_content(model=CHAT_EMBEDDING_MODEL, content=textos[i:i + 100], task_type=task_type)
+                    vetores.extend(resp["embedding"])
+                return vetores
 
-        APOIADORES:
-        {apoiadores_texto}
+        indice = IndiceConhecimento(dados, embed_fn=embed_fn)
+        print(f"[Retrieval] {len(indice.trechos)} trechos indexados"
+              + (" (BM25 + embeddings)" if indice.vetorial is not None else " (BM25)"))
+        return indice
 
-        PATROCINADORES:
-        {patrocinadores_texto}
+    def _criar_cache_respostas(self, versao: str) -> CacheRespostas | None:
+        """Cache de respostas com a versão do dados.json nas chaves (dados novos não reaproveitam respostas antigas)."""
+        backend = None
+        if CHAT_RESPONSE_CACHE_REDIS_URL:
+            try:
+                backend = RedisBackend(CHAT_RESPONSE_CACHE_REDIS_URL, ttl=CHAT_RESPONSE_CACHE_TTL_SECONDS)
+            except Exception as e:
+                print("[Cache] Redis indisponível para o cache de respostas, usando memória ->", e)
+        if backend is None:
+            backend = MemoriaBackend(maxsize=CHAT_RESPONSE_CACHE_SIZE, ttl=CHAT_RESPONSE_CACHE_TTL_SECONDS)
+        return CacheRespostas(backend, versao=versao, limiar=CHAT_RESPONSE_CACHE_SIMILARITY)
 
-        PARCEIROS:
-        {parceiros_texto}
+    def _compor_mensagem(self, pergunta: str) -> str:
+        """Mensagem enviada ao modelo: a pergunta, precedida dos trechos relevantes (se houver índice)."""
+        composed = f"Usuário: {pergunta}"
+        if self.indice is None:
+            return composed
+        trechos = self.indice.buscar(pergunta, CHAT_RETRIEVAL_TOP_K)
+        if not trechos:
+            return composed
+        return f"TRECHOS DA BASE OFICIAL:\n{self.indice.formatar(trechos)}\n\n{composed}"
 
-        PORTAIS DE ACESSO:
-        {acesso_texto}
+    @staticmethod
+    def _compactar_historico(chat, pergunta: str) -> None:
+        """
+        Troca, no histórico do ChatSession, a última mensagem enviada (trechos + pergunta) só pela
+        pergunta, para os trechos não se acumularem nos próximos turnos.
+        """
+        try:
+            historico = list(chat.history)
+            for i in range(len(historico) - 1, -1, -1):
+                item = historico[i]
+                role = item.get("role") if isinstance(item, dict) else getattr(item, "role", None)
+                if role == "user":
+                    historico[i] = {"role": "user", "parts": [f"Usuário: {pergunta}"]}
+                    chat.history = historico
+                    break
+        except Exception as e:
+            print("[Gemini] Não foi possível compactar o histórico ->", e)
 
+    def _podar_historico(self, chat) -> None:
         """
-        return contexto
+        Mantém no histórico do ChatSession o contexto inicial (os 2 primeiros itens) e só a janela
+        dos turnos mais recentes (_janela_historico), para o custo por mensagem não crescer a cada turno.
+        """
+        try:
+            historico = list(chat.history)
+            base_len = len(self._historico_base())
+            turnos = []
+            for item in historico[base_len:]:
+                if isinstance(item, dict):
+                    role, partes = item.get("role"), item.get("parts")
+                else:
+                    role, partes = getattr(item, "role", None), getattr(item, "parts", None)
+                turnos.append({"role": role, "parts": [_texto_partes(partes)]})
+            janela = self._janela_historico(turnos)
+            if len(janela) < len(turnos):
+                chat.history = historico[:base_len] + janela
+        except Exception as e:
+            print("[Gemini] Não foi possível podar o histórico ->", e)
 
     def _try_model(self, name: str) -> bool:
         try:
@@ -362,12 +698,230 @@ class Chatbot:
             self.model = genai.GenerativeModel(n)
             self.chat_session = self.model.start_chat(history=[])
             self.model_name = n
+            if self.modo_prompt == "stateless":
+                self._preparar_modelo_stateless()
             print("[Gemini] Modelo inicializado com:", n)
             return True
         except Exception as e:
             print("[Gemini] Falha com", name, "->", e)
             return False
 
+    def _preparar_modelo_stateless(self) -> None:
+        """
+        Cria o modelo do modo stateless com o contexto anexado uma única vez:
+        1) cached content (genai.caching e CHAT_CONTEXT_CACHE_TTL_MINUTES > 0);
+        2) system_instruction nativo do GenerativeModel.
+        O modo só é ativado quando o SDK suporta um dos dois (ver _sdk_anexa_contexto).
+        """
+        # Monta tudo antes de atribuir: numa recarga da base, as requisições seguem com o
+        # modelo anterior até a troca
+        modelo = None
+
+        caching = getattr(genai, "caching", None)
+        if caching is not None and CHAT_CONTEXT_CACHE_TTL_MINUTES > 0:
+            try:
+                cache = caching.CachedContent.create(
+                    model=self.model_name,
+                    system_instruction=self.contexto_inicial,
+                    ttl=timedelta(minutes=CHAT_CONTEXT_CACHE_TTL_MINUTES),
+                )
+                modelo = genai.GenerativeModel.from_cached_content(cached_content=cache)
+                print("[Gemini] Contexto anexado via cached content:", getattr(cache, "name", ""))
+            except Exception as e:
+                print("[Gemini] Cached content indisponível, usando system instruction ->", e)
+
+        if modelo is None:
+            if "system_instruction" not in inspect.signature(genai.GenerativeModel).parameters:
+                raise RuntimeError("SDK sem system_instruction para anexar o contexto ao modelo")
+            modelo = genai.GenerativeModel(self.model_name, system_instruction=self.contexto_inicial)
+
+        self.modelo_stateless = modelo
+
+    def _historico_base(self) -> list:
+        """Histórico inicial de toda sessão: o contexto completo já "respondido" pelo modelo."""
+        return [
+            {"role": "user", "parts": [self.contexto_inicial]},
+            {"role": "model", "parts": [CONTEXTO_ACK]},
+        ]
+
+    def _montar_historico(self, session_id: str, incluir_contexto: bool = True) -> list:
+        """
+        Monta o histórico de uma sessão a partir das mensagens persistidas (se houver loader).
+        Mensagens consecutivas do mesmo papel são agrupadas, pois o Gemini exige alternância
+        user/model, e o histórico sempre termina com uma fala do modelo.
+        """
+        historico = self._historico_base() if incluir_contexto else []
+        if not self.history_loader:
+            return historico
+
+        try:
+            mensagens = self.history_loader(session_id) or []
+        except Exception as e:
+            print(f"[Gemini] Falha ao carregar histórico da sessão {session_id}: {e}")
+            mensagens = []
+
+        for msg in mensagens:
+            content = msg.get("content")
+            if not content:
+                continue
+            role = "user" if msg.get("role") == "user" else "model"
+            texto = f"Usuário: {content}" if role == "user" else content
+            if historico and historico[-1]["role"] == role:
+                historico[-1]["parts"][0] += "\n\n" + texto
+            else:
+                historico.append({"role": role, "parts": [texto]})
+
+        # A pergunta atual (ou um turno sem resposta) não pode ficar pendurada no fim
+        while historico and historico[-1]["role"] == "user":
+            historico.pop()
+        return historico
+
+    def _obter_sessao(self, session_id: str) -> _SessaoChat:
+        """Retorna a sessão do usuário no pool, reconstruindo-a se foi despejada ou nunca existiu."""
+        sessao = self._sessoes.get(session_id)
+        if sessao is None:
+            if self.modo_prompt == "stateless":
+                nova = _SessaoChat(turnos=self._montar_historico(session_id, incluir_contexto=False))
+            else:
+                historico = self._montar_historico(session_id)
+                base_len = len(self._historico_base())
+                historico = historico[:base_len] + self._janela_historico(historico[base_len:])
+                nova = _SessaoChat(chat=self.model.start_chat(history=historico))
+            sessao = self._sessoes.setdefault(session_id, nova)
+        return sessao
+
+    def _janela_historico(self, turnos: list) -> list:
+        """
+        Seleciona os turnos mais recentes que cabem em CHAT_HISTORY_MAX_TURNS e no
+        orçamento de tokens, começando sempre por uma fala do usuário.
+        """
+        janela = []
+        orcamento = CHAT_HISTORY_TOKEN_BUDGET
+        for turno in reversed(turnos[-2 * CHAT_HISTORY_MAX_TURNS:]):
+            custo = _estimar_tokens(turno["parts"][0])
+            if custo > orcamento:
+                break
+            orcamento -= custo
+            janela.append({"role": turno["role"], "parts": list(turno["parts"])})
+        janela.reverse()
+        while janela and janela[0]["role"] != "user":
+            janela.pop(0)
+        return janela
+
+    def _enviar(self, sessao: _SessaoChat, pergunta: str, stream: bool = False):
+        """
+        Envia a pergunta (com os trechos recuperados) pela sessão e retorna a resposta do SDK.
+        No modo stateless vai só a janela de histórico + a nova mensagem; o contexto já está no modelo.
+        Depois de ler o texto, chame _concluir_envio.
+        """
+        composed = self._compor_mensagem(pergunta)
+        if sessao.chat is not None:
+            return sessao.chat.send_message(composed, stream=stream)
+
+        contents = self._janela_historico(sessao.turnos)
+        contents.append({"role": "user", "parts": [composed]})
+        return self.modelo_stateless.generate_content(contents, stream=stream)
+
+    def _concluir_envio(self, sessao: _SessaoChat, pergunta: str, text) -> None:
+        """Atualiza o histórico da sessão após a resposta; nele fica só a pergunta, sem os trechos."""
+        if sessao.chat is None:
+            if isinstance(text, str) and text:
+                self._registrar_turno(sessao, pergunta, text)
+            return
+        if self.indice is not None:
+            self._compactar_historico(sessao.chat, pergunta)
+        self._podar_historico(sessao.chat)
+
+    def _resposta_rapida(self, pergunta: str, session_id: str | None) -> str | None:
+        """
+        Resposta pronta para perguntas frequentes, sem chamada ao Gemini. Só vale para a primeira
+        pergunta da sessão: no meio da conversa ("e o link?") a pergunta depende dos turnos anteriores.
+        O turno é anotado no histórico da sessão para o modelo ter o contexto nas próximas perguntas.
+        """
+        if self.respostas_rapidas is None:
+            return None
+
+        if not session_id:
+            chat = getattr(self, "chat_session", None)
+            sessao = _SessaoChat(chat=chat) if chat is not None else None
+        else:
+            try:
+                sessao = self._obter_sessao(session_id)
+            except Exception as e:
+                print(f"[FAQ] Falha ao obter a sessão {session_id}: {e}")
+                return None
+        if sessao is None:
+            return self.respostas_rapidas.responder(pergunta)
+
+        with sessao.lock:
+            if not self._sem_historico(sessao):
+                return None
+            resposta = self.respostas_rapidas.responder(pergunta)
+            if resposta is not None:
+                self._registrar_turno(sessao, pergunta, resposta)
+        return resposta
+
+    def _registrar_turno(self, sessao: _SessaoChat, pergunta: str, resposta: str) -> None:
+        """Anota no histórico da sessão um turno respondido sem o modelo (resposta rápida ou cache)."""
+        turno = [
+            {"role": "user", "parts": [f"Usuário: {pergunta}"]},
+            {"role": "model", "parts": [resposta]},
+        ]
+        try:
+            if sessao.chat is None:
+                sessao.turnos.extend(turno)
+                del sessao.turnos[:-2 * CHAT_HISTORY_MAX_TURNS]
+            else:
+                sessao.chat.history = list(sessao.chat.history) + turno
+                self._podar_historico(sessao.chat)
+        except Exception as e:
+            print("[Gemini] Não foi possível registrar o turno no histórico ->", e)
+
+    def _sem_historico(self, sessao: _SessaoChat) -> bool:
+        """True se a sessão ainda não tem turnos (no modo chat, só o contexto inicial)."""
+        if sessao.chat is None:
+            return not sessao.turnos
+        return len(sessao.chat.history) <= len(self._historico_base())
+
+    def _resposta_em_cache(self, pergunta: str, session_id: str) -> tuple[str | None, bool]:
+        """
+        Consulta o cache de respostas para a primeira pergunta de uma sessão.
+        Retorna (resposta em cache ou None, se a resposta do modelo pode ser guardada no cache).
+        """
+        if self.cache_respostas is None:
+            return None, False
+        try:
+            sessao = self._obter_sessao(session_id)
+            with sessao.lock:
+                if not self._sem_historico(sessao):
+                    return None, False
+                resposta = self.cache_respostas.get(pergunta)
+                if resposta is not None:
+                    self._registrar_turno(sessao, pergunta, resposta)
+                return resposta, True
+        except Exception as e:
+            print(f"[Cache] Falha ao consultar o cache de respostas da sessão {session_id}: {e}")
+            return None, False
+
+    def response_cache_stats(self) -> dict | None:
+        """Métricas do cache de respostas (None se desabilitado)."""
+        return self.cache_respostas.stats() if self.cache_respostas is not None else None
+
+    def faq_stats(self) -> dict | None:
+        """Acertos por intenção das respostas rápidas (None se desabilitadas)."""
+        return self.respostas_rapidas.stats() if self.respostas_rapidas is not None else None
+
+    def session_pool_stats(self) -> dict:
+        """Métricas do pool de sessões (tamanho, hits, despejos, expirações)."""
+        return self._sessoes.stats()
+
+    def _pos_processar(self, resposta: str) -> str:
+        # Aplica correções de formatação (ordem importa)
+        resposta = self._fix_social_media_links(resposta)
+        resposta = self._fix_link_formatting(resposta)
+        resposta = self._validate_response_formatting(resposta)
+        return resposta
+
     def _fix_social_media_links(self, resposta: str) -> str:
         """
         Corrige respostas sobre redes sociais que não incluem URLs.
@@ -697,11 +1251,119 @@ class Chatbot:
         return resposta
 
     # Este método é chamado toda vez que o usuário envia uma nova mensagem.
-    def gerar_resposta(self, pergunta: str) -> str:
+    # Com session_id, cada usuário tem sua própria sessão no pool; sem ele (terminal),
+    # usa a sessão única criada no __init__.
+    def gerar_resposta(self, pergunta: str, session_id: str | None = None) -> str:
+        # Validação simples para não enviar mensagens vazias para a API
+        imediata, cacheavel = self._resposta_imediata(pergunta, session_id)
+        if imediata is not None:
+            return imediata
+
+        if not session_id:
+            return self._gerar_resposta_sessao_unica(pergunta)
+        return self._gerar_resposta_modelo(pergunta, session_id, cacheavel)
+
+    def _resposta_imediata(self, pergunta: str, session_id: str | None) -> tuple[str | None, bool]:
+        """
+        Resposta que dispensa o modelo (pergunta vazia, resposta rápida ou cache), se houver.
+        Retorna (resposta ou None, se a resposta do modelo pode ser guardada no cache).
+        """
         # Validação simples para não enviar mensagens vazias para a API
         if not pergunta.strip():
-            return "Por favor, digite sua pergunta! Estou aqui para ajudar. 😄"
+            return "Por favor, digite sua pergunta! Estou aqui para ajudar. 😄", False
+
+        rapida = self._resposta_rapida(pergunta, session_id)
+        if rapida is not None:
+            return rapida, False
+
+        if not session_id:
+            return None, False
+        return self._resposta_em_cache(pergunta, session_id)
+
+    def _gerar_resposta_modelo(self, pergunta: str, session_id: str, cacheavel: bool) -> str:
+        # Cache da base vigente no início: se a base for trocada no meio, a resposta não entra na nova
+        cache_respostas = self.cache_respostas
+        for tentativa in range(2):
+            modelo = self.model
+            try:
+                sessao = self._obter_sessao(session_id)
+                with sessao.lock:
+                    resp = self._enviar(sessao, pergunta)
+                    text = getattr(resp, "text", None)
+                    if sessao.chat is not None:
+                        text = text or getattr(resp, "candidates", None)
+                    self._concluir_envio(sessao, pergunta, text)
+                resposta_final = text if isinstance(text, str) else (str(text) if text else MENSAGEM_FALHA)
+                resposta_final = self._pos_processar(resposta_final)
+                if cacheavel and cache_respostas is not None and isinstance(text, str) and text:
+                    cache_respostas.set(pergunta, resposta_final)
+                return resposta_final
+            except Exception as e:
+                print(f"[Gemini] erro na sessão {session_id}:", e)
+                # No modo chat, descarta só a sessão que falhou (o histórico pode ter ficado
+                # inconsistente); ela é reconstruída na nova tentativa. No stateless a janela local
+                # segue válida. As demais sessões e o modelo compartilhado não são tocados.
+                if self.modo_prompt != "stateless":
+                    self._sessoes.pop(session_id)
+                if tentativa == 0 and isinstance(e, _ERROS_DE_MODELO):
+                    if not self._reinicializar_modelo(modelo):
+                        break
+
+        return MENSAGEM_FALHA
+
+    def _reinicializar_modelo(self, modelo_com_erro) -> bool:
+        """
+        Recria o modelo compartilhado depois de um erro de modelo/configuração. Se outra requisição
+        já o recriou (self.model não é mais o que falhou), só reaproveita o novo.
+        """
+        with self._lock_modelo:
+            if self.model is not modelo_com_erro:
+                return True
+            if not getattr(self, "model_name", None):
+                return False
+            print("[Gemini] Tentando reinicializar o modelo após erro de modelo/configuração...")
+            return self._try_model(self.model_name.replace("models/", ""))
+
+    def gerar_resposta_stream(self, pergunta: str, session_id: str):
+        """
+        Versão em streaming de gerar_resposta para uma sessão. Gera eventos (tipo, texto):
+        ("chunk", pedaço) à medida que o modelo responde e, por último, ("final", resposta completa
+        já pós-processada), que substitui o texto parcial exibido.
+        """
+        imediata, cacheavel = self._resposta_imediata(pergunta, session_id)
+        if imediata is not None:
+            yield "final", imediata
+            return
+
+        cache_respostas = self.cache_respostas
+        partes = []
+        try:
+            sessao = self._obter_sessao(session_id)
+            with sessao.lock:
+                for chunk in self._enviar(sessao, pergunta, stream=True):
+                    pedaco = getattr(chunk, "text", None)
+                    if pedaco:
+                        partes.append(pedaco)
+                        yield "chunk", pedaco
+                self._concluir_envio(sessao, pergunta, "".join(partes))
+        except Exception as e:
+            print(f"[Gemini] erro no streaming da sessão {session_id}:", e)
+            if self.modo_prompt != "stateless":
+                self._sessoes.pop(session_id)
+            if not partes:
+                # Nada foi exibido ainda: tenta pelo caminho normal (com nova tentativa)
+                yield "final", self._gerar_resposta_modelo(pergunta, session_id, cacheavel)
+            else:
+                yield "final", MENSAGEM_FALHA
+            return
+
+        texto = "".join(partes)
+        resposta_final = self._pos_processar(texto or MENSAGEM_FALHA)
+        if cacheavel and cache_respostas is not None and texto:
+            cache_respostas.set(pergunta, resposta_final)
+        yield "final", resposta_final
 
+    def _gerar_resposta_sessao_unica(self, pergunta: str) -> str:
         # Verificar se chat_session existe, se não, reinicializar
         if not hasattr(self, 'chat_session') or self.chat_session is None:
             print("[Gemini] chat_session não existe, reinicializando...")
@@ -713,22 +1375,20 @@ class Chatbot:
                         print("[Gemini] Sessão reinicializada com sucesso")
                     except Exception as e:
                         print(f"[Gemini] Erro ao enviar contexto após reinicialização: {e}")
-                        return "Humm… não consegui processar agora 😅\nPode tentar reformular sua pergunta sobre o Jovem Programador?"
+                        return MENSAGEM_FALHA
                 else:
-                    return "Humm… não consegui processar agora 😅\nPode tentar reformular sua pergunta sobre o Jovem Programador?"
+                    return MENSAGEM_FALHA
             else:
-                return "Humm… não consegui processar agora 😅\nPode tentar reformular sua pergunta sobre o Jovem Programador?"
+                return MENSAGEM_FALHA
 
         try:
-            composed = f"Usuário: {pergunta}"
-            resp = self.chat_session.send_message(composed)
+            resp = self.chat_session.send_message(self._compor_mensagem(pergunta))
             text = getattr(resp, "text", None) or getattr(resp, "candidates", None)
-            resposta_final = text if isinstance(text, str) else (str(text) if text else "Humm… não consegui processar agora 😅\nPode tentar reformular sua pergunta sobre o Jovem Programador?")
-            # Aplica correções de formatação (ordem importa)
-            resposta_final = self._fix_social_media_links(resposta_final)
-            resposta_final = self._fix_link_formatting(resposta_final)
-            resposta_final = self._validate_response_formatting(resposta_final)
-            return resposta_final
+            if self.indice is not None:
+                self._compactar_historico(self.chat_session, pergunta)
+            self._podar_historico(self.chat_session)
+            resposta_final = text if isinstance(text, str) else (str(text) if text else MENSAGEM_FALHA)
+            return self._pos_processar(resposta_final)
         except Exception as e:
             print(f"[Gemini] erro:", e)
             # Tentar reinicializar a sessão automaticamente
@@ -740,17 +1400,11 @@ class Chatbot:
                         self.chat_session.send_message(self.contexto_inicial)
                         print("[Gemini] Sessão reinicializada, tentando novamente...")
                         # Tentar novamente
-                        composed = f"Usuário: {pergunta}"
-                        resp = self.chat_session.send_message(composed)
+                        resp = self.chat_session.send_message(self._compor_mensagem(pergunta))
                         text = getattr(resp, "text", None) or getattr(resp, "candidates", None)
                         if text and isinstance(text, str):
-                            resposta_final = text
-                            # Aplica correções de formatação (ordem importa)
-                            resposta_final = self._fix_social_media_links(resposta_final)
-                            resposta_final = self._fix_link_formatting(resposta_final)
-                            resposta_final = self._validate_response_formatting(resposta_final)
-                            return resposta_final
+                            return self._pos_processar(text)
             except Exception as e2:
                 print(f"[Gemini] Erro ao reinicializar sessão: {e2}")
             
-            return "Humm… não consegui processar agora 😅\nPode tentar reformular sua pergunta sobre o Jovem Programador?"
+            return MENSAGEM_FALHA
@@ -0,0 +1,255 @@
+"""
+Recuperação de trechos da base de conhecimento (dados.json) para montar prompts menores.
+
+- montar_trechos(): quebra as seções do dados.json em trechos curtos (uma dúvida, um pedaço de
+  notícia, a lista de apoiadores...), cada um com seção, título e link.
+- IndiceBM25: índice léxico invertido (BM25) sobre os tokens normalizados de utils.texto
+  (sem acentos, sem stopwords e com stemming leve).
+- IndiceVetorial: índice opcional de embeddings (requer numpy); a busca é um produto
+  matriz-vetor sobre os vetores normalizados.
+- IndiceConhecimento: junta os dois (fusão por posição, RRF) e formata os top-k trechos
+  para anexar à pergunta.
+"""
+
+import math
+import logging
+from collections import Counter, defaultdict
+
+from utils.texto import tokenizar
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional: sem ele só o BM25 é usado
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Tamanho alvo (caracteres) dos trechos de textos longos, como o corpo das notícias
+TAMANHO_TRECHO = 900
+
+# Peso do score das notícias: são muitas e longas, e sem isso encobrem as seções institucionais
+# (dúvidas, professor, cidades...) que respondem diretamente à pergunta
+PESO_NOTICIAS = 0.75
+
+# Constante da fusão RRF (reciprocal rank fusion) entre BM25 e embeddings
+_RRF_K = 60
+
+
+def _novo_trecho(secao: str, titulo: str, texto: str, link: str = "") -> dict:
+    return {"secao": secao, "titulo": titulo or "", "texto": texto.strip(), "link": link or ""}
+
+
+def _fatiar(texto: str, tamanho: int = TAMANHO_TRECHO) -> list[str]:
+    """Agrupa parágrafos (ou frases, se o parágrafo for grande) em pedaços de ~tamanho caracteres."""
+    partes = []
+    for paragrafo in (texto or "").split("\n"):
+        paragrafo = paragrafo.strip()
+        if not paragrafo:
+            continue
+        if len(paragrafo) <= tamanho:
+            partes.append(paragrafo)
+            continue
+        frase_atual = ""
+        for frase in paragrafo.replace(". ", ".\n").split("\n"):
+            if frase_atual and len(frase_atual) + len(frase) > tamanho:
+                partes.append(frase_atual)
+                frase_atual = ""
+            frase_atual = f"{frase_atual} {frase}".strip()
+        if frase_atual:
+            partes.append(frase_atual)
+
+    pedacos, atual = [], ""
+    for parte in partes:
+        if atual and len(atual) + len(parte) > tamanho:
+            pedacos.append(atual)
+            atual = ""
+        atual = f"{atual}\n{parte}".strip()
+    if atual:
+        pedacos.append(atual)
+    return pedacos
+
+
+def montar_trechos(dados: dict) -> list[dict]:
+    """Quebra as seções do dados.json em trechos indexáveis."""
+    trechos = []
+
+    for pedaco in _fatiar(dados.get("sobre") or ""):
+        trechos.append(_novo_trecho("sobre", "Sobre o programa", pedaco))
+
+    inscricoes = dados.get("inscricoes") or {}
+    if inscricoes:
+        texto = "\n".join(
+            p for p in (
+                inscricoes.get("texto_geral"),
+                f"Link para Inscrição: {inscricoes['link_inscricao']}" if inscricoes.get("link_inscricao") else "",
+                f"Link do Edital/Regulamento: {inscricoes['link_edital']}" if inscricoes.get("link_edital") else "",
+            ) if p
+        )
+        for pedaco in _fatiar(texto):
+            trechos.append(_novo_trecho("inscricoes", "Inscrições e editais", pedaco, inscricoes.get("link_inscricao")))
+
+    for pergunta, resposta in (dados.get("duvidas") or {}).items():
+        trechos.append(_novo_trecho("duvidas", pergunta, f"{pergunta}: {resposta}"))
+
+    if dados.get("cidades"):
+        trechos.append(_novo_trecho("cidades", "Cidades atendidas", f"Cidades onde o programa é oferecido: {dados['cidades']}"))
+
+    for noticia in dados.get("noticias") or []:
+        titulo = noticia.get("titulo", "")
+        for pedaco in _fatiar(noticia.get("texto_completo", "")):
+            trechos.append(_novo_trecho("noticias", titulo, pedaco, noticia.get("link")))
+
+    prof = dados.get("ser_professor") or {}
+    if prof.get("vagas_abertas"):
+        vagas = prof.get("vagas_abertas", {})
+        interesse = prof.get("registrar_interesse", {})
+        trechos.append(_novo_trecho(
+            "ser_professor",
+            prof.get("titulo") or "Como ser professor",
+            f"Para Vagas Abertas: {vagas.get('texto', '')} O link do portal é: {vagas.get('link', '')}\n"
+            f"Para Registrar Interesse: {interesse.get('texto', '')} A página para isso é: {interesse.get('link_pagina', '')}",
+        ))
+
+    hackathon = dados.get("hackathon") or {}
+    if hackathon.get("descricao") or hackathon.get("link_video"):
+        texto = hackathon.get("descricao", "")
+        if hackathon.get("link_video"):
+            texto += f"\nPara saber mais, assista ao vídeo principal: {hackathon['link_video']}"
+        for pedaco in _fatiar(texto):
+            trechos.append(_novo_trecho("hackathon", "Hackathon", pedaco))
+    for noticia in hackathon.get("noticias") or []:
+        trechos.append(_novo_trecho(
+            "hackathon",
+            noticia.get("titulo", ""),
+            f"{noticia.get('titulo', '')}\nResumo: {noticia.get('resumo', '')}",
+            noticia.get("link"),
+        ))
+
+    for chave in ("apoiadores", "patrocinadores", "parceiros"):
+        nomes = [item.get("nome", "") for item in dados.get(chave) or [] if item.get("nome")]
+        if nomes:
+            trechos.append(_novo_trecho(chave, chave.capitalize(), f"{chave.capitalize()} do programa: {', '.join(nomes)}."))
+
+    return trechos
+
+
+def _texto_indexado(trecho: dict) -> str:
+    # O título entra no texto indexado para pesar nas buscas (ex.: títulos de notícias)
+    if trecho["titulo"] and trecho["titulo"] not in trecho["texto"]:
+        return f"{trecho['titulo']}\n{trecho['texto']}"
+    return trecho["texto"]
+
+
+class IndiceBM25:
+    """Índice invertido com ranqueamento BM25 (Okapi)."""
+
+    def __init__(self, documentos: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(list)  # termo -> [(doc, tf), ...]
+        self._tamanhos = []
+        for doc, texto in enumerate(documentos):
+            tokens = tokenizar(texto)
+            self._tamanhos.append(len(tokens))
+            for termo, tf in Counter(tokens).items():
+                self._postings[termo].append((doc, tf))
+        total = len(self._tamanhos)
+        self._media = (sum(self._tamanhos) / total) if total else 0.0
+        self._idf = {
+            termo: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for termo, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._tamanhos)
+
+    def buscar(self, consulta: str, k: int = 5) -> list[tuple[int, float]]:
+        """Retorna [(índice do documento, score)] dos k melhores, maior score primeiro."""
+        scores = defaultdict(float)
+        for termo in set(tokenizar(consulta)):
+            idf = self._idf.get(termo)
+            if idf is None:
+                continue
+            for doc, tf in self._postings[termo]:
+                norm = self.k1 * (1 - self.b + self.b * self._tamanhos[doc] / self._media)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+
+class IndiceVetorial:
+    """
+    Índice de embeddings em memória (numpy). embed_fn(textos, task_type) retorna um vetor por
+    texto; é chamada uma vez para os documentos ("retrieval_document") e uma vez por consulta
+    ("retrieval_query").
+    """
+
+    def __init__(self, documentos: list[str], embed_fn):
+        if np is None:
+            raise RuntimeError("numpy não está instalado")
+        self.embed_fn = embed_fn
+        self._matriz = self._normalizar(np.asarray(embed_fn(documentos, "retrieval_document"), dtype=np.float32))
+
+    @staticmethod
+    def _normalizar(matriz):
+        normas = np.linalg.norm(matriz, axis=-1, keepdims=True)
+        return matriz / np.maximum(normas, 1e-12)
+
+    def buscar(self, consulta: str, k: int = 5) -> list[tuple[int, float]]:
+        vetor = self._normalizar(np.asarray(self.embed_fn([consulta], "retrieval_query")[0], dtype=np.float32))
+        scores = self._matriz @ vetor
+        k = min(k, len(scores))
+        melhores = np.argpartition(-scores, k - 1)[:k]
+        melhores = melhores[np.argsort(-scores[melhores])]
+        return [(int(i), float(scores[i])) for i in melhores]
+
+
+class IndiceConhecimento:
+    """Trechos do dados.json + índice BM25 (e, opcionalmente, de embeddings) sobre eles."""
+
+    def __init__(self, dados: dict, embed_fn=None):
+        self.trechos = montar_trechos(dados)
+        textos = [_texto_indexado(t) for t in self.trechos]
+        self.bm25 = IndiceBM25(textos)
+        self.vetorial = None
+        if embed_fn is not None:
+            try:
+                self.vetorial = IndiceVetorial(textos, embed_fn)
+            except Exception as e:
+                logger.warning(f"[Retrieval] Índice de embeddings indisponível, usando só BM25: {e}")
+
+    def buscar(self, pergunta: str, k: int = 5) -> list[dict]:
+        """Top-k trechos mais relevantes para a pergunta."""
+        lexicos = sorted(
+            (
+                (i, score * PESO_NOTICIAS if self.trechos[i]["secao"] == "noticias" else score)
+                for i, score in self.bm25.buscar(pergunta, k * 4)
+            ),
+            key=lambda item: -item[1],
+        )[: k * 2]
+        if self.vetorial is None:
+            return [self.trechos[i] for i, _ in lexicos[:k]]
+
+        try:
+            semanticos = self.vetorial.buscar(pergunta, k * 2)
+        except Exception as e:
+            logger.warning(f"[Retrieval] Falha na busca por embeddings: {e}")
+            return [self.trechos[i] for i, _ in lexicos[:k]]
+
+        # RRF: soma 1/(K + posição) de cada lista, sem depender da escala dos scores
+        fusao = defaultdict(float)
+        for resultados in (lexicos, semanticos):
+            for posicao, (i, _) in enumerate(resultados):
+                fusao[i] += 1.0 / (_RRF_K + posicao)
+        melhores = sorted(fusao.items(), key=lambda item: -item[1])[:k]
+        return [self.trechos[i] for i, _ in melhores]
+
+    @staticmethod
+    def formatar(trechos: list[dict]) -> str:
+        """Texto dos trechos no formato anexado ao prompt."""
+        blocos = []
+        for trecho in trechos:
+            cabecalho = f"[{trecho['secao']}] {trecho['titulo']}".strip()
+            if trecho["link"]:
+                cabecalho += f" ({trecho['link']})"
+            blocos.append(f"{cabecalho}\n{trecho['texto']}")
+        return "\n\n".join(blocos)
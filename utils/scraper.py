@@ -1,15 +1,243 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import defaultdict
+from urllib.parse import urlsplit
+import threading
+import hashlib
 import json
+import time
+import sys
+import os
 import re
 
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+TIMEOUT = 20
+
+# Limites de concorrência: requisições simultâneas por host e threads do pool de downloads
+MAX_CONEXOES_POR_HOST = 8
+MAX_TRABALHADORES = 16
+
+# lxml é bem mais rápido que o html.parser; é opcional (sem ele, cai no parser da biblioteca padrão)
+try:
+    import lxml  # noqa: F401
+
+    PARSER_HTML = "lxml"
+except ImportError:
+    PARSER_HTML = "html.parser"
+
+# Filtros de parsing: só as subárvores que cada raspagem usa são montadas
+FILTRO_HEADING = SoupStrainer("div", class_="fh5co-heading")
+FILTRO_ACCORDION = SoupStrainer("div", class_="accordion")
+FILTRO_ARTIGO = SoupStrainer("div", id="fh5co-blog-section")
+FILTRO_CARDS_NOTICIAS = SoupStrainer("div", class_="col-md-4")
+FILTRO_ITEM_GRID = SoupStrainer("a", class_="item-grid")
+FILTRO_NAV = SoupStrainer("nav", attrs={"role": "navigation"})
+FILTRO_PARAGRAFOS = SoupStrainer("p")
+FILTRO_TITULOS_E_LINKS = SoupStrainer(["h3", "a"])
+FILTRO_LINKS = SoupStrainer("a")
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+
+# Cache HTTP em disco (ETag / Last-Modified / hash do corpo) usado entre rodadas
+CACHE_HTTP_DIR = os.getenv("SCRAPER_CACHE_DIR", ".cache_scraper")
+
+
+class CacheHTTP:
+    """
+    Cache HTTP em disco, um par de arquivos por URL: <sha1>.json com ETag, Last-Modified e o
+    SHA-256 do corpo, e <sha1>.html com o corpo. Permite GETs condicionais (If-None-Match /
+    If-Modified-Since) e saber se uma página mudou desde a última rodada.
+    """
+
+    def __init__(self, pasta: str = CACHE_HTTP_DIR):
+        self.pasta = pasta
+        os.makedirs(pasta, exist_ok=True)
+
+    def _caminho(self, url: str, extensao: str) -> str:
+        return os.path.join(self.pasta, hashlib.sha1(url.encode("utf-8")).hexdigest() + extensao)
+
+    def carregar(self, url: str) -> tuple[dict, bytes] | None:
+        """(metadados, corpo) da última resposta 200 da URL, ou None."""
+        try:
+            with open(self._caminho(url, ".json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._caminho(url, ".html"), "rb") as f:
+                corpo = f.read()
+        except (OSError, ValueError):
+            return None
+        if hashlib.sha256(corpo).hexdigest() != meta.get("sha256"):
+            return None
+        return meta, corpo
+
+    def cabecalhos_condicionais(self, meta: dict) -> dict:
+        cabecalhos = {}
+        if meta.get("etag"):
+            cabecalhos["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            cabecalhos["If-Modified-Since"] = meta["last_modified"]
+        return cabecalhos
+
+    def salvar(self, url: str, response: requests.Response) -> str:
+        """Grava corpo e validadores (escrita atômica); retorna o hash do corpo."""
+        corpo = response.content
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag", ""),
+            "last_modified": response.headers.get("Last-Modified", ""),
+            "content_type": response.headers.get("Content-Type", ""),
+            "sha256": hashlib.sha256(corpo).hexdigest(),
+        }
+        for extensao, conteudo in ((".html", corpo), (".json", json.dumps(meta).encode("utf-8"))):
+            destino = self._caminho(url, extensao)
+            temporario = f"{destino}.{threading.get_ident()}.tmp"
+            with open(temporario, "wb") as f:
+                f.write(conteudo)
+            os.replace(temporario, destino)
+        return meta["sha256"]
+
+
+class Navegador:
+    """
+    Sessão HTTP de uma rodada de raspagem.
+
+    - Uma requests.Session com pool de conexões (keep-alive) compartilhada por todos os raspar_*.
+    - No máximo MAX_CONEXOES_POR_HOST requisições simultâneas por host.
+    - Memo por rodada: cada URL é baixada uma única vez, mesmo se pedida por várias threads
+      ao mesmo tempo (sobre.php serve a sobre, cidades e redes sociais).
+    """
+
+    def __init__(
+        self,
+        max_por_host: int = MAX_CONEXOES_POR_HOST,
+        max_trabalhadores: int = MAX_TRABALHADORES,
+        cache: CacheHTTP | None = None,
+    ):
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=max_por_host)
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+        self._executor = ThreadPoolExecutor(max_workers=max_trabalhadores, thread_name_prefix="raspagem")
+        self._limites = defaultdict(lambda: threading.BoundedSemaphore(max_por_host))
+        self._memo = {}  # url -> Future[Response]
+        self._lock = threading.Lock()
+        self.paginas = 0
+        self.bytes = 0
+        self.revalidadas = 0  # respostas 304: corpo veio do cache em disco
+        self.inalteradas = 0  # páginas (200 ou 304) com o mesmo hash da rodada anterior
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def obter(self, url: str) -> requests.Response:
+        """GET memoizado: a primeira thread baixa, as demais esperam pelo mesmo resultado."""
+        with self._lock:
+            futuro = self._memo.get(url)
+            dono = futuro is None
+            if dono:
+                futuro = self._memo[url] = Future()
+        if dono:
+            try:
+                futuro.set_result(self._baixar(url))
+            except Exception as e:
+                futuro.set_exception(e)
+        return futuro.result()
+
+    def _baixar(self, url: str) -> requests.Response:
+        """
+        GET (condicional, se houver cache). A resposta ganha o atributo `inalterada`: True quando
+        o corpo é o mesmo da rodada anterior (304 ou mesmo SHA-256), para o chamador reaproveitar
+        o que já extraiu dessa página.
+        """
+        anterior = self.cache.carregar(url) if self.cache else None
+        cabecalhos = self.cache.cabecalhos_condicionais(anterior[0]) if anterior else {}
+        with self._limite(url):
+            response = self.session.get(url, timeout=TIMEOUT, headers=cabecalhos)
+
+        revalidada = response.status_code == 304 and anterior is not None
+        if revalidada:
+            meta, corpo = anterior
+            response.status_code = 200
+            response._content = corpo
+            if meta.get("content_type"):
+                response.headers["Content-Type"] = meta["content_type"]
+            response.inalterada = True
+        else:
+            response.inalterada = False
+            if self.cache and response.status_code == 200:
+                try:
+                    hash_corpo = self.cache.salvar(url, response)
+                    response.inalterada = anterior is not None and hash_corpo == anterior[0]["sha256"]
+                except OSError as e:
+                    print(f"⚠️ AVISO: não foi possível gravar {url} no cache HTTP: {e}")
+
+        with self._lock:
+            self.paginas += 1
+            self.bytes += 0 if revalidada else len(response.content)
+            self.revalidadas += revalidada
+            self.inalteradas += response.inalterada
+        return response
+
+    def _limite(self, url: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            return self._limites[urlsplit(url).netloc]
+
+    def mapear(self, funcao, itens) -> list:
+        """Aplica funcao a cada item no pool de downloads, preservando a ordem dos resultados."""
+        return list(self._executor.map(funcao, itens))
+
+    def respostas(self) -> dict:
+        """URL -> Response de todas as páginas baixadas com sucesso nesta rodada."""
+        with self._lock:
+            futuros = list(self._memo.items())
+        return {
+            url: futuro.result()
+            for url, futuro in futuros
+            if futuro.done() and futuro.exception() is None
+        }
+
+
+def _sopa(response: requests.Response, filtro: SoupStrainer | None = None) -> BeautifulSoup:
+    """
+    BeautifulSoup direto dos bytes da resposta (sem decodificar o .text antes), com o lxml quando
+    disponível e, se houver filtro, montando só as subárvores que casam com ele. Sem charset no
+    Content-Type, o BeautifulSoup detecta a codificação pela <meta> da página.
+    """
+    charset = _CHARSET_RE.search(response.headers.get("Content-Type", ""))
+    return BeautifulSoup(
+        response.content,
+        PARSER_HTML,
+        parse_only=filtro,
+        from_encoding=charset.group(1) if charset else None,
+    )
+
+
+def _obter(url: str, navegador: Navegador | None = None) -> requests.Response:
+    """GET pela sessão da rodada, se houver; senão, uma requisição avulsa."""
+    if navegador is None:
+        return requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+    return navegador.obter(url)
+
+
 #  raspagem do sobre
-def raspar_sobre():
+def raspar_sobre(navegador=None):
     try:
         url = "https://www.jovemprogramador.com.br/sobre.php"
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = _obter(url, navegador)
+        soup = _sopa(response, FILTRO_HEADING)
 
         secao_sobre = soup.find("div", class_="fh5co-heading")
 
@@ -39,11 +267,11 @@ def raspar_sobre():
 # raspagem de dúvidas frequentes
 
 
-def raspar_duvidas():
+def raspar_duvidas(navegador=None):
     try:
         url = "https://www.jovemprogramador.com.br/duvidas.php"
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = _obter(url, navegador)
+        soup = _sopa(response, FILTRO_ACCORDION)
         duvidas = {}
 
         accordion = soup.find("div", class_="accordion")
@@ -73,11 +301,11 @@ def raspar_duvidas():
 # raspasgem de cidades
 
 
-def raspar_cidades():
+def raspar_cidades(navegador=None):
     try:
         url = "https://www.jovemprogramador.com.br/sobre.php"
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = _obter(url, navegador)
+        soup = _sopa(response, FILTRO_PARAGRAFOS)
 
         for p in soup.find_all("p"):
             if p.get_text(strip=True).startswith("Para a edição de"):
@@ -98,21 +326,63 @@ def raspar_cidades():
 # raspagem de notícias (Explicar)
 
 
-def raspar_noticias():
+TEXTO_ARTIGO_INDISPONIVEL = "Não foi possível extrair o texto completo do artigo."
+
+
+def _raspar_artigo(artigo: dict, navegador: Navegador) -> dict | None:
+    """Baixa a página de um artigo e extrai TODO o texto da seção principal."""
+    titulo, link_absoluto = artigo["titulo"], artigo["link"]
+    print(f"    -> Raspando conteúdo do artigo {artigo['posicao']}: {titulo}")
+    try:
+        response_artigo = _obter(link_absoluto, navegador)
+        if response_artigo.status_code != 200:
+            return None
+
+        # Página idêntica à da rodada anterior (304 ou mesmo hash): reaproveita o texto já extraído
+        anterior = artigo.get("anterior")
+        if anterior and getattr(response_artigo, "inalterada", False):
+            return {**anterior, "titulo": titulo}
+
+        soup_artigo = _sopa(response_artigo, FILTRO_ARTIGO)
+
+        # Já na página do artigo, procura pela seção de conteúdo principal
+        secao_artigo = soup_artigo.find("div", id="fh5co-blog-section")
+
+        # Extrai TODO o texto dessa seção, limpando espaços extras
+        # e juntando tudo em uma string.
+        if secao_artigo:
+            texto_completo = secao_artigo.get_text(separator="\n", strip=True)
+        else:
+            texto_completo = TEXTO_ARTIGO_INDISPONIVEL
+
+        return {
+            "titulo": titulo,
+            "link": link_absoluto,
+            "texto_completo": texto_completo,
+        }
+    except Exception as e_artigo:
+        # Se der algum erro ao acessar o artigo, registra o erro
+        # e segue com os demais, sem travar o programa.
+        print(f"      - ERRO ao processar o artigo {link_absoluto}: {e_artigo}")
+        return None
+
+
+def raspar_noticias(navegador=None, noticias_anteriores=None):
     """
     Raspa a lista de notícias e, em seguida, visita cada link para
-    extrair TODO o texto de cada artigo.
+    extrair TODO o texto de cada artigo (em paralelo, pelo pool do Navegador).
+
+    Com noticias_anteriores (a lista do dados.json atual), artigos já conhecidos, com o mesmo
+    link e o mesmo título na página de listagem, são reaproveitados sem nova requisição.
     """
-    print(
-        "📰 Iniciando raspagem profunda de TODAS as notícias (isso pode levar alguns minutos)..."
-    )
+    print("📰 Iniciando raspagem profunda de TODAS as notícias...")
+    proprio = navegador is None
+    if proprio:
+        navegador = Navegador()
     try:
         # 1. Visita a página que contém a lista de todas as notícias
         url_lista = "https://www.jovemprogramador.com.br/noticias.php"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response_lista = requests.get(url_lista, headers=headers)
+        response_lista = _obter(url_lista, navegador)
 
         if response_lista.status_code != 200:
             print(
@@ -121,89 +391,75 @@ def raspar_noticias():
             return {"noticias": []}
 
         # 2. Analisa o HTML e encontra todos os "cards" de resumo das notícias
-        soup_lista = BeautifulSoup(response_lista.text, "html.parser")
-        noticias_completas = []
+        soup_lista = _sopa(response_lista, FILTRO_CARDS_NOTICIAS)
         cards_containers = soup_lista.find_all("div", class_="col-md-4")
 
-        # 3. Ela conta quantos artigos encontrou para saber o tamanho da missão
+        # 3. Conta quantos artigos encontrou para saber o tamanho da missão
         total_noticias = len(cards_containers)
         print(f"Encontrados {total_noticias} artigos para extrair.")
 
-        # 4. Para cada card de notícia, o código extrai o título e o link para a página completa
+        # 4. Para cada card de notícia, extrai o título e o link para a página completa
+        artigos = []
         for i, container in enumerate(cards_containers):
             titulo_tag = container.find("h3", class_="title")
             link_tag = container.find("a")
 
             if titulo_tag and link_tag and "href" in link_tag.attrs:
-                titulo = titulo_tag.get_text(strip=True)
-                link_absoluto = (
-                    f"https://www.jovemprogramador.com.br/{link_tag['href']}"
-                )
-
-                print(
-                    f"    -> Raspando conteúdo do artigo {i+1}/{total_noticias}: {titulo}"
+                artigos.append(
+                    {
+                        "titulo": titulo_tag.get_text(strip=True),
+                        "link": f"https://www.jovemprogramador.com.br/{link_tag['href']}",
+                        "posicao": f"{i+1}/{total_noticias}",
+                    }
                 )
 
-                # 5. O "Pulo do Gato": O scraper visita o link individual do artigo
-                try:
-                    response_artigo = requests.get(link_absoluto, headers=headers)
-                    if response_artigo.status_code == 200:
-                        soup_artigo = BeautifulSoup(response_artigo.text, "html.parser")
-
-                        # 6. Já na página do artigo, ele procura pela seção de conteúdo principal
-                        secao_artigo = soup_artigo.find("div", id="fh5co-blog-section")
-
-                        # 7. Extrai TODO o texto dessa seção, limpando espaços extras
-                        #    e juntando tudo em uma string.
-                        texto_completo = ""
-                        if secao_artigo:
-                            texto_completo = secao_artigo.get_text(
-                                separator="\n", strip=True
-                            )
-                        else:
-                            texto_completo = (
-                                "Não foi possível extrair o texto completo do artigo."
-                            )
-
-                        # 8. Adiciona o título, link e texto completo à lista de notícias
-                        #    para que possamos usar depois. ele armazena tudo de forma organizada.
-                        noticias_completas.append(
-                            {
-                                "titulo": titulo,
-                                "link": link_absoluto,
-                                "texto_completo": texto_completo,
-                            }
-                        )
-                except Exception as e_artigo:
-
-                    # 9. Se der algum erro ao acessar o artigo, ele registra o erro
-                    #    e continua com o próximo artigo, sem travar o programa.
-                    print(
-                        f"      - ERRO ao processar o artigo {link_absoluto}: {e_artigo}"
-                    )
+        # 5. Artigos já conhecidos são reaproveitados; só os novos, os que mudaram de título
+        #    na listagem e os que falharam na rodada anterior são baixados de novo
+        conhecidas = {n["link"]: n for n in noticias_anteriores or [] if n.get("link")}
+        resultados = [None] * len(artigos)
+        pendentes = []
+        for indice, artigo in enumerate(artigos):
+            anterior = conhecidas.get(artigo["link"])
+            if (
+                anterior
+                and anterior.get("titulo") == artigo["titulo"]
+                and anterior.get("texto_completo") not in ("", TEXTO_ARTIGO_INDISPONIVEL)
+            ):
+                resultados[indice] = anterior
+            else:
+                artigo["anterior"] = anterior
+                pendentes.append(indice)
+
+        # 6. O "Pulo do Gato": visita os links individuais dos artigos em paralelo
+        #    (a ordem da lista é preservada)
+        baixados = navegador.mapear(lambda indice: _raspar_artigo(artigos[indice], navegador), pendentes)
+        for indice, noticia in zip(pendentes, baixados):
+            resultados[indice] = noticia
+        noticias_completas = [noticia for noticia in resultados if noticia]
 
         print(
-            f"✅ SUCESSO! Conteúdo completo de {len(noticias_completas)} notícias extraído."
+            f"✅ SUCESSO! Conteúdo completo de {len(noticias_completas)} notícias extraído "
+            f"({len(artigos) - len(pendentes)} reaproveitadas, {len(pendentes)} baixadas)."
         )
         return {"noticias": noticias_completas}
 
     except Exception as e:
         print(f"❌ ERRO INESPERADO na função raspar_noticias: {e}")
         return {"noticias": []}
+    finally:
+        if proprio:
+            navegador.fechar()
 
 
 # raspagem de ser professor
 
 
-def raspar_ser_professor():
+def raspar_ser_professor(navegador=None):
     """Raspa as informações da página 'Quero Ser Professor'."""
     print("🧑‍🏫 Raspando informações sobre 'Quero Ser Professor'...")
     try:
         url = "https://www.jovemprogramador.com.br/queroserprofessor/"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers)
+        response = _obter(url, navegador)
 
         if response.status_code != 200:
             print(
@@ -211,7 +467,7 @@ def raspar_ser_professor():
             )
             return {"ser_professor": {}}
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _sopa(response, FILTRO_TITULOS_E_LINKS)
 
         # Encontrar a informação sobre vagas abertas
         h3_vagas = soup.find("h3", string=re.compile(r"Acesse o portal do Senac SC"))
@@ -253,15 +509,12 @@ def raspar_ser_professor():
 # raspagem de hackathon
 
 
-def raspar_hackathon():
+def raspar_hackathon(navegador=None):
     """Raspa a descrição, vídeo e notícias relacionadas da página do Hackathon."""
     print("🏆 Raspando informações completas sobre o Hackathon...")
     try:
         url = "https://www.jovemprogramador.com.br/hackathon/"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers)
+        response = _obter(url, navegador)
 
         if response.status_code != 200:
             print(
@@ -269,7 +522,7 @@ def raspar_hackathon():
             )
             return {"hackathon": {}}
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _sopa(response)
 
         # ---  Extrair a descrição geral ---
         descricao = ""
@@ -324,19 +577,16 @@ def raspar_hackathon():
 # raspagem de redes sociais
 
 
-def raspar_redes_sociais():
+def raspar_redes_sociais(navegador=None):
     """Raspa os links das redes sociais do cabeçalho do site."""
     print("📱 Raspando links das redes sociais...")
     try:
 
         url = "https://www.jovemprogramador.com.br/sobre.php"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=15)
+        response = _obter(url, navegador)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _sopa(response, FILTRO_NAV)
 
         redes = {}
         # Encontramos o elemento <nav> que contém os links
@@ -371,18 +621,15 @@ def raspar_redes_sociais():
 # raspagem dos apoiadores
 
 
-def raspar_apoiadores():
+def raspar_apoiadores(navegador=None):
     """Raspa a lista de empresas apoiadoras do programa."""
     print("🤝 Raspando lista de Apoiadores...")
     try:
         url = "https://www.jovemprogramador.com.br/apoiadores.php"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=15)
+        response = _obter(url, navegador)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _sopa(response, FILTRO_ITEM_GRID)
 
         apoiadores = []
         # O seletor 'a' com a classe 'item-grid' parece ser o ideal para cada apoiador
@@ -418,18 +665,15 @@ def raspar_apoiadores():
 # raspagem dos patriconadores
 
 
-def raspar_patrocinadores():
+def raspar_patrocinadores(navegador=None):
     """Raspa a lista de empresas patrocinadoras do programa."""
     print("💰 Raspando lista de Patrocinadores...")
     try:
         url = "https://www.jovemprogramador.com.br/patrocinadores.php"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=15)
+        response = _obter(url, navegador)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _sopa(response, FILTRO_ITEM_GRID)
 
         patrocinadores = []
         # A estrutura e classes são as mesmas, o que é ótimo!
@@ -463,7 +707,7 @@ def raspar_patrocinadores():
 # raspagem dos parceiros
 
 
-def raspar_parceiros():
+def raspar_parceiros(navegador=None):
     """
     Raspa a lista de parceiros do programa, pegando apenas os primeiros
     itens para garantir que sejam os parceiros principais.
@@ -471,13 +715,10 @@ def raspar_parceiros():
     print("👥 Raspando lista de Parceiros (tentativa final e mais direta)...")
     try:
         url = "https://www.jovemprogramador.com.br/parceiros.php"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=15)
+        response = _obter(url, navegador)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _sopa(response, FILTRO_ITEM_GRID)
 
         parceiros = []
 
@@ -519,16 +760,13 @@ def raspar_parceiros():
 # raspagem links de acesso
 
 
-def raspar_links_acesso():
+def raspar_links_acesso(navegador=None):
     print("🔑 Raspando links de acesso...")
     try:
         url = "https://www.jovemprogramador.com.br/"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=15)
+        response = _obter(url, navegador)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _sopa(response, FILTRO_LINKS)
         links_acesso = {}
         todos_os_links = soup.find_all("a")
         for link in todos_os_links:
@@ -546,13 +784,12 @@ def raspar_links_acesso():
         print(f"❌ ERRO ao raspar links de acesso: {e}")
         return {"links_acesso": {}}
 
-def raspar_inscricoes():
+def raspar_inscricoes(navegador=None):
     try:
         url = "https://www.jovemprogramador.com.br/inscricoes-jovem-programador/"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=20)
+        response = _obter(url, navegador)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _sopa(response)
 
         textos = []
         containers = []
@@ -634,27 +871,93 @@ def raspar_inscricoes():
 # dito isso, salvar tudo
 
 
-def salvar_dados():
+# Chave no dados.json -> função que a raspa (a ordem é a do arquivo gerado)
+RASPADORES = (
+    ("sobre", raspar_sobre),
+    ("duvidas", raspar_duvidas),
+    ("cidades", raspar_cidades),
+    ("noticias", raspar_noticias),
+    ("ser_professor", raspar_ser_professor),
+    ("hackathon", raspar_hackathon),
+    ("redes_sociais", raspar_redes_sociais),
+    ("apoiadores", raspar_apoiadores),
+    ("patrocinadores", raspar_patrocinadores),
+    ("parceiros", raspar_parceiros),
+    ("links_acesso", raspar_links_acesso),
+    ("inscricoes", raspar_inscricoes),
+)
+
+
+def _carregar_dados(caminho: str) -> dict:
+    """dados.json da rodada anterior (vazio se não existir ou estiver corrompido)."""
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def raspar_tudo(navegador: Navegador, noticias_anteriores: list | None = None) -> dict:
+    """Roda todas as seções ao mesmo tempo, compartilhando a sessão e o memo de páginas."""
+    argumentos = {"noticias": {"noticias_anteriores": noticias_anteriores}}
+    with ThreadPoolExecutor(max_workers=len(RASPADORES), thread_name_prefix="secao") as executor:
+        futuros = [
+            (chave, executor.submit(funcao, navegador, **argumentos.get(chave, {})))
+            for chave, funcao in RASPADORES
+        ]
+    return {chave: futuro.result()[chave] for chave, futuro in futuros}
+
+
+def gravar_dados(dados: dict, caminho: str = "dados.json") -> None:
+    """
+    Grava o dados.json de forma atômica: escreve num temporário na mesma pasta e troca com
+    os.replace, para quem lê o arquivo (o chatbot) nunca ver um JSON pela metade.
+    """
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def salvar_dados(incremental: bool = True, caminho: str = "dados.json") -> dict | None:
+    """
+    Raspa o site inteiro e grava o dados.json. No modo incremental (padrão), reaproveita as
+    notícias do dados.json anterior e faz GETs condicionais com o cache HTTP em disco;
+    incremental=False baixa e processa tudo de novo.
+
+    Se a raspagem voltar sem notícias e sem dúvidas (site fora do ar, por exemplo), o arquivo
+    existente é mantido e a função retorna None; senão retorna os dados gravados.
+    """
     print("\n🚀 Iniciando raspagem completa do site...")
-    dados = {
-        "sobre": raspar_sobre()["sobre"],
-        "duvidas": raspar_duvidas()["duvidas"],
-        "cidades": raspar_cidades()["cidades"],
-        "noticias": raspar_noticias()["noticias"],
-        "ser_professor": raspar_ser_professor()["ser_professor"],
-        "hackathon": raspar_hackathon()["hackathon"],
-        "redes_sociais": raspar_redes_sociais()["redes_sociais"],
-        "apoiadores": raspar_apoiadores()["apoiadores"],
-        "patrocinadores": raspar_patrocinadores()["patrocinadores"],
-        "parceiros": raspar_parceiros()["parceiros"],
-        "links_acesso": raspar_links_acesso()["links_acesso"],
-        "inscricoes": raspar_inscricoes()["inscricoes"],
-    }
-
-    with open("dados.json", "w", encoding="utf-8") as f:
-        json.dump(dados, f, ensure_ascii=False, indent=2)
-    print("\n✅ Dados atualizados e salvos com sucesso em 'dados.json'")
+    inicio = time.perf_counter()
+    anteriores = _carregar_dados(caminho) if incremental else {}
+
+    try:
+        cache = CacheHTTP() if incremental else None
+    except OSError as e:
+        print(f"⚠️ AVISO: cache HTTP indisponível ({e}); seguindo sem ele.")
+        cache = None
+
+    with Navegador(cache=cache) as navegador:
+        dados = raspar_tudo(navegador, anteriores.get("noticias"))
+
+    if not dados.get("noticias") and not dados.get("duvidas"):
+        print(f"\n❌ ERRO: a raspagem não trouxe notícias nem dúvidas; '{caminho}' não foi alterado.")
+        return None
+
+    gravar_dados(dados, caminho)
+    print(
+        f"\n✅ Dados atualizados e salvos com sucesso em '{caminho}' "
+        f"({navegador.paginas} páginas, {navegador.revalidadas} não modificadas (304), "
+        f"{navegador.bytes / 1024:.0f} KB baixados, {time.perf_counter() - inicio:.1f}s)"
+    )
+    return dados
 
 
 if __name__ == "__main__":
-    salvar_dados()
+    # --completo ignora o dados.json anterior e o cache HTTP
+    salvar_dados(incremental="--completo" not in sys.argv[1:])
@@ -0,0 +1,74 @@
+import re
+import unicodedata
+
+# Palavras muito frequentes em português que não ajudam a diferenciar perguntas/trechos
+STOPWORDS = frozenset(
+    """
+    a ao aos as ate com como da das de dela dele deles do dos e ela ele eles em entre era essa
+    esse esta estao este eu foi foram ha isso isto ja la lhe mais mas me meu minha muito na nas
+    nem no nos nossa nosso num numa o os ou para pela pelas pelo pelos por qual quais quando que
+    quem se sem ser seu sua suas seus so sobre sao tambem te tem tendo ter teu tua um uma umas uns
+    vai voce voces vos pra pro pras pros vc vcs
+    """.split()
+)
+
+# Palavras que mudam o sentido da pergunta ("quando é o hackathon?" x "o que é o hackathon?",
+# "tem custo?" x "não tem custo?"): fora da lista de stopwords onde a pergunta inteira vira chave
+NEGACOES = frozenset(("nao", "nem", "sem"))
+PALAVRAS_DE_SENTIDO = frozenset(
+    "como onde qual quais quando quanto quanta quantos quantas que quem porque".split()
+) | NEGACOES
+STOPWORDS_PERGUNTA = STOPWORDS - PALAVRAS_DE_SENTIDO
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Sufixos do stemmer leve: plural (com a terminação que o substitui) e derivacionais/verbais
+_SUFIXOS_PLURAL = (
+    ("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ores", "or"), ("ns", "m"), ("s", ""),
+)
+_SUFIXOS = (
+    "amentos", "imentos", "amento", "imento", "acao", "icao",
+    "mente", "idade", "ismo", "ista", "ivel", "avel", "ador", "edor",
+    "ando", "endo", "indo", "ados", "idos", "ada", "ida", "ado", "ido", "ar", "er", "ir",
+)
+_VOGAIS_FINAIS = ("a", "e", "o")
+
+
+def strip_accents(texto: str) -> str:
+    """Remove acentos (NFD + descarte das marcas combinantes)."""
+    return "".join(c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    if not isinstance(texto, str):
+        return ""
+    return " ".join(strip_accents(texto).lower().split())
+
+
+def stem(palavra: str) -> str:
+    """
+    Stemmer leve para português (inspirado no RSLP): remove plural, um sufixo derivacional/verbal
+    e a vogal final, preservando radicais curtos ("inscrições" e "inscrição" -> "inscr").
+    """
+    if len(palavra) <= 3 or palavra.isdigit():
+        return palavra
+    for suf, troca in _SUFIXOS_PLURAL:
+        if palavra.endswith(suf) and len(palavra) - len(suf) >= 3:
+            palavra = palavra[: -len(suf)] + troca
+            break
+    for suf in _SUFIXOS:
+        if palavra.endswith(suf) and len(palavra) - len(suf) >= 3:
+            palavra = palavra[: -len(suf)]
+            break
+    if palavra.endswith(_VOGAIS_FINAIS) and len(palavra) > 4:
+        palavra = palavra[:-1]
+    return palavra
+
+
+def tokenizar(texto: str, stemming: bool = True, stopwords: frozenset = STOPWORDS) -> list[str]:
+    """Tokens normalizados do texto, sem stopwords (e com stemming, por padrão)."""
+    tokens = [t for t in _TOKEN_RE.findall(normalizar(texto)) if t not in stopwords]
+    if stemming:
+        return [stem(t) for t in tokens]
+    return tokens